@@ -0,0 +1,233 @@
+"""
+Local stand-in for the OpenAI endpoints the service uses:
+
+  POST /v1/embeddings
+  POST /v1/chat/completions
+  POST /v1/audio/transcriptions
+
+Responses are deterministic (embeddings are seeded from the input), and
+latency, jitter and 429 injection are configurable so benchmarks can run
+offline and without spending money.
+
+    python -m bench.fake_openai --port 8765 --latency-ms 80 --jitter-ms 20 --rate-429 0.02
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+EMBEDDING_DIM = 1536
+WAV_BYTES_PER_SEC = 16000 * 2          # 16 kHz mono s16le, as produced by video2text
+SEGMENT_SEC = 5.0
+
+FAKE_SUMMARY = {
+    "short_description": "A synthetic masterclass used for offline benchmarking.",
+    "key_examples": ["Example one", "Example two", "Example three", "Example four"],
+    "conclusion": "Benchmarks should not depend on a paid API.",
+}
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    rate_429: float = 0.0
+    # Transcription scales with audio length like the real API does
+    transcribe_ms_per_audio_sec: float = 2.0
+    dim: int = EMBEDDING_DIM
+    seed: int = 0
+    counts: dict = field(default_factory=dict)
+
+
+def fake_embedding(item, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Deterministic unit vector derived from the input (text or token ids)."""
+    digest = hashlib.sha256(json.dumps(item).encode("utf-8")).digest()
+    rng = random.Random(digest)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vec) ** 0.5 or 1.0
+    return [v / norm for v in vec]
+
+
+def _token_estimate(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "FakeOpenAI/1.0"
+    config: FakeConfig = FakeConfig()
+    _rng = random.Random(0)
+    _lock = threading.Lock()
+
+    def log_message(self, fmt, *args):  # keep benchmark output clean
+        pass
+
+    # ─── Plumbing ────────────────────────────────────────────
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self, endpoint: str, extra_ms: float = 0.0) -> bool:
+        """Sleep for the configured latency; return False if a 429 was injected."""
+        cfg = self.config
+        with self._lock:
+            cfg.counts[endpoint] = cfg.counts.get(endpoint, 0) + 1
+            jitter = self._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+            throttled = self._rng.random() < cfg.rate_429
+        if throttled:
+            cfg.counts["429"] = cfg.counts.get("429", 0) + 1
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit reached (injected)", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                headers={"Retry-After": "0.1"},
+            )
+            return False
+        time.sleep(max(0.0, cfg.latency_ms + jitter + extra_ms) / 1000.0)
+        return True
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def do_POST(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/embeddings"):
+            return self._embeddings(json.loads(self._read_body() or b"{}"))
+        if path.endswith("/chat/completions"):
+            return self._chat(json.loads(self._read_body() or b"{}"))
+        if path.endswith("/audio/transcriptions"):
+            return self._transcription(self._read_body())
+        self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+
+    # ─── Endpoints ───────────────────────────────────────────
+    def _embeddings(self, req: dict) -> None:
+        inputs = req.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        if not self._simulate("embeddings"):
+            return
+        dim = req.get("dimensions") or self.config.dim
+        data = []
+        for i, item in enumerate(inputs):
+            vec = fake_embedding(item, dim)
+            if req.get("encoding_format") == "base64":
+                vec = base64.b64encode(struct.pack(f"<{dim}f", *vec)).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vec})
+        tokens = sum(len(x) if isinstance(x, list) else _token_estimate(x) for x in inputs)
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": req.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _chat(self, req: dict) -> None:
+        if not self._simulate("chat"):
+            return
+        prompt = "\n".join(str(m.get("content", "")) for m in req.get("messages", []))
+        if "clean JSON" in prompt:
+            content = json.dumps(FAKE_SUMMARY)
+        else:
+            content = "This is a synthetic answer generated by the fake OpenAI server."
+        prompt_tokens, completion_tokens = _token_estimate(prompt), _token_estimate(content)
+        self._send_json(200, {
+            "id": f"chatcmpl-fake-{self.config.counts['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": req.get("model", "gpt-3.5-turbo"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+                "logprobs": None,
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _transcription(self, body: bytes) -> None:
+        # Multipart body: the audio part dominates, so its size gives the duration
+        duration = len(body) / WAV_BYTES_PER_SEC
+        if not self._simulate("transcription", extra_ms=duration * self.config.transcribe_ms_per_audio_sec):
+            return
+        match = re.search(rb'name="model"\r\n\r\n([^\r]+)', body)
+        segments, t, i = [], 0.0, 0
+        while t < duration:
+            end = min(duration, t + SEGMENT_SEC)
+            segments.append({
+                "id": i, "seek": 0, "start": t, "end": end,
+                "text": f" Synthetic segment {i}.", "tokens": [], "temperature": 0.0,
+                "avg_logprob": -0.1, "compression_ratio": 1.0, "no_speech_prob": 0.0,
+            })
+            t, i = end, i + 1
+        self._send_json(200, {
+            "task": "transcribe",
+            "language": "english",
+            "duration": duration,
+            "model": match.group(1).decode() if match else "whisper-1",
+            "text": "".join(s["text"] for s in segments).strip(),
+            "segments": segments,
+        })
+
+
+def start_server(config: FakeConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake server on a daemon thread; port 0 picks a free port."""
+    handler = type("ConfiguredFakeOpenAIHandler", (FakeOpenAIHandler,), {
+        "config": config,
+        "_rng": random.Random(config.seed),
+        "_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-openai").start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake OpenAI server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Base latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Uniform ± jitter added to the latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--transcribe-ms-per-sec", type=float, default=2.0, help="Extra transcription latency per second of audio")
+    args = parser.parse_args()
+
+    config = FakeConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        transcribe_ms_per_audio_sec=args.transcribe_ms_per_sec,
+    )
+    server = start_server(config, args.host, args.port)
+    print(f"🧪 Fake OpenAI listening on {base_url(server)} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
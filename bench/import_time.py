@@ -0,0 +1,110 @@
+"""
+Import-time benchmark. Each module is imported in a fresh interpreter so
+nothing is already cached in sys.modules; `python -X importtime` attributes
+the cost to the top-level packages that dominate it.
+
+    python -m bench.import_time
+    python -m bench.import_time --modules server core.chat --repeat 5 --output import_times.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+
+DEFAULT_MODULES = [
+    "server",
+    "routes.transcribe_api",
+    "routes.summarize_api",
+    "routes.vectorize_api",
+    "routes.chat_api",
+    "routes.pipeline_api",
+    "core.chat",
+    "core.document_vectorizer",
+]
+
+TIMER = (
+    "import time, importlib, sys; "
+    "t = time.perf_counter(); importlib.import_module(sys.argv[1]); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BASE_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("OPENAI_API_KEY", "sk-import-bench")  # some modules build clients at import
+    env.pop("WARMUP", None)
+    return env
+
+
+def time_import(module: str) -> float:
+    """Wall seconds to import `module` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-c", TIMER, module],
+        cwd=BASE_DIR, env=_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def top_packages(module: str, limit: int = 10) -> list:
+    """Cumulative import time per top-level package, from `-X importtime`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, env=_env(), capture_output=True, text=True,
+    )
+    totals = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        name = parts[2].rstrip()
+        if name.startswith(" ") and not name.startswith("  "):  # depth 1 only
+            try:
+                totals[name.strip().split(".")[0]] += int(parts[1])
+            except ValueError:
+                continue
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return [{"package": name, "ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the server and its routers")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh-interpreter runs per module")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages to list per module (0 = skip)")
+    parser.add_argument("--output", help="Write the JSON results here")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        try:
+            runs = [time_import(module) for _ in range(args.repeat)]
+        except RuntimeError as exc:
+            print(f"❌ {module}: {exc}")
+            results[module] = {"error": str(exc)}
+            continue
+        results[module] = {
+            "median_ms": round(statistics.median(runs) * 1000, 1),
+            "min_ms": round(min(runs) * 1000, 1),
+            "runs": args.repeat,
+        }
+        if args.top:
+            results[module]["top_packages"] = top_packages(module, args.top)
+        print(f"⏱️ {module:<28} {results[module]['median_ms']:>8.1f} ms")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Memory / recall benchmark for quantized vector storage. Builds a flat float32
+index as ground truth, then fp16 and sq8 indexes, and reports per mode:
+
+  • index_mb       serialized index size (what stays in RAM)
+  • recall@k       coarse search alone, and after exact re-ranking of
+                   RERANK_FACTOR × k candidates from the raw vectors
+  • p50/p95 ms     per-query latency, re-ranking included
+
+    python -m bench.quantization --vectors 50000 --dim 1536
+    python -m bench.quantization --index data/vector_db --output quant_results.json
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+sys.path.append(str(BASE_DIR))
+
+from bench.run_bench import percentile
+from core.quantization import RERANK_FACTOR, write_raw_vectors, open_raw_vectors, rerank, faiss_qtype
+from core.segments import live_segments
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Unit vectors around random topic centroids, roughly how text embeddings cluster."""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def load_index_vectors(index_dir: str) -> np.ndarray:
+    """Exact vectors of every live segment of a store (raw side file for quantized segments)."""
+    parts = []
+    for segment in live_segments(index_dir):
+        index = faiss.read_index(str(segment / "index.faiss"))
+        raw = open_raw_vectors(segment, index.ntotal, index.d) if isinstance(index, faiss.IndexScalarQuantizer) else None
+        parts.append(np.asarray(raw) if raw is not None else index.reconstruct_n(0, index.ntotal))
+    return np.concatenate(parts)
+
+
+def index_mb(index) -> float:
+    return round(faiss.serialize_index(index).nbytes / 2**20, 2)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return round(hits / truth.size, 4)
+
+
+def bench_mode(mode: str, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, work: Path) -> dict:
+    dim = vectors.shape[1]
+    start = time.perf_counter()
+    if mode == "none":
+        index = faiss.IndexFlatL2(dim)
+    else:
+        index = faiss.IndexScalarQuantizer(dim, faiss_qtype(mode), faiss.METRIC_L2)
+        index.train(vectors)
+    index.add(vectors)
+    build_sec = time.perf_counter() - start
+
+    _, coarse = index.search(queries, k)
+    result = {"index_mb": index_mb(index), "build_sec": round(build_sec, 3), "recall_coarse": recall(coarse, truth)}
+
+    raw = None
+    if mode != "none":
+        write_raw_vectors(work, vectors)
+        raw = open_raw_vectors(work, *vectors.shape)
+
+    latencies, found = [], []
+    for q in queries:
+        t = time.perf_counter()
+        if raw is None:
+            _, ids = index.search(q[None, :], k)
+            ids = ids[0]
+        else:
+            _, cand = index.search(q[None, :], k * RERANK_FACTOR)
+            ids, _ = rerank(q, cand[0], raw, index.metric_type, k)
+        latencies.append(time.perf_counter() - t)
+        found.append(np.pad(ids, (0, k - len(ids)), constant_values=-1))
+
+    result.update({
+        "recall_reranked": recall(np.array(found), truth) if raw is not None else result["recall_coarse"],
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare flat float32, fp16 and sq8 vector storage")
+    parser.add_argument("--index", help="Use the vectors of an existing flat index dir instead of synthetic ones")
+    parser.add_argument("--vectors", type=int, default=20_000, help="Synthetic vector count")
+    parser.add_argument("--dim", type=int, default=1536, help="Synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4, help="Results per query (the chat retriever uses 4)")
+    parser.add_argument("--output", help="Write the JSON results here")
+    args = parser.parse_args()
+
+    vectors = load_index_vectors(args.index) if args.index else synthetic_vectors(args.vectors, args.dim)
+    rng = np.random.default_rng(1)
+    # Queries near stored vectors, like questions about indexed content
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + 0.3 * rng.standard_normal(
+        (args.queries, vectors.shape[1])).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    truth_index = faiss.IndexFlatL2(vectors.shape[1])
+    truth_index.add(vectors)
+    _, truth = truth_index.search(queries, args.k)
+
+    results = {"vectors": int(vectors.shape[0]), "dim": int(vectors.shape[1]), "k": args.k,
+               "rerank_factor": RERANK_FACTOR, "modes": {}}
+    with tempfile.TemporaryDirectory(prefix="quant_") as tmp:
+        for mode in ("none", "fp16", "sq8"):
+            results["modes"][mode] = bench_mode(mode, vectors, queries, truth, args.k, Path(tmp))
+            print(f"▶️ {mode:<5} {results['modes'][mode]}")
+
+    flat_mb = results["modes"]["none"]["index_mb"]
+    for mode, r in results["modes"].items():
+        r["memory_ratio"] = round(r["index_mb"] / flat_mb, 3) if flat_mb else 0.0
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
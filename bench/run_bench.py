@@ -0,0 +1,273 @@
+"""
+Offline benchmark suite. Starts the fake OpenAI server, points every client
+at it, and measures:
+
+  • ingest         chunks/sec through split → embed → FAISS write
+  • chat           p50/p95/p99 latency and QPS of RetrievalQA at a given concurrency
+  • summarize      wall time of summarize_text on a synthetic transcript
+  • transcription  audio-seconds per wall-second of transcribe_video on synthetic audio
+
+    python -m bench.run_bench --output bench_results.json
+    python -m bench.run_bench --only chat --chat-concurrency 8 --compare bench_results.json
+"""
+import argparse
+import concurrent.futures as cf
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+sys.path.append(str(BASE_DIR))
+
+from bench.fake_openai import FakeConfig, start_server, base_url
+
+VOCAB = (
+    "coffee flavor roast bean aroma acidity body chicory cinnamon brew grind water temperature "
+    "extraction espresso filter tasting note sweetness bitterness origin farm harvest process "
+    "washed natural honey milk texture crema balance finish cup ritual morning workshop lesson"
+).split()
+
+
+# ─── Helpers ─────────────────────────────────────────────────
+def synthetic_text(n_chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words, size = [], 0
+    while size < n_chars:
+        sentence = " ".join(rng.choice(VOCAB) for _ in range(rng.randint(6, 18))).capitalize() + "."
+        if rng.random() < 0.15:
+            sentence += "\n\n"
+        words.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(words)[:n_chars]
+
+
+def percentile(values, p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def latency_stats(latencies) -> dict:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _offline_embeddings(embeddings):
+    # Skip tiktoken pre-tokenization: it downloads its encoding on first use
+    embeddings.check_embedding_ctx_length = False
+    return embeddings
+
+
+# ─── Benchmarks ──────────────────────────────────────────────
+def bench_ingest(args, work: Path) -> dict:
+    from langchain.schema import Document
+    from core.document_vectorizer import DocumentProcessor
+
+    processor = DocumentProcessor()
+    _offline_embeddings(processor.embeddings)
+    docs = [
+        Document(page_content=synthetic_text(args.ingest_chars // args.ingest_docs, seed=i),
+                 metadata={"source": f"doc{i}.txt", "file_type": "txt"})
+        for i in range(args.ingest_docs)
+    ]
+
+    start = time.perf_counter()
+    chunks = processor.process_documents(docs, 1000, 200)
+    split_sec = time.perf_counter() - start
+    processor.create_vector_store(chunks, "txt", str(work / "vector_db"), batch_size=args.batch_size)
+    total_sec = time.perf_counter() - start
+
+    return {
+        "docs": len(docs),
+        "chars": sum(len(d.page_content) for d in docs),
+        "chunks": len(chunks),
+        "split_sec": round(split_sec, 3),
+        "total_sec": round(total_sec, 3),
+        "chunks_per_sec": round(len(chunks) / total_sec, 2) if total_sec else 0.0,
+    }
+
+
+def bench_chat(args, work: Path) -> dict:
+    from core.chat import get_embeddings, get_llm, load_vector_store, build_qa_chain
+    from core.segments import has_index
+
+    if not has_index(work / "vector_db"):
+        bench_ingest(args, work)
+    db = load_vector_store(work / "vector_db", _offline_embeddings(get_embeddings()))
+    qa = build_qa_chain(db, get_llm())
+    # Unique questions so the LangChain LLM cache never short-circuits a call
+    questions = [f"What does the lesson say about {random.Random(i).choice(VOCAB)} #{i}?"
+                 for i in range(args.chat_requests)]
+
+    def ask(q):
+        t = time.perf_counter()
+        qa.invoke({"query": q})
+        return time.perf_counter() - t
+
+    start = time.perf_counter()
+    with cf.ThreadPoolExecutor(max_workers=args.chat_concurrency) as ex:
+        latencies = list(ex.map(ask, questions))
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": args.chat_concurrency,
+        **latency_stats(latencies),
+        "qps": round(len(questions) / wall, 2) if wall else 0.0,
+    }
+
+
+def bench_summarize(args, work: Path) -> dict:
+    from core.summarizer import summarize_text, MAX_CHARS
+
+    text = synthetic_text(args.summary_chars, seed=42)
+    start = time.perf_counter()
+    summarize_text(text)
+    wall = time.perf_counter() - start
+    return {
+        "chars": len(text),
+        "map_calls": -(-len(text) // MAX_CHARS),
+        "wall_sec": round(wall, 3),
+    }
+
+
+def bench_transcription(args, work: Path) -> dict:
+    if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+        return {"skipped": "ffmpeg/ffprobe not found"}
+    from core.video2text import transcribe_video
+
+    audio = work / "synthetic.wav"
+    subprocess.check_call([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={args.audio_sec}",
+        "-ar", "16000", "-ac", "1", str(audio),
+    ])
+    start = time.perf_counter()
+    text, segments = transcribe_video(str(audio), chunk_sec=args.chunk_sec)
+    wall = time.perf_counter() - start
+    return {
+        "audio_sec": args.audio_sec,
+        "chunk_sec": args.chunk_sec,
+        "segments": len(segments),
+        "wall_sec": round(wall, 3),
+        "audio_sec_per_sec": round(args.audio_sec / wall, 2) if wall else 0.0,
+    }
+
+
+BENCHES = {
+    "ingest": bench_ingest,
+    "chat": bench_chat,
+    "summarize": bench_summarize,
+    "transcription": bench_transcription,
+}
+
+
+# ─── Reporting ───────────────────────────────────────────────
+def _flatten(d: dict, prefix: str = "") -> dict:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+def compare(current: dict, baseline: dict) -> None:
+    cur, base = _flatten(current["results"]), _flatten(baseline["results"])
+    print(f"\n{'metric':<40}{'baseline':>12}{'current':>12}{'Δ%':>9}")
+    for key in sorted(cur.keys() & base.keys()):
+        b, c = base[key], cur[key]
+        delta = f"{(c - b) / b * 100:+.1f}" if b else "n/a"
+        print(f"{key:<40}{b:>12}{c:>12}{delta:>9}")
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a local fake OpenAI server")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHES), help="Run only these benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake API base latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Fake API latency jitter (±)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of fake API calls answered with 429")
+    parser.add_argument("--ingest-docs", type=int, default=20)
+    parser.add_argument("--ingest-chars", type=int, default=500_000, help="Total characters across ingest docs")
+    parser.add_argument("--batch-size", type=int, default=16, help="Embedding batch size")
+    parser.add_argument("--chat-requests", type=int, default=50)
+    parser.add_argument("--chat-concurrency", type=int, default=4)
+    parser.add_argument("--summary-chars", type=int, default=120_000)
+    parser.add_argument("--audio-sec", type=int, default=1800, help="Synthetic audio length")
+    parser.add_argument("--chunk-sec", type=int, default=600, help="Transcription chunk length")
+    args = parser.parse_args()
+
+    config = FakeConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_429=args.rate_429)
+    server = start_server(config)
+    os.environ.update({
+        "OPENAI_API_KEY": "sk-fake-bench",
+        "OPENAI_BASE_URL": base_url(server),
+        "OPENAI_API_BASE": base_url(server),
+    })
+
+    work = Path(tempfile.mkdtemp(prefix="bench_"))
+    output = Path(args.output).resolve()
+    baseline = Path(args.compare).resolve() if args.compare else None
+    os.chdir(work)  # keeps .langchain.db and other cwd-relative files out of the repo
+
+    # Isolate the artifact cache so earlier runs can't turn a benchmark into a cache hit
+    import core.artifacts as artifacts
+    artifacts._store = artifacts.ArtifactStore(work / "artifacts")
+
+    results = {}
+    try:
+        for name in args.only or list(BENCHES):
+            print(f"▶️ {name}...")
+            results[name] = BENCHES[name](args, work)
+            print(f"   {results[name]}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "config": {k: v for k, v in vars(args).items() if k not in {"output", "compare"}},
+        "fake_api_requests": dict(config.counts),
+        "results": results,
+    }
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"✅ Results written to {output}")
+
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Text splitter throughput benchmark. Splits a synthetic corpus (100 MB by
+default, as 1 MB documents) with OffsetTextSplitter and, when LangChain is
+installed, with RecursiveCharacterTextSplitter for comparison:
+
+  • mb_per_sec     corpus megabytes split per wall-second
+  • chunks         chunk count and mean chunk length
+  • max_len        longest chunk (must stay <= chunk_size)
+
+    python -m bench.splitter
+    python -m bench.splitter --mb 20 --chunk-size 500 --chunk-overlap 100 --output splitter_results.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+sys.path.append(str(BASE_DIR))
+
+from bench.run_bench import synthetic_text
+from core.text_splitter import OffsetTextSplitter
+
+
+def run(name: str, split, docs, total_mb: float) -> dict:
+    start = time.perf_counter()
+    lengths = [len(chunk) for doc in docs for chunk in split(doc)]
+    elapsed = time.perf_counter() - start
+    result = {
+        "sec": round(elapsed, 3),
+        "mb_per_sec": round(total_mb / elapsed, 2) if elapsed else 0.0,
+        "chunks": len(lengths),
+        "mean_len": round(sum(lengths) / len(lengths), 1) if lengths else 0.0,
+        "max_len": max(lengths, default=0),
+    }
+    print(f"▶️ {name:<10} {result}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare text splitter throughput on a synthetic corpus")
+    parser.add_argument("--mb", type=int, default=100, help="Corpus size in MB")
+    parser.add_argument("--doc-mb", type=float, default=1.0, help="Size of each document in MB")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--output", help="Write the JSON results here")
+    args = parser.parse_args()
+
+    doc_chars = int(args.doc_mb * 1_000_000)
+    n_docs = max(1, int(args.mb / args.doc_mb))
+    print(f"📚 Generating {n_docs} × {args.doc_mb} MB documents...")
+    # A handful of distinct documents repeated: generation would otherwise dominate the run
+    distinct = [synthetic_text(doc_chars, seed=i) for i in range(min(n_docs, 8))]
+    docs = [distinct[i % len(distinct)] for i in range(n_docs)]
+    total_mb = sum(len(d) for d in docs) / 1_000_000
+
+    results = {"corpus_mb": round(total_mb, 1), "chunk_size": args.chunk_size,
+               "chunk_overlap": args.chunk_overlap, "splitters": {}}
+    offset = OffsetTextSplitter(args.chunk_size, args.chunk_overlap)
+    results["splitters"]["offset"] = run("offset", offset.split_text, docs, total_mb)
+
+    try:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    except ImportError:
+        print("ℹ️ LangChain not installed: skipping the RecursiveCharacterTextSplitter baseline")
+    else:
+        recursive = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+        results["splitters"]["langchain"] = run("langchain", recursive.split_text, docs, total_mb)
+        base = results["splitters"]["langchain"]["sec"]
+        results["speedup"] = round(base / results["splitters"]["offset"]["sec"], 2) if base else 0.0
+        print(f"⚡ Speed-up: {results['speedup']}×")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"📄 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Quality-versus-calls comparison of the two summary modes. For every
+transcript and every --max-calls budget, reports:
+
+  • map_calls       LLM calls in the map phase (full: one per 12k-char chunk)
+  • prompt_chars    transcript characters sent to the map phase
+  • kept            passages kept by the clustered selection
+  • coverage        mean cosine similarity of every passage to its closest kept
+                    passage (1.0 = nothing unrepresented)
+  • similarity      with --summarize: cosine similarity between the embedded
+                    clustered summary and the full-mode summary
+
+Without --live, a local fake OpenAI server answers every call: call counts,
+characters and timings are real, but fake embeddings are random, so coverage
+and similarity only mean something with --live (real API, costs money) or
+EMBEDDING_BACKEND=local.
+
+    python -m bench.summary_selection --chars 400000 --max-calls 2 4 6 8
+    python -m bench.summary_selection --transcript data/transcript.ndjson --live --summarize
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+sys.path.append(str(BASE_DIR))
+
+from bench.fake_openai import FakeConfig, start_server, base_url
+from bench.run_bench import synthetic_text, _offline_embeddings
+
+
+def load_text(path: str) -> str:
+    from core.transcript_store import read_transcript
+
+    if Path(path).suffix in (".json", ".ndjson"):
+        return read_transcript(path)["text"]
+    return Path(path).read_text(encoding="utf-8")
+
+
+def cosine(a, b) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    return float(a @ b / max(np.linalg.norm(a) * np.linalg.norm(b), 1e-12))
+
+
+def compare_transcript(name: str, text: str, args) -> dict:
+    from core.embeddings import create_embeddings
+    from core.extractive import coverage, pack_passages, select_passages
+    from core.summarizer import MAX_CHARS, SUMMARY_PER_CLUSTER, _chunk_text, _embed_passages, summarize_text
+
+    embeddings = create_embeddings() if args.live else _offline_embeddings(create_embeddings())
+    start = time.perf_counter()
+    passages = _embed_passages(text, embeddings)
+    embed_sec = time.perf_counter() - start
+    texts, vectors = [p for p, _ in passages], [v for _, v in passages]
+
+    full_chunks = _chunk_text(text)
+    result = {
+        "transcript": name,
+        "chars": len(text),
+        "passages": len(passages),
+        "embed_sec": round(embed_sec, 3),
+        "full": {"map_calls": len(full_chunks), "prompt_chars": sum(map(len, full_chunks))},
+        "clustered": [],
+    }
+
+    full_summary = None
+    if args.summarize:
+        start = time.perf_counter()
+        full_summary = summarize_text(text, mode="full")
+        result["full"]["wall_sec"] = round(time.perf_counter() - start, 3)
+
+    for max_calls in args.max_calls:
+        start = time.perf_counter()
+        selected = select_passages(texts, vectors, MAX_CHARS, max_calls, SUMMARY_PER_CLUSTER)
+        inputs = pack_passages(texts, selected, MAX_CHARS)
+        row = {
+            "max_calls": max_calls,
+            "map_calls": len(inputs),
+            "prompt_chars": sum(map(len, inputs)),
+            "kept": len(selected),
+            "coverage": round(coverage(vectors, selected), 4),
+            "select_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        if args.summarize:
+            start = time.perf_counter()
+            summary = summarize_text(text, mode="clustered", passages=passages, max_calls=max_calls)
+            row["wall_sec"] = round(time.perf_counter() - start, 3)
+            a, b = embeddings.embed_documents([json.dumps(full_summary, ensure_ascii=False),
+                                               json.dumps(summary, ensure_ascii=False)])
+            row["similarity"] = round(cosine(a, b), 4)
+        result["clustered"].append(row)
+    return result
+
+
+def print_table(results) -> None:
+    print(f"\n{'transcript':<28}{'mode':<16}{'map calls':>10}{'chars sent':>12}{'coverage':>10}{'similarity':>12}")
+    for r in results:
+        print(f"{r['transcript'][:27]:<28}{'full':<16}{r['full']['map_calls']:>10}{r['full']['prompt_chars']:>12}"
+              f"{1.0:>10}{'—':>12}")
+        for row in r["clustered"]:
+            print(f"{'':<28}{'clustered/' + str(row['max_calls']):<16}{row['map_calls']:>10}{row['prompt_chars']:>12}"
+                  f"{row['coverage']:>10}{row.get('similarity', '—'):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and clustered summarization: LLM calls vs. coverage")
+    parser.add_argument("--transcript", nargs="+", help="Transcripts (.ndjson / .json / .txt); default: a synthetic one")
+    parser.add_argument("--chars", type=int, default=400_000, help="Length of the synthetic transcript")
+    parser.add_argument("--max-calls", type=int, nargs="+", default=[2, 4, 6, 8], help="Map-call budgets to compare")
+    parser.add_argument("--summarize", action="store_true", help="Also run both summaries and compare them")
+    parser.add_argument("--live", action="store_true", help="Use the real OpenAI API instead of the fake server")
+    parser.add_argument("--output", help="Write the JSON results here")
+    args = parser.parse_args()
+
+    server = None
+    if not args.live:
+        server = start_server(FakeConfig(latency_ms=5.0, jitter_ms=1.0))
+        os.environ.update({
+            "OPENAI_API_KEY": "sk-fake-bench",
+            "OPENAI_BASE_URL": base_url(server),
+            "OPENAI_API_BASE": base_url(server),
+        })
+
+    work = Path(tempfile.mkdtemp(prefix="bench_summary_"))
+    output = Path(args.output).resolve() if args.output else None
+    transcripts = [(Path(p).name, load_text(p)) for p in args.transcript or []]
+    os.chdir(work)
+
+    # Isolate the artifact cache so every run embeds and summarizes from scratch
+    import core.artifacts as artifacts
+    artifacts._store = artifacts.ArtifactStore(work / "artifacts")
+
+    try:
+        if not transcripts:
+            transcripts = [("synthetic", synthetic_text(args.chars, seed=7))]
+        results = [compare_transcript(name, text, args) for name, text in transcripts]
+    finally:
+        if server:
+            server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+
+    print_table(results)
+    if output:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
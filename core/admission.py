@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from core.metrics import record_stage, ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_WAIT
+from core.openai_clients import INTERACTIVE, BATCH
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+# Per group: (priority, concurrent requests, queued requests, max queue wait in seconds).
+# Override with ADMISSION_<GROUP>_CONCURRENCY / _QUEUE / _WAIT_SEC, e.g. ADMISSION_CHAT_CONCURRENCY=64.
+DEFAULT_GROUPS = {
+    "chat": (INTERACTIVE, 32, 64, 10.0),
+    "transcribe": (BATCH, 2, 4, 30.0),
+    "vectorize": (BATCH, 2, 4, 30.0),
+    "summarize": (BATCH, 2, 4, 30.0),
+    "pipeline": (BATCH, 2, 4, 30.0),
+}
+# Batch requests admitted at once across all batch groups
+ADMISSION_BATCH_MAX_ACTIVE = int(os.getenv("ADMISSION_BATCH_MAX_ACTIVE", "4"))
+MAX_RETRY_AFTER_SEC = 300
+
+
+class AdmissionRejected(Exception):
+    """A request was shed: `status` is 429 (queue full) or 503 (waited too long), `retry_after` in seconds."""
+
+    def __init__(self, group: str, status: int, retry_after: int, reason: str):
+        super().__init__(f"{group}: {reason}")
+        self.group = group
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionGroup:
+    def __init__(self, name: str, priority: str, concurrency: int, queue_depth: int, max_wait: float):
+        self.name = name
+        self.priority = priority
+        self.concurrency = max(1, concurrency)
+        self.queue_depth = max(0, queue_depth)
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        # Smoothed time a request holds its slot; drives the Retry-After estimate
+        self.service_sec = 1.0
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = (len(self.waiters) + 1) / self.concurrency
+        return int(min(MAX_RETRY_AFTER_SEC, max(1, math.ceil(backlog * self.service_sec))))
+
+
+class AdmissionController:
+    """
+    Bounded concurrency plus a bounded FIFO queue per route group, with two
+    priority classes sharing the process.
+
+    A request runs once its group has a free slot; otherwise it waits in the
+    group's queue for up to `max_wait`. A full queue is rejected at once with
+    429, a request that waited too long with 503, both with a Retry-After
+    derived from the group's backlog and typical service time. Batch groups
+    also share ADMISSION_BATCH_MAX_ACTIVE slots and never jump ahead of
+    queued interactive requests: under load, ingest waits (then sheds)
+    before chat does.
+
+    Lives on the event loop: acquire/release are only called from it, so no
+    locking is needed.
+    """
+
+    def __init__(self, groups: Dict[str, Tuple[str, int, int, float]] = None,
+                 batch_max_active: int = ADMISSION_BATCH_MAX_ACTIVE):
+        self.groups: Dict[str, AdmissionGroup] = {}
+        for name, (priority, concurrency, queue_depth, max_wait) in (groups or DEFAULT_GROUPS).items():
+            env = f"ADMISSION_{name.upper()}"
+            self.groups[name] = AdmissionGroup(
+                name, priority,
+                int(os.getenv(f"{env}_CONCURRENCY", concurrency)),
+                int(os.getenv(f"{env}_QUEUE", queue_depth)),
+                float(os.getenv(f"{env}_WAIT_SEC", max_wait)),
+            )
+        self.batch_max_active = max(1, batch_max_active)
+        self._batch_active = 0
+
+    def _interactive_waiting(self) -> bool:
+        return any(g.waiters for g in self.groups.values() if g.priority == INTERACTIVE)
+
+    def _can_admit(self, group: AdmissionGroup) -> bool:
+        if group.active >= group.concurrency:
+            return False
+        if group.priority == BATCH:
+            return self._batch_active < self.batch_max_active and not self._interactive_waiting()
+        return True
+
+    def _admit(self, group: AdmissionGroup) -> None:
+        group.active += 1
+        if group.priority == BATCH:
+            self._batch_active += 1
+        ADMISSION_ACTIVE.set(group.active, group=group.name)
+
+    def _wake(self) -> None:
+        """Hand freed slots to queued requests, interactive groups first, FIFO within a group."""
+        for group in sorted(self.groups.values(), key=lambda g: g.priority != INTERACTIVE):
+            while group.waiters and self._can_admit(group):
+                waiter = group.waiters.popleft()
+                if not waiter.done():
+                    self._admit(group)
+                    waiter.set_result(None)
+            ADMISSION_QUEUED.set(len(group.waiters), group=group.name)
+
+    def shed(self, name: str, status: int, reason: str) -> AdmissionRejected:
+        """Count a rejection of group `name` and build the exception to raise for it."""
+        group = self.groups[name]
+        ADMISSION_REJECTED.inc(group=group.name, reason=reason)
+        log.warning(f"🚦 Shed {group.name} request ({reason}): {group.active} active, {len(group.waiters)} queued")
+        return AdmissionRejected(group.name, status, group.retry_after(), reason)
+
+    async def acquire(self, name: str) -> float:
+        """Wait for a slot in group `name` and return the seconds queued; raises AdmissionRejected when shed."""
+        group = self.groups[name]
+        if not group.waiters and self._can_admit(group):
+            self._admit(group)
+            ADMISSION_WAIT.observe(0.0, group=name, priority=group.priority)
+            return 0.0
+        if len(group.waiters) >= group.queue_depth:
+            raise self.shed(name, 429, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        group.waiters.append(waiter)
+        ADMISSION_QUEUED.set(len(group.waiters), group=name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), group.max_wait)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                group.waiters.remove(waiter)
+                waiter.cancel()
+                self._wake()
+                raise self.shed(name, 503, "queue_timeout")
+        except asyncio.CancelledError:
+            # Client went away: give back a slot granted in the meantime, or leave the queue
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            else:
+                if waiter in group.waiters:
+                    group.waiters.remove(waiter)
+                waiter.cancel()
+                self._wake()
+            raise
+        finally:
+            ADMISSION_QUEUED.set(len(group.waiters), group=name)
+
+        waited = time.perf_counter() - start
+        ADMISSION_WAIT.observe(waited, group=name, priority=group.priority)
+        record_stage(f"admission_wait.{name}", waited)
+        return waited
+
+    def release(self, name: str, held_sec: Optional[float] = None) -> None:
+        group = self.groups[name]
+        group.active -= 1
+        if group.priority == BATCH:
+            self._batch_active -= 1
+        if held_sec is not None:
+            group.service_sec = 0.8 * group.service_sec + 0.2 * held_sec
+        ADMISSION_ACTIVE.set(group.active, group=name)
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            name: {"priority": g.priority, "active": g.active, "queued": len(g.waiters),
+                   "concurrency": g.concurrency, "queue_depth": g.queue_depth}
+            for name, g in self.groups.items()
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Process-wide controller (the event loop is the only caller, so no lock)."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
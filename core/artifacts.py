@@ -0,0 +1,215 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional
+
+from core.metrics import record_cache
+
+log = logging.getLogger(__name__)
+
+# ─── Paths / Config ──────────────────────────────────────────
+BASE_DIR = Path(__file__).parent.parent.resolve()
+ARTIFACTS_DIR = BASE_DIR / "data" / "artifacts"
+ARTIFACTS_MAX_BYTES = int(os.getenv("ARTIFACTS_MAX_BYTES", str(5 * 1024 * 1024 * 1024)))  # 5 GiB
+# GC triggered by a write evicts down to this share of the budget, so it runs once per ~10% of growth
+ARTIFACTS_GC_TARGET = 0.9
+# Artifacts written or read this recently are never evicted (covers put_file → job submit)
+ARTIFACTS_GC_GRACE_SEC = float(os.getenv("ARTIFACTS_GC_GRACE_SEC", "600"))
+
+# Callables returning paths that must survive GC (e.g. inputs of unfinished jobs)
+_GC_GUARDS: List[Callable[[], Iterable[str]]] = []
+
+
+def register_gc_guard(guard: Callable[[], Iterable[str]]) -> None:
+    _GC_GUARDS.append(guard)
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sha256_file(path: str, block: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifact_key(input_hash: str, **params: Any) -> str:
+    """Key an artifact by its input content and every parameter that affects the output."""
+    blob = json.dumps({"input": input_hash, **params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for pipeline outputs.
+
+    Artifacts live at `<root>/<kind>/<key[:2]>/<key><suffix>`. Reads bump the
+    file mtime so garbage collection can evict least-recently-used entries
+    once the store grows past `max_bytes`. The store's size is scanned once
+    and then tracked per write, so a write only pays for GC when it actually
+    pushes the store over budget.
+    """
+
+    def __init__(self, root: Path = ARTIFACTS_DIR, max_bytes: int = ARTIFACTS_MAX_BYTES,
+                 grace_sec: float = ARTIFACTS_GC_GRACE_SEC):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.grace_sec = grace_sec
+        self.hits = 0
+        self.misses = 0
+        self._gc_lock = threading.Lock()
+        self._size_lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def path(self, kind: str, key: str, suffix: str = ".json") -> Path:
+        return self.root / kind / key[:2] / f"{key}{suffix}"
+
+    def _touch(self, path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _scan(self):
+        """(mtime, size, path) of every stored artifact."""
+        for p in self.root.rglob("*"):
+            if p.is_file() and not p.name.startswith(".tmp_"):
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                yield st.st_mtime, st.st_size, p
+
+    def _grew(self, delta: int) -> None:
+        """Account for a write of `delta` bytes and collect garbage if that went over budget."""
+        with self._size_lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += delta
+            over = self._size > self.max_bytes
+        if over:
+            self.gc(int(self.max_bytes * ARTIFACTS_GC_TARGET))
+
+    def _record(self, kind: str, hit: bool) -> None:
+        record_cache(f"artifact.{kind}", hit)
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    # ─── JSON artifacts ─────────────────────────────────────
+    def get_json(self, kind: str, key: str) -> Optional[Any]:
+        path = self.path(kind, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._record(kind, False)
+            return None
+        self._touch(path)
+        self._record(kind, True)
+        return value
+
+    def put_json(self, kind: str, key: str, value: Any) -> Path:
+        path = self.path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+                written = f.tell()
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self._grew(written - replaced)
+        return path
+
+    def memoize(self, kind: str, key: str, fn: Callable[[], Any]) -> Any:
+        """Return the cached artifact for `key`, computing and storing it on a miss."""
+        value = self.get_json(kind, key)
+        if value is None:
+            value = fn()
+            self.put_json(kind, key, value)
+        return value
+
+    # ─── File artifacts ─────────────────────────────────────
+    def get_file(self, kind: str, key: str, suffix: str = "") -> Optional[Path]:
+        path = self.path(kind, key, suffix)
+        if not path.exists():
+            self._record(kind, False)
+            return None
+        self._touch(path)
+        self._record(kind, True)
+        return path
+
+    def put_file(self, kind: str, key: str, src: Path, suffix: str = "") -> Path:
+        """Move `src` into the store (same content already stored → `src` is dropped)."""
+        path = self.path(kind, key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            Path(src).unlink(missing_ok=True)
+            self._touch(path)
+        else:
+            shutil.move(str(src), path)
+            self._grew(path.stat().st_size)
+        return path
+
+    # ─── Garbage collection ─────────────────────────────────
+    def gc(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Evict least-recently-used artifacts until the store fits in `max_bytes`.
+        Artifacts used within `grace_sec` or named by a GC guard are kept.
+        Returns bytes freed.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        with self._gc_lock:
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            if total > budget:
+                protected = {os.path.abspath(p) for guard in _GC_GUARDS for p in guard()}
+                cutoff = time.time() - self.grace_sec
+                for mtime, size, p in entries:
+                    if total - freed <= budget or mtime > cutoff:
+                        break
+                    if os.path.abspath(p) in protected:
+                        continue
+                    p.unlink(missing_ok=True)
+                    freed += size
+                log.info("🧹 Artifact GC freed %.1f MiB", freed / (1024 * 1024))
+            with self._size_lock:
+                self._size = total - freed
+            return freed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
@@ -2,11 +2,18 @@ import os
 import logging
 import argparse
 import time
+import operator
+import contextvars
+import concurrent.futures as cf
+import numpy as np
 from dotenv import load_dotenv
+import faiss
 from langchain_community.vectorstores.faiss import FAISS
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_core.vectorstores import VectorStore
+from langchain_openai import ChatOpenAI
 from langchain.chains import RetrievalQA
 from langchain.globals import set_llm_cache
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain_community.cache import SQLiteCache
 
 import sys
@@ -24,39 +31,232 @@ load_dotenv()
 BASE_DIR = Path(__file__).parent.parent.resolve()
 VECTOR_DB_PATH = BASE_DIR / "data" / "vector_db"
 
-def load_qa_system(vector_store_path, openai_api_key=None, model_name="gpt-3.5-turbo"):
-    if openai_api_key is None:
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            raise ValueError("OpenAI API key is required")
+sys.path.append(str(BASE_DIR))
+from core.vector_collections import collection_path, DEFAULT_COLLECTION
+from core.metrics import timed, record_stage, LLM_TOKENS
+from core.embeddings import BACKENDS, EMBEDDING_BACKEND, create_embeddings, check_index_embedding
+from core.quantization import RERANK_FACTOR, is_quantized, open_raw_vectors, rerank
+from core.segments import live_segments
+from core.metadata_index import MetadataBitmapIndex
+from core.openai_clients import get_http_client, acquire, estimate_tokens, INTERACTIVE
 
-    # Initialize OpenAI embedding model
-    log.info("Initializing OpenAI embedding model...")
-    embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
+# Segments searched in parallel once a store has more than this many
+SEGMENT_SEARCH_THREADS = int(os.getenv("SEGMENT_SEARCH_THREADS", "4"))
+_segment_pool = cf.ThreadPoolExecutor(max_workers=SEGMENT_SEARCH_THREADS, thread_name_prefix="segment-search")
 
-    # Load FAISS vector store
+class InstrumentedFAISS(FAISS):
+    """
+    FAISS store that reports query-embedding and index-search time separately.
+
+    For a scalar-quantized index with its raw vectors mapped in, the coarse
+    search fetches RERANK_FACTOR × k candidates, which are re-ranked exactly.
+    Filters on fields of its metadata index are applied inside the FAISS
+    search through an ID bitmap; other filters fall back to LangChain's
+    over-fetch-and-discard.
+    """
+
+    raw_vectors = None
+    metadata_index = None
+
+    def _embed_query(self, text):
+        with timed("embed_query"):
+            return super()._embed_query(text)
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        with timed("faiss_search"):
+            if filter is not None and self.metadata_index is not None and self.metadata_index.covers(filter):
+                return self._search_selected(embedding, k, filter, kwargs.get("score_threshold"))
+            if self.raw_vectors is None:
+                return super().similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k, **kwargs)
+            return self._search_reranked(embedding, k, filter, fetch_k, kwargs.get("score_threshold"))
+
+    def _query_vector(self, embedding):
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        return vector
+
+    def _search_selected(self, embedding, k, filter, score_threshold=None):
+        bitmap, n_matching = self.metadata_index.select(filter)
+        if n_matching == 0:
+            return []
+        vector = self._query_vector(embedding)
+        # IDSelectorBitmap takes the bitmap length in bytes, not the number of ids
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)))
+        n_candidates = min(k * (RERANK_FACTOR if self.raw_vectors is not None else 1), n_matching)
+        scores, ids = self.index.search(vector, n_candidates, params=params)
+        if self.raw_vectors is not None:
+            ids, scores = rerank(vector[0], ids[0], self.raw_vectors, self.index.metric_type, k)
+            return self._to_docs(ids, scores, k, score_threshold=score_threshold)
+        return self._to_docs(ids[0], scores[0], k, score_threshold=score_threshold)
+
+    def _search_reranked(self, embedding, k, filter, fetch_k, score_threshold=None):
+        vector = self._query_vector(embedding)
+        n_candidates = min((fetch_k if filter is not None else k) * RERANK_FACTOR, self.index.ntotal)
+        _, coarse = self.index.search(vector, n_candidates)
+        ids, scores = rerank(vector[0], coarse[0], self.raw_vectors, self.index.metric_type, n_candidates)
+        matches = self._create_filter_func(filter) if filter is not None else None
+        return self._to_docs(ids, scores, k, matches, score_threshold)
+
+    def _to_docs(self, ids, scores, k, matches=None, score_threshold=None):
+        """(doc, score) pairs for ranked ids, best first, stopping at k or the score threshold."""
+        better = operator.ge if self.index.metric_type == faiss.METRIC_INNER_PRODUCT else operator.le
+        docs = []
+        for i, score in zip(ids, scores):
+            if i < 0:
+                break
+            if score_threshold is not None and not better(score, score_threshold):
+                break
+            doc = self.docstore.search(self.index_to_docstore_id[int(i)])
+            if matches is not None and not matches(doc.metadata):
+                continue
+            docs.append((doc, float(score)))
+            if len(docs) == k:
+                break
+        return docs
+
+class SegmentedFAISS(VectorStore):
+    """
+    Read-only view over the live segments of a store. The query is embedded
+    once, every segment is searched for its own top k and the results are
+    merged by score. Writes go through core.segments, never through here.
+    """
+
+    def __init__(self, segments, embeddings):
+        self.segments = segments
+        self._embeddings = embeddings
+
+    @property
+    def embeddings(self):
+        return self._embeddings
+
+    @property
+    def ntotal(self):
+        return sum(s.index.ntotal for s in self.segments)
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("Segments are immutable: ingest through DocumentProcessor.save_embeddings")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Build segmented stores with DocumentProcessor.save_embeddings")
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        def search(segment):
+            return segment.similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k, **kwargs)
+
+        if len(self.segments) <= 2:
+            per_segment = [search(s) for s in self.segments]
+        else:
+            # Copy the context per task so search time still lands in the request's stage breakdown
+            futures = [_segment_pool.submit(contextvars.copy_context().run, search, s) for s in self.segments]
+            per_segment = [f.result() for f in futures]
+
+        higher_is_better = self.segments[0].index.metric_type == faiss.METRIC_INNER_PRODUCT
+        merged = [hit for hits in per_segment for hit in hits]
+        merged.sort(key=lambda hit: hit[1], reverse=higher_is_better)
+        return merged[:k]
+
+    def similarity_search_with_score(self, query, k=4, filter=None, fetch_k=20, **kwargs):
+        embedding = self.segments[0]._embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None, fetch_k=20, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter, fetch_k, **kwargs)]
+
+    def similarity_search(self, query, k=4, filter=None, fetch_k=20, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter, fetch_k, **kwargs)]
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records LLM call latency and token usage for the given caller."""
+
+    def __init__(self, caller):
+        self.caller = caller
+        self._starts = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            record_stage(f"llm.{self.caller}", time.perf_counter() - start)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        LLM_TOKENS.inc(usage.get("prompt_tokens", 0), caller=self.caller, type="prompt")
+        LLM_TOKENS.inc(usage.get("completion_tokens", 0), caller=self.caller, type="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+
+class GovernedChatOpenAI(ChatOpenAI):
+    """Chat model that takes an interactive slot from the shared OpenAI rate governor before each call."""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        acquire("chat", estimate_tokens(str(m.content) for m in messages) + (self.max_tokens or 0), INTERACTIVE)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+def _require_api_key(openai_api_key=None):
+    openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise ValueError("OpenAI API key is required")
+    return openai_api_key
+
+def get_embeddings(openai_api_key=None, backend=None, model=None):
+    log.info(f"Initializing {backend or EMBEDDING_BACKEND} embedding model...")
+    return create_embeddings(backend, model, openai_api_key)
+
+def load_segment(segment_path, embeddings):
+    db = InstrumentedFAISS.load_local(str(segment_path), embeddings, allow_dangerous_deserialization=True)
+    if is_quantized(db.index):
+        db.raw_vectors = open_raw_vectors(segment_path, db.index.ntotal, db.index.d)
+    db.metadata_index = MetadataBitmapIndex.build(
+        (db.docstore.search(db.index_to_docstore_id[i]).metadata for i in range(db.index.ntotal)), db.index.ntotal)
+    return db
+
+def load_vector_store(vector_store_path, embeddings):
     log.info(f"Loading vector store from {vector_store_path}...")
-    db = FAISS.load_local(vector_store_path, embeddings, allow_dangerous_deserialization=True)
+    segments = live_segments(vector_store_path)
+    if not segments:
+        raise FileNotFoundError(f"No vector store at {vector_store_path}")
+    check_index_embedding(vector_store_path, embeddings)
+    return SegmentedFAISS([load_segment(path, embeddings) for path in segments], embeddings)
 
+def get_llm(openai_api_key=None, model_name="gpt-3.5-turbo"):
     set_llm_cache(SQLiteCache(database_path=".langchain.db"))
 
-    # Initialize OpenAI LLM
     log.info(f"Initializing OpenAI Chat Model: {model_name}...")
-    llm = ChatOpenAI(
-        openai_api_key=openai_api_key,
+    return GovernedChatOpenAI(
+        openai_api_key=_require_api_key(openai_api_key),
+        http_client=get_http_client(),
         model_name=model_name,
         temperature=0.2,
-        max_tokens=512
+        max_tokens=512,
+        callbacks=[LLMMetricsCallback("chat")]
     )
 
-    # Create QA chain
-    log.info("Creating QA chain...")
-    qa = RetrievalQA.from_chain_type(
+def build_qa_chain(db, llm, k=4):
+    """Cheap to build per request: the heavy parts (store, LLM client) are passed in."""
+    return RetrievalQA.from_chain_type(
         llm=llm,
-        retriever=db.as_retriever(search_kwargs={"k": 4})
+        retriever=db.as_retriever(search_kwargs={"k": k})
     )
 
-    return qa
+def load_qa_system(vector_store_path, openai_api_key=None, model_name="gpt-3.5-turbo",
+                   embedding_backend=None, embedding_model=None):
+    openai_api_key = _require_api_key(openai_api_key)
+
+    # Initialize the embedding model the index was built with
+    embeddings = get_embeddings(openai_api_key, embedding_backend, embedding_model)
+
+    # Load FAISS vector store
+    db = load_vector_store(vector_store_path, embeddings)
+
+    # Initialize OpenAI LLM
+    llm = get_llm(openai_api_key, model_name)
+
+    # Create QA chain
+    log.info("Creating QA chain...")
+    return build_qa_chain(db, llm)
 
 def interactive_qa(qa_chain):
     log.info("Starting interactive QA session. Type 'exit' to quit.\n")
@@ -80,7 +280,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Query a vectorized document using OpenAI")
     parser.add_argument("--openai-api-key", help="OpenAI API key")
     parser.add_argument("--model", default="gpt-3.5-turbo", help="OpenAI model to use (e.g., gpt-4)")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION, help="Named collection to query (e.g., a course id)")
+    parser.add_argument("--embedding-backend", choices=BACKENDS, default=EMBEDDING_BACKEND, help="Embedding backend the index was built with")
+    parser.add_argument("--embedding-model", help="Embedding model (default: EMBEDDING_MODEL)")
     args = parser.parse_args()
 
-    qa_chain = load_qa_system(VECTOR_DB_PATH, args.openai_api_key, args.model)
+    qa_chain = load_qa_system(collection_path(args.collection), args.openai_api_key, args.model,
+                              args.embedding_backend, args.embedding_model)
     interactive_qa(qa_chain)
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.metrics import CHUNKS_DEDUPED
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+CHUNK_DEDUP = os.getenv("CHUNK_DEDUP", "1").lower() not in {"0", "false", "no"}
+SIMHASH_MAX_DISTANCE = int(os.getenv("SIMHASH_MAX_DISTANCE", "3"))   # differing bits out of 64
+SHINGLE_WORDS = 3
+MIN_NEAR_DUP_WORDS = 12        # SimHash is noisy on very short chunks: exact matching only below this
+SOURCE_KEYS = ("source", "title", "doc_type", "page", "start", "end")
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(words: List[str]) -> int:
+    """64-bit SimHash over word shingles: near-identical texts differ in only a few bits."""
+    shingles = [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))]
+    # Majority vote per bit position; counting '1's column-wise keeps the loop in C
+    rows = [format(_hash64(s), "064b") for s in shingles]
+    half = len(rows) / 2
+    return int("".join("1" if column.count("1") > half else "0" for column in zip(*rows)), 2)
+
+
+def _bands(fingerprint: int, n_bands: int):
+    # With at most n_bands - 1 differing bits, at least one band matches exactly (pigeonhole)
+    width = 64 // n_bands
+    mask = (1 << width) - 1
+    return [(b, fingerprint >> (b * width) & mask) for b in range(n_bands)]
+
+
+def _source_of(metadata: dict) -> Dict[str, Any]:
+    return {k: metadata[k] for k in SOURCE_KEYS if k in metadata}
+
+
+class ChunkDeduplicator:
+    """
+    Drop exact and near-duplicate chunks, keeping the first occurrence.
+
+    Exact duplicates are found by hashing whitespace/case-normalized text, near
+    duplicates by SimHash Hamming distance <= `max_distance`. The kept chunk
+    gets a `sources` list with every merged chunk's provenance and a
+    `duplicates` count, so one vector still points at all the places it came from.
+
+    The hash and band tables outlive a call to `dedup`: feed every batch of
+    one ingest through the same instance and a chunk repeated in a later batch
+    is still dropped. Only kept chunks' metadata is held, not their text.
+    Thread-safe, for ingests that dedup from several workers.
+    """
+
+    def __init__(self, max_distance: Optional[int] = None):
+        self.max_distance = SIMHASH_MAX_DISTANCE if max_distance is None else max_distance
+        self.n_bands = self.max_distance + 1
+        self._exact: Dict[str, dict] = {}                 # digest -> kept chunk's metadata
+        self._buckets = defaultdict(list)                  # (band, value) -> [(fingerprint, kept metadata)]
+        self._lock = threading.Lock()
+
+    def _match(self, words: List[str], digest: str) -> Tuple[Optional[dict], str, list]:
+        """(metadata of the chunk this one duplicates or None, "exact"/"near", band keys to file it under if kept)."""
+        original = self._exact.get(digest)
+        if original is not None:
+            return original, "exact", []
+        if len(words) < MIN_NEAR_DUP_WORDS:
+            return None, "", []
+        fingerprint = simhash(words)
+        bands = _bands(fingerprint, self.n_bands)
+        original = next((meta for key in bands for fp, meta in self._buckets[key]
+                         if bin(fp ^ fingerprint).count("1") <= self.max_distance), None)
+        return original, "near", [(key, fingerprint) for key in bands]
+
+    def dedup(self, documents: List[Any]) -> List[Any]:
+        kept: List[Any] = []
+        exact_dups = near_dups = 0
+
+        with self._lock:
+            for doc in documents:
+                words = _words(doc.page_content)
+                if not words:
+                    continue
+                digest = hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+                original, kind, bands = self._match(words, digest)
+
+                if original is None:
+                    self._exact[digest] = doc.metadata
+                    for key, fingerprint in bands:
+                        self._buckets[key].append((fingerprint, doc.metadata))
+                    kept.append(doc)
+                    continue
+
+                exact_dups += kind == "exact"
+                near_dups += kind == "near"
+                if "sources" not in original:
+                    original["sources"] = [_source_of(original)]
+                source = _source_of(doc.metadata)
+                if source not in original["sources"]:
+                    original["sources"].append(source)
+                original["duplicates"] = original.get("duplicates", 0) + 1
+
+        CHUNKS_DEDUPED.inc(exact_dups, kind="exact")
+        CHUNKS_DEDUPED.inc(near_dups, kind="near")
+        if exact_dups or near_dups:
+            log.info(f"🧬 Dedup: {len(documents)} → {len(kept)} chunks ({exact_dups} exact, {near_dups} near duplicates)")
+        return kept
+
+
+def dedup_documents(documents: List[Any], max_distance: Optional[int] = None) -> List[Any]:
+    """Dedup one self-contained list of chunks (see ChunkDeduplicator)."""
+    return ChunkDeduplicator(max_distance).dedup(documents)
@@ -1,11 +1,11 @@
 import os
 import json
-import time
 import logging
 import argparse
 from dotenv import load_dotenv
 from typing import List, Optional, Dict, Any, Tuple
 import mimetypes
+import importlib.util
 from pathlib import Path
 
 # Document loaders
@@ -14,11 +14,22 @@ from langchain_community.document_loaders import (
     TextLoader,
     UnstructuredPowerPointLoader
 )
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores.faiss import FAISS
-from langchain_openai import OpenAIEmbeddings
 from langchain.schema import Document
 
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.artifacts import get_artifact_store, artifact_key, sha256_text
+from core.metrics import timed, EMBED_BATCH_SIZE
+from core.vector_collections import collection_path, DEFAULT_COLLECTION
+from core.embeddings import BACKENDS, EMBEDDING_BACKEND, create_embeddings, embedding_info, shared_embeddings
+from core.dedup import CHUNK_DEDUP, ChunkDeduplicator
+from core.ocr import OCR_MIN_PAGE_CHARS, ocr_pdf_pages, ocr_images
+from core.streaming_loaders import STREAMED_FILE_TYPES, iter_document_batches
+from core.text_splitter import OffsetTextSplitter
+from core.quantization import QUANTIZATION_MODES, VECTOR_QUANTIZATION, validate_mode
+from core.segments import get_segment_writer
+from core.transcript_store import read_transcript
+
 # ─── Logging Setup ────────────────────────────────────────────────
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
 log = logging.getLogger()
@@ -30,16 +41,26 @@ load_dotenv()
 BASE_DIR = Path(__file__).parent.parent.resolve()
 DATA_DIR = BASE_DIR / "data"
 
+# Streamed spreadsheets / Word files are written to the index every this many chunks
+STREAM_FLUSH_CHUNKS = int(os.getenv("STREAM_FLUSH_CHUNKS", "2000"))
+
 class DocumentProcessor:
     """Class for loading and processing documents of various types"""
     
-    def __init__(self, openai_api_key: Optional[str] = None):
+    def __init__(self, openai_api_key: Optional[str] = None, embeddings=None, quantization: Optional[str] = None,
+                 dedup: bool = CHUNK_DEDUP, source_root: Optional[str] = None):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
-        if not self.openai_api_key:
-            raise EnvironmentError("OPENAI_API_KEY not found in environment variables.")
+        self.dedup = dedup
+        # Files under source_root get their path relative to it as "source" (e.g. an upload's own filename)
+        self.source_root = source_root
+        # Vector storage for new indexes: none (flat float32), fp16 or sq8 (VECTOR_QUANTIZATION)
+        self.quantization = validate_mode(quantization)
         
-        # Initialize embedding model
-        self.embeddings = OpenAIEmbeddings(openai_api_key=self.openai_api_key)
+        # Embedding model: the one passed in, else the process-wide EMBEDDING_BACKEND / EMBEDDING_MODEL
+        # instance (a dedicated one for an explicit API key)
+        if embeddings is None:
+            embeddings = create_embeddings(openai_api_key=openai_api_key) if openai_api_key else shared_embeddings()
+        self.embeddings = embeddings
     
     @staticmethod
     def detect_file_type(file_path: str) -> str:
@@ -77,6 +98,8 @@ class DocumentProcessor:
             'application/msword'
         ]:
             return 'document'
+        elif extension in ['.json', '.ndjson'] or mime_type == 'application/json':
+            return 'json'
         else:
             return 'unknown'
     
@@ -90,44 +113,84 @@ class DocumentProcessor:
         Returns:
             List containing a single document with extracted text
         """
+        return self.load_images_with_tesseract([file_path])
+    
+    def load_images_with_tesseract(self, file_paths: List[str]) -> List[Document]:
+        """
+        OCR several images in parallel across a process pool (results cached by image hash)
+        
+        Args:
+            file_paths: Paths to the image files
+            
+        Returns:
+            One document per image that yielded text
+        """
         try:
-            # Import libraries for image processing
-            try:
-                from PIL import Image
-                import pytesseract
-            except ImportError:
+            # PIL / pytesseract are imported by the OCR workers: only check they're installed
+            if not all(importlib.util.find_spec(m) for m in ("PIL", "pytesseract")):
                 log.error("Missing dependencies for image processing")
                 log.error("Install with: pip install pillow pytesseract")
                 log.error("And ensure Tesseract OCR is installed on your system")
                 return []
             
-            log.info(f"Processing image with Tesseract OCR: {file_path}")
-            
-            # Open the image
-            img = Image.open(file_path)
-            
-            # Extract text
-            text = pytesseract.image_to_string(img)
-            
+            log.info(f"Processing {len(file_paths)} image(s) with Tesseract OCR")
+            texts = ocr_images(file_paths)
+        except Exception as e:
+            log.error(f"Error processing images with Tesseract: {e}")
+            return []
+        
+        docs = []
+        for file_path in file_paths:
+            text = texts.get(file_path, "")
             if not text.strip():
                 log.warning(f"No text extracted from image: {file_path}")
-                return []
+                continue
             
             # Create a document
-            doc = Document(
+            docs.append(Document(
                 page_content=text,
                 metadata={
                     "source": file_path,
                     "file_type": "image",
                     "title": os.path.basename(file_path)
                 }
-            )
-            
-            return [doc]
+            ))
+        
+        return docs
+    
+    def ocr_text_poor_pages(self, file_path: str, documents: List[Document]) -> List[Document]:
+        """
+        Replace the text of scanned / text-poor PDF pages with Tesseract output
+        
+        Only pages with fewer than OCR_MIN_PAGE_CHARS extracted characters are
+        rendered and OCR'd, in parallel across a process pool.
+        
+        Args:
+            file_path: Path to the PDF
+            documents: One document per page, as returned by PyMuPDFLoader
             
+        Returns:
+            The same documents, with OCR text on the pages that needed it
+        """
+        poor = {doc.metadata.get('page', i): doc for i, doc in enumerate(documents)
+                if len(doc.page_content.strip()) < OCR_MIN_PAGE_CHARS}
+        if not poor:
+            return documents
+        
+        try:
+            texts = ocr_pdf_pages(file_path, sorted(poor))
+        except ImportError:
+            log.error("Missing dependencies for OCR: pip install pillow pytesseract (and install Tesseract)")
+            return documents
         except Exception as e:
-            log.error(f"Error processing image with Tesseract: {e}")
-            return []
+            log.error(f"OCR failed for {file_path}: {e}")
+            return documents
+        
+        for page_no, text in texts.items():
+            if len(text.strip()) > len(poor[page_no].page_content.strip()):
+                poor[page_no].page_content = text
+                poor[page_no].metadata['ocr'] = True
+        return documents
     
     def load_document(self, file_path: str, file_type: Optional[str] = None) -> Tuple[List[Any], str]:
         """
@@ -151,9 +214,9 @@ class DocumentProcessor:
             if file_type == 'pdf':
                 try:
                     loader = PyMuPDFLoader(file_path)
-                    documents = loader.load()
+                    documents = self.ocr_text_poor_pages(file_path, loader.load())
                     if documents and len(''.join([doc.page_content for doc in documents])) < 100:
-                        log.warning(f"Limited text content in PDF, might need OCR: {file_path}")
+                        log.warning(f"Limited text content in PDF even after OCR: {file_path}")
                 except Exception as e:
                     log.error(f"Error loading PDF with PyMuPDFLoader: {e}")
                     documents = []
@@ -173,10 +236,17 @@ class DocumentProcessor:
             elif file_type == 'image':
                 documents = self.load_image_with_tesseract(file_path)
 
-            elif extension == '.json' or mime_type == 'application/json':
+            elif file_type in STREAMED_FILE_TYPES:
+                # Materialized for callers that want a list; vectorize_by_format streams these instead
+                documents = [doc for batch in iter_document_batches(file_path, file_type) for doc in batch]
+
+            elif extension in ('.json', '.ndjson') or mime_type == 'application/json':
                 try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
+                    if extension == '.ndjson':
+                        data = read_transcript(file_path)
+                    else:
+                        with open(file_path, "r", encoding="utf-8") as f:
+                            data = json.load(f)
                     if "text" not in data:
                         log.warning(f"'text' field missing in JSON: {file_path}")
                         return [], 'json'
@@ -190,7 +260,9 @@ class DocumentProcessor:
                         metadata={
                             "source": file_path,
                             "file_type": "json",
-                            "title": os.path.basename(file_path)
+                            "title": os.path.basename(file_path),
+                            # Consumed by the splitter to timestamp each chunk
+                            "segments": data.get("segments") or []
                         }
                     )
                     documents = [doc]
@@ -235,6 +307,7 @@ class DocumentProcessor:
             file_types = ['pdf', 'txt', 'presentation', 'image', 'spreadsheet', 'document', 'json']
             
         documents_by_type = {file_type: [] for file_type in file_types}
+        image_paths = []
         
         # Manually walk through the directory
         for root, _, files in os.walk(directory_path):
@@ -252,12 +325,20 @@ class DocumentProcessor:
                 if file_type not in file_types:
                     continue
                 
+                # Images are OCR'd together below, in parallel
+                if file_type == 'image':
+                    image_paths.append(file_path)
+                    continue
+                
                 # Load document
                 docs, detected_type = self.load_document(file_path)
                 if docs:
                     # Store by detected type
                     documents_by_type[detected_type].extend(docs)
         
+        if image_paths:
+            documents_by_type['image'].extend(self.load_images_with_tesseract(image_paths))
+        
         # Log summary
         for file_type, docs in documents_by_type.items():
             if docs:
@@ -265,6 +346,21 @@ class DocumentProcessor:
             
         return documents_by_type
     
+    def find_files(self, directory_path: str, file_types: List[str]) -> List[Tuple[str, str]]:
+        """
+        List (path, file_type) for the non-hidden files of the given types under a directory
+        """
+        found = []
+        for root, _, files in os.walk(directory_path):
+            for file in sorted(files):
+                if file.startswith('.'):
+                    continue
+                file_path = os.path.join(root, file)
+                file_type = self.detect_file_type(file_path)
+                if file_type in file_types:
+                    found.append((file_path, file_type))
+        return found
+    
     def process_documents(self, documents: List[Any], chunk_size: int = 1000, chunk_overlap: int = 200) -> List[Any]:
         """
         Process documents into text chunks suitable for embedding
@@ -275,25 +371,61 @@ class DocumentProcessor:
             chunk_overlap: Overlap between chunks
         
         Returns:
-            List of processed document chunks
+            List of processed document chunks, with start_char / end_char (and
+            start / end timestamps for transcripts) in their metadata
         """
         if not documents:
             log.warning("No chunks produced from document")
             return []
+        
+        if self.source_root:
+            for doc in documents:
+                source = doc.metadata.get("source")
+                if source and os.path.isabs(source):
+                    relative = os.path.relpath(source, self.source_root)
+                    if not relative.startswith(".."):
+                        doc.metadata["source"] = Path(relative).as_posix()
             
         # Split documents into chunks
-        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        splitter = OffsetTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
         docs = splitter.split_documents(documents)
         
         log.info(f"Split {len(documents)} documents into {len(docs)} chunks")
         return docs
     
+    def dedup_chunks(self, chunks_by_type: Dict[str, List[Any]],
+                     deduplicator: Optional[ChunkDeduplicator] = None) -> Dict[str, List[Any]]:
+        """
+        Drop exact / near-duplicate chunks across all data types before embedding
+        
+        Args:
+            chunks_by_type: Dictionary of data_type -> list of chunks
+            deduplicator: State shared by every batch of one ingest, so chunks already
+                seen in an earlier batch are dropped too (a fresh one if omitted)
+            
+        Returns:
+            The same mapping with duplicates merged into the first occurrence
+        """
+        for data_type, chunks in chunks_by_type.items():
+            for chunk in chunks:
+                chunk.metadata['doc_type'] = data_type
+        if not self.dedup:
+            return chunks_by_type
+        
+        # One pass over every type so a PDF and its transcript dedupe against each other
+        kept = (deduplicator or ChunkDeduplicator()).dedup([c for chunks in chunks_by_type.values() for c in chunks])
+        
+        deduped = {data_type: [] for data_type in chunks_by_type}
+        for chunk in kept:
+            deduped[chunk.metadata['doc_type']].append(chunk)
+        return deduped
+    
     def create_vector_store(self,documents: List[Any],data_type: str, 
                             output_dir: str = str(DATA_DIR / "vector_db"), 
                             batch_size: int = 16, 
-                            combine_all: bool = True) -> FAISS:
+                            combine_all: bool = True) -> int:
         """
-        Create a FAISS vector store from document chunks
+        Embed document chunks and add them to the FAISS vector store
         
         Args:
             documents: List of document chunks
@@ -303,11 +435,11 @@ class DocumentProcessor:
             combine_all: If True, all documents go to the same vector store regardless of type
             
         Returns:
-            FAISS vector store object
+            Number of chunks added to the store
         """
         if not documents:
             log.warning(f"No documents to vectorize for {data_type}")
-            return None
+            return 0
             
         # Create vector store path (no longer using data_type in the path)
         vector_store_path = output_dir
@@ -317,50 +449,131 @@ class DocumentProcessor:
         for doc in documents:
             doc.metadata['doc_type'] = data_type
         
-        # Batch embedding
+        log.info(f"Processing embeddings for {data_type} in batches of {batch_size}...")
+        embedded = self.embed_documents(documents, batch_size)
+        if not embedded:
+            log.warning(f"No chunks could be embedded for {data_type}")
+            return 0
+        
+        log.info(f"Adding {data_type} chunks to the FAISS vector store...")
+        return self.save_embeddings(embedded, vector_store_path)
+    
+    def create_vector_store_streaming(self, file_path: str, data_type: str,
+                                      output_dir: str = str(DATA_DIR / "vector_db"),
+                                      batch_size: int = 16,
+                                      chunk_size: int = 1000,
+                                      chunk_overlap: int = 200,
+                                      deduplicator: Optional[ChunkDeduplicator] = None) -> int:
+        """
+        Vectorize a spreadsheet or Word file batch by batch
+        
+        Rows / paragraphs are read in bounded batches, chunked, deduplicated and
+        embedded, and written to the store every STREAM_FLUSH_CHUNKS chunks, so
+        memory stays flat however large the file is. Dedup state spans the
+        whole file (and the rest of the ingest when `deduplicator` is passed).
+        
+        Args:
+            file_path: Path to the .csv / .xlsx / .docx file
+            data_type: 'spreadsheet' or 'document'
+            output_dir: Directory for vector store
+            batch_size: Number of documents to process in each embedding batch
+            chunk_size: Size of text chunks
+            chunk_overlap: Overlap between chunks
+            deduplicator: Dedup state shared with the rest of the ingest
+            
+        Returns:
+            Number of chunks added to the store
+        """
+        log.info(f"Streaming {data_type} file: {file_path}...")
+        pending, total = [], 0
+        deduplicator = deduplicator or ChunkDeduplicator()
+        
+        for docs in iter_document_batches(file_path, data_type):
+            chunks = self.process_documents(docs, chunk_size, chunk_overlap)
+            chunks = self.dedup_chunks({data_type: chunks}, deduplicator)[data_type]
+            pending.extend(self.embed_documents(chunks, batch_size))
+            if len(pending) >= STREAM_FLUSH_CHUNKS:
+                total += self.save_embeddings(pending, output_dir)
+                pending = []
+        
+        if pending:
+            total += self.save_embeddings(pending, output_dir)
+        if total:
+            log.info(f"Streamed {total} chunks from {file_path}")
+        else:
+            log.warning(f"No chunks could be embedded for {file_path}")
+        return total
+    
+    def embed_documents(self, documents: List[Any], batch_size: int = 16) -> List[Tuple[str, List[float], dict]]:
+        """
+        Embed document chunks in batches, reusing cached vectors from the artifact store
+        
+        Each chunk's vector is cached under its own text (and embedding model), so
+        a hit doesn't depend on how chunks were batched or deduplicated: the
+        summarizer reads the same entries for a transcript indexed before.
+        
+        Args:
+            documents: List of document chunks
+            batch_size: Number of uncached chunks to send in each embedding batch
+            
+        Returns:
+            List of (text, vector, metadata) for every successfully embedded chunk
+        """
         texts = [doc.page_content for doc in documents]
         metadatas = [doc.metadata for doc in documents]
+        store = get_artifact_store()
+        info = embedding_info(self.embeddings)
         
-        vectors = []
-        log.info(f"Processing embeddings for {data_type} in batches of {batch_size}...")
+        keys = [artifact_key(sha256_text(text), **info) for text in texts]
+        vectors = {key: store.get_json("embeddings", key) for key in dict.fromkeys(keys)}
+        missing = [key for key, vector in vectors.items() if vector is None]
+        if len(missing) < len(vectors):
+            log.info(f"♻️ Reused {len(vectors) - len(missing)}/{len(vectors)} cached embeddings")
         
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i + batch_size]
+        key_texts = dict(zip(keys, texts))
+        n_batches = (len(missing) + batch_size - 1) // batch_size
+        for i in range(0, len(missing), batch_size):
+            batch_keys = missing[i:i + batch_size]
             try:
-                result = self.embeddings.embed_documents(batch_texts)
-                vectors.extend(result)
-                log.info(f"✅ Embedded batch {i//batch_size + 1}/{(len(texts) + batch_size - 1)//batch_size}")
+                with timed("embed_batch"):
+                    result = self.embeddings.embed_documents([key_texts[key] for key in batch_keys])
+                EMBED_BATCH_SIZE.observe(len(batch_keys))
+                log.info(f"✅ Embedded batch {i//batch_size + 1}/{n_batches}")
             except Exception as e:
                 log.error(f"❌ Failed batch {i//batch_size + 1}: {e}")
-            time.sleep(0.5)  # Rate limit protection
-        
-        # Create FAISS index
-        log.info(f"Creating FAISS vector store for {data_type}...")
-        
-        # Check if vector store already exists - if so, merge with existing
-        if os.path.exists(os.path.join(vector_store_path, "index.faiss")):
-            log.info(f"Existing vector store found, merging new documents...")
-            # Load existing vector store
-            existing_db = FAISS.load_local(vector_store_path, self.embeddings, allow_dangerous_deserialization=True)
-            # Add new texts
-            existing_db.add_texts(texts=texts, metadatas=metadatas)
-            # Save updated vector store
-            existing_db.save_local(vector_store_path)
-            db = existing_db
-        else:
-            # Create new vector store
-            db = FAISS.from_texts(texts=texts, embedding=self.embeddings, metadatas=metadatas)
-            db.save_local(vector_store_path)
+                continue
+            for key, vector in zip(batch_keys, result):
+                vectors[key] = vector
+                store.put_json("embeddings", key, vector)
         
-        log.info(f"Vector store saved to {vector_store_path}")
+        return [(text, vectors[key], metadata) for text, key, metadata in zip(texts, keys, metadatas)
+                if vectors[key] is not None]
+    
+    def save_embeddings(self, embedded: List[Tuple[str, List[float], dict]], vector_store_path: str) -> int:
+        """
+        Add precomputed (text, vector, metadata) triples to the FAISS store at vector_store_path
+        
+        The triples become a new immutable segment; existing segments are never
+        rewritten. Writes go through the process-wide segment writer, which
+        coalesces concurrent calls for the same store, and this waits for it.
         
-        return db
+        Args:
+            embedded: Output of embed_documents
+            vector_store_path: Directory for vector store
+            
+        Returns:
+            Number of chunks written
+        """
+        written = get_segment_writer().append(vector_store_path, embedded, self.embeddings, self.quantization).result()
+        log.info(f"Vector store segment saved to {vector_store_path}")
+        return written
 
 class DocumentVectorizer:
     """Main class for vectorizing documents by data type"""
     
-    def __init__(self, openai_api_key: Optional[str] = None):
-        self.processor = DocumentProcessor(openai_api_key)
+    def __init__(self, openai_api_key: Optional[str] = None, embeddings=None, quantization: Optional[str] = None,
+                 dedup: bool = CHUNK_DEDUP, source_root: Optional[str] = None):
+        self.processor = DocumentProcessor(openai_api_key, embeddings, quantization, dedup, source_root)
     
     def vectorize_by_format(self,
                           input_path: str,
@@ -368,7 +581,7 @@ class DocumentVectorizer:
                           batch_size: int = 16,
                           chunk_size: int = 1000,
                           chunk_overlap: int = 200,
-                          combine_all: bool = True) -> Dict[str, FAISS]:
+                          combine_all: bool = True) -> Dict[str, int]:
         """
         Vectorize documents by format/data type
         
@@ -381,79 +594,104 @@ class DocumentVectorizer:
             combine_all: If True, all documents go to the same vector store regardless of type
             
         Returns:
-            Dictionary of data_type -> FAISS vector store
+            Dictionary of data_type -> number of chunks added (a single "combined" entry if combine_all)
         """
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
 
-        vector_stores = {}
+        chunk_counts = {}
         all_data_types = set()
+        # One dedup table for the whole ingest: streamed batches and other files dedupe against each other
+        deduplicator = ChunkDeduplicator()
         
         # Handle file or directory
         if os.path.isfile(input_path):
             # Single file - determine type and vectorize
-            documents, file_type = self.processor.load_document(input_path)
+            file_type = self.processor.detect_file_type(input_path)
+            if file_type in STREAMED_FILE_TYPES:
+                documents = []
+                n = self.processor.create_vector_store_streaming(
+                    input_path, file_type, output_dir, batch_size, chunk_size, chunk_overlap, deduplicator)
+                if n:
+                    chunk_counts[file_type] = n
+                    all_data_types.add(file_type)
+            else:
+                documents, file_type = self.processor.load_document(input_path)
             
             if documents:
                 # Process into chunks
                 chunks = self.processor.process_documents(documents, chunk_size, chunk_overlap)
+                chunks = self.processor.dedup_chunks({file_type: chunks}, deduplicator)[file_type]
                 
                 # Create vector store
-                db = self.processor.create_vector_store(chunks, file_type, output_dir, batch_size, combine_all)
-                if db:
-                    vector_stores[file_type] = db
+                n = self.processor.create_vector_store(chunks, file_type, output_dir, batch_size, combine_all)
+                if n:
+                    chunk_counts[file_type] = n
                     all_data_types.add(file_type)
                 
         elif os.path.isdir(input_path):
-            # Directory - process all files by type
-            documents_by_type = self.processor.load_documents_from_directory(input_path)
+            # Directory - process all files by type (spreadsheets / Word files are streamed below)
+            file_types = ['pdf', 'txt', 'presentation', 'image', 'json']
+            documents_by_type = self.processor.load_documents_from_directory(input_path, file_types=file_types)
             
-            # Process and vectorize each type
-            for data_type, docs in documents_by_type.items():
-                if docs:
-                    # Process into chunks
-                    chunks = self.processor.process_documents(docs, chunk_size, chunk_overlap)
-                    
+            # Process each type into chunks, then drop duplicates across types
+            chunks_by_type = {
+                data_type: self.processor.process_documents(docs, chunk_size, chunk_overlap)
+                for data_type, docs in documents_by_type.items() if docs
+            }
+            chunks_by_type = self.processor.dedup_chunks(chunks_by_type, deduplicator)
+            
+            # Vectorize each type
+            for data_type, chunks in chunks_by_type.items():
+                if chunks:
                     # Create vector store
-                    db = self.processor.create_vector_store(chunks, data_type, output_dir, batch_size, combine_all)
-                    if db:
-                        vector_stores[data_type] = db
+                    n = self.processor.create_vector_store(chunks, data_type, output_dir, batch_size, combine_all)
+                    if n:
+                        chunk_counts[data_type] = n
                         all_data_types.add(data_type)
+            
+            for file_path, data_type in self.processor.find_files(input_path, list(STREAMED_FILE_TYPES)):
+                n = self.processor.create_vector_store_streaming(
+                    file_path, data_type, output_dir, batch_size, chunk_size, chunk_overlap, deduplicator)
+                if n:
+                    chunk_counts[data_type] = chunk_counts.get(data_type, 0) + n
+                    all_data_types.add(data_type)
         else:
             raise ValueError(f"Input path does not exist: {input_path}")
         
-        # If combining all types, update the return value to reflect the combined store
-        if combine_all and all_data_types:
-            # Since we're using the same vector store for all types, we can simplify the return
-            # to just have a single entry with a combined name
-            combined_name = "combined"
-            if os.path.exists(os.path.join(output_dir, "index.faiss")):
-                # Load the combined vector store
-                combined_db = FAISS.load_local(output_dir, self.processor.embeddings, allow_dangerous_deserialization=True)
-                vector_stores = {combined_name: combined_db}
+        # If combining all types, report a single entry for the combined store
+        if combine_all:
+            if all_data_types:
+                chunk_counts = {"combined": sum(chunk_counts.values())}
                 log.info(f"Vectorization complete with all data types combined into one store: {', '.join(all_data_types)}")
             else:
                 log.warning("No vector store was created.")
-                vector_stores = {}
         else:
-            log.info(f"Vectorization complete with {len(vector_stores)} separate data types")
+            log.info(f"Vectorization complete with {len(chunk_counts)} separate data types")
         
-        return vector_stores
+        return chunk_counts
 
 def main():
     parser = argparse.ArgumentParser(description="Vectorize documents into FAISS vector store.")
     parser.add_argument("--input", required=True, nargs="+",help="One or more file paths to vectorize (e.g., data/doc1.pdf data/doc2.txt)")    
-    parser.add_argument("--output", default=str(BASE_DIR / "data" / "vector_db"), help="Output folder for FAISS vector store")
+    parser.add_argument("--output", help="Output folder for FAISS vector store (overrides --collection)")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION, help="Named collection to write to (e.g., a course id)")
     parser.add_argument("--chunk-size", type=int, default=1000, help="Size of text chunks")
     parser.add_argument("--chunk-overlap", type=int, default=200, help="Overlap between chunks")
     parser.add_argument("--batch-size", type=int, default=16, help="Batch size for OpenAI embedding requests")
     parser.add_argument("--openai-api-key", help="OpenAI API key (or use .env)")
+    parser.add_argument("--embedding-backend", choices=BACKENDS, default=EMBEDDING_BACKEND, help="Embedding backend (default: EMBEDDING_BACKEND or openai)")
+    parser.add_argument("--embedding-model", help="Embedding model: OpenAI model name, or local model dir (default: EMBEDDING_MODEL)")
+    parser.add_argument("--embedding-threads", type=int, help="CPU threads for the local embedding backend")
+    parser.add_argument("--no-dedup", action="store_false", dest="dedup", help="Keep exact / near-duplicate chunks")
+    parser.set_defaults(dedup=CHUNK_DEDUP)
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default=VECTOR_QUANTIZATION, help="Vector storage: none (float32), fp16 or sq8 with exact re-ranking")
     parser.add_argument("--separate-by-type", action="store_false", dest="combine_all", help="Keep separate vector DBs by file type")
     parser.set_defaults(combine_all=True)
     args = parser.parse_args()
 
     input_paths = [Path(p).resolve() if Path(p).is_absolute() else (BASE_DIR / p).resolve() for p in args.input]
-    output_path = Path(args.output).resolve()
+    output_path = Path(args.output).resolve() if args.output else collection_path(args.collection)
 
     for path in input_paths:
         if not path.exists():
@@ -462,7 +700,10 @@ def main():
         log.info(f"📂 Input path: {path}")
     log.info(f"💾 Output path: {output_path}")
 
-    vectorizer = DocumentVectorizer(openai_api_key=args.openai_api_key)
+    embeddings = create_embeddings(args.embedding_backend, args.embedding_model,
+                                   args.openai_api_key, args.embedding_threads)
+    vectorizer = DocumentVectorizer(openai_api_key=args.openai_api_key, embeddings=embeddings,
+                                    quantization=args.quantization, dedup=args.dedup)
 
     stores = {}
     try:
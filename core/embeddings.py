@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+BASE_DIR = Path(__file__).parent.parent.resolve()
+MODELS_DIR = BASE_DIR / "models"
+BACKENDS = ("openai", "local")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")          # OpenAI model name, or a local model dir / name under models/
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0")) or None   # local backend only; None = runtime default
+LOCAL_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+INDEX_META_FILE = "embedding.json"
+
+
+class EmbeddingMismatchError(ValueError):
+    """The query embeddings are not the ones the index was built with."""
+
+
+# ─── Local CPU backend ───────────────────────────────────────
+class LocalEmbeddings(Embeddings):
+    """
+    Embeds on the local CPU from a model directory, no network involved.
+
+    A directory holding `model.onnx` + `tokenizer.json` runs on onnxruntime
+    (mean pooling over the attention mask); anything else is loaded with
+    sentence-transformers. Texts are sorted by length before batching so each
+    batch pads to a similar length, and vectors are L2-normalized.
+    """
+
+    backend = "local"
+
+    def __init__(self, model_path: str, batch_size: int = LOCAL_BATCH_SIZE,
+                 threads: Optional[int] = EMBEDDING_THREADS, max_length: int = 512):
+        self.model_path = Path(model_path)
+        self.model = self.model_path.name
+        self.batch_size = batch_size
+        self.threads = threads
+        self.max_length = max_length
+
+        onnx_file = next((p for p in (self.model_path / "model.onnx", self.model_path / "onnx" / "model.onnx")
+                          if p.exists()), None)
+        if onnx_file is not None:
+            self._load_onnx(onnx_file)
+        else:
+            self._load_sentence_transformers()
+        log.info(f"🧮 Local embedding model '{self.model}' loaded ({self.engine}, threads={threads or 'default'})")
+
+    def _load_onnx(self, onnx_file: Path) -> None:
+        try:
+            import numpy as np
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise ImportError("ONNX embeddings need: pip install onnxruntime tokenizers numpy") from exc
+
+        opts = ort.SessionOptions()
+        if self.threads:
+            opts.intra_op_num_threads = self.threads
+            opts.inter_op_num_threads = 1
+        self._session = ort.InferenceSession(str(onnx_file), opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        self._tokenizer = Tokenizer.from_file(str(self.model_path / "tokenizer.json"))
+        self._tokenizer.enable_truncation(self.max_length)
+        self._tokenizer.enable_padding()
+        self._np = np
+        self.engine = "onnx"
+
+    def _load_sentence_transformers(self) -> None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as exc:
+            raise ImportError(
+                f"No model.onnx in {self.model_path}; loading it with sentence-transformers needs: "
+                "pip install sentence-transformers"
+            ) from exc
+
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        self._st = SentenceTransformer(str(self.model_path), device="cpu")
+        self._st.max_seq_length = min(self._st.max_seq_length or self.max_length, self.max_length)
+        self.engine = "sentence-transformers"
+
+    def _encode_onnx(self, texts: List[str]):
+        np = self._np
+        encodings = self._tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self._session.run(None, feeds)[0]                      # (batch, tokens, dim)
+        weights = mask[..., None].astype(hidden.dtype)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            batch = [texts[i] for i in idx]
+            if self.engine == "onnx":
+                out = self._encode_onnx(batch)
+            else:
+                out = self._st.encode(batch, batch_size=len(batch), normalize_embeddings=True,
+                                      convert_to_numpy=True, show_progress_bar=False)
+            for i, vec in zip(idx, out.tolist()):
+                vectors[i] = vec
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def resolve_local_model(model: Optional[str]) -> Path:
+    if not model:
+        raise ValueError("The local embedding backend needs EMBEDDING_MODEL (a model directory or a name under models/)")
+    for candidate in (Path(model), MODELS_DIR / model):
+        if candidate.is_dir():
+            return candidate.resolve()
+    raise ValueError(f"Local embedding model '{model}' not found (looked in the path itself and {MODELS_DIR})")
+
+
+# ─── Factory ─────────────────────────────────────────────────
+@lru_cache()
+def _governed_openai_embeddings():
+    from langchain_openai import OpenAIEmbeddings
+    from core.openai_clients import acquire, estimate_tokens, BATCH, INTERACTIVE
+
+    class GovernedOpenAIEmbeddings(OpenAIEmbeddings):
+        """OpenAI embeddings paced by the shared rate governor: ingest as batch, queries as interactive."""
+
+        def embed_documents(self, texts, *args, **kwargs):
+            acquire("embeddings", estimate_tokens(texts), BATCH)
+            return super().embed_documents(texts, *args, **kwargs)
+
+        def embed_query(self, text):
+            acquire("embeddings", estimate_tokens([text]), INTERACTIVE)
+            # Not via self.embed_documents: that would queue the query again as batch work
+            return super().embed_documents([text])[0]
+
+    return GovernedOpenAIEmbeddings
+
+
+def create_embeddings(backend: Optional[str] = None, model: Optional[str] = None,
+                      openai_api_key: Optional[str] = None, threads: Optional[int] = None) -> Embeddings:
+    """Build the configured embedding backend; arguments override the EMBEDDING_* environment."""
+    backend = backend or EMBEDDING_BACKEND
+    model = model or EMBEDDING_MODEL
+
+    if backend == "openai":
+        from core.openai_clients import get_http_client
+
+        openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            raise EnvironmentError("OPENAI_API_KEY not found in environment variables.")
+        kwargs = {"model": model} if model else {}
+        return _governed_openai_embeddings()(openai_api_key=openai_api_key, http_client=get_http_client(), **kwargs)
+
+    if backend == "local":
+        return LocalEmbeddings(resolve_local_model(model), threads=threads or EMBEDDING_THREADS)
+
+    raise ValueError(f"Unknown embedding backend '{backend}' (choose from {', '.join(BACKENDS)})")
+
+
+_shared: Dict[Tuple[str, Optional[str]], Embeddings] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_embeddings(backend: Optional[str] = None, model: Optional[str] = None) -> Embeddings:
+    """
+    Process-wide instance per (backend, model), shared by chat, ingest and
+    summaries: a local model is loaded from disk once, not per request or job.
+    """
+    key = (backend or EMBEDDING_BACKEND, model or EMBEDDING_MODEL)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = create_embeddings(*key)
+        return _shared[key]
+
+
+def embedding_info(embeddings: Embeddings) -> dict:
+    """Backend + model: everything that decides which vector space a text lands in."""
+    return {
+        "backend": getattr(embeddings, "backend", "openai"),
+        "model": getattr(embeddings, "model", type(embeddings).__name__),
+    }
+
+
+def configured_embedding_info(backend: Optional[str] = None, model: Optional[str] = None) -> dict:
+    """Backend + model that create_embeddings() would use, without loading anything (for cache keys)."""
+    backend = backend or EMBEDDING_BACKEND
+    model = model or EMBEDDING_MODEL
+    if backend == "local" and model:
+        model = Path(model).name
+    return {"backend": backend, "model": model or "default"}
+
+
+# ─── Index metadata ──────────────────────────────────────────
+def read_index_embedding(index_dir) -> Optional[dict]:
+    try:
+        with open(Path(index_dir) / INDEX_META_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_index_embedding(index_dir, embeddings: Embeddings, dim: int) -> None:
+    with open(Path(index_dir) / INDEX_META_FILE, "w", encoding="utf-8") as f:
+        json.dump({**embedding_info(embeddings), "dim": dim}, f, indent=2)
+
+
+def check_index_embedding(index_dir, embeddings: Embeddings) -> None:
+    """
+    Raise EmbeddingMismatchError if `embeddings` differ from the ones the index
+    at `index_dir` was built with. Indexes written before this metadata existed
+    were always built with OpenAI, so only the backend is checked for them.
+    """
+    recorded = read_index_embedding(index_dir) or {"backend": "openai"}
+    current = embedding_info(embeddings)
+    if recorded["backend"] != current["backend"] or recorded.get("model", current["model"]) != current["model"]:
+        raise EmbeddingMismatchError(
+            f"Index at {index_dir} was built with {recorded['backend']}:{recorded.get('model', '?')} "
+            f"embeddings, but {current['backend']}:{current['model']} was requested"
+        )
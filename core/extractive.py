@@ -0,0 +1,118 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Joins passages that were not adjacent in the transcript, so the model sees the gap
+GAP_MARKER = "\n[…]\n"
+
+
+def _normalize(vectors) -> np.ndarray:
+    x = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _sq_distances(x: np.ndarray, x_sq: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """(n, k) squared L2 distances as |x|² − 2x·c + |c|², one matrix product instead of n × k loops."""
+    d = x_sq[:, None] - 2.0 * (x @ centroids.T) + (centroids * centroids).sum(axis=1)[None, :]
+    return np.maximum(d, 0.0, out=d)
+
+
+def kmeans(vectors, k: int, iters: int = 25, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lloyd's k-means with k-means++ seeding, fully vectorized in NumPy.
+    Returns (centroids (k, d), labels (n,)). A cluster that empties out is
+    re-seeded with the point farthest from its centroid.
+    """
+    x = np.asarray(vectors, dtype=np.float32)
+    n = len(x)
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+    x_sq = (x * x).sum(axis=1)
+
+    # k-means++: each next seed is drawn proportionally to its squared distance from the chosen ones
+    chosen = [int(rng.integers(n))]
+    closest = _sq_distances(x, x_sq, x[chosen])[:, 0]
+    for _ in range(1, k):
+        total = float(closest.sum())
+        nxt = int(rng.choice(n, p=closest / total)) if total > 0 else int(rng.integers(n))
+        chosen.append(nxt)
+        closest = np.minimum(closest, _sq_distances(x, x_sq, x[[nxt]])[:, 0])
+    centroids = x[chosen].copy()
+
+    labels = np.full(n, -1, dtype=np.int64)
+    for _ in range(iters):
+        dist = _sq_distances(x, x_sq, centroids)
+        new_labels = dist.argmin(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, x)
+        empty = counts == 0
+        if empty.any():
+            far = np.argsort(dist[np.arange(n), labels])[::-1][: int(empty.sum())]
+            sums[empty], counts[empty] = x[far], 1
+        centroids = sums / counts[:, None]
+    return centroids, labels
+
+
+def representatives(vectors, k: int, per_cluster: int = 1, seed: int = 0) -> List[int]:
+    """
+    Cluster `vectors` (cosine geometry) into `k` groups and return the
+    positions of the `per_cluster` members closest to each centroid, in
+    their original order.
+    """
+    x = _normalize(vectors)
+    if len(x) <= k * per_cluster:
+        return list(range(len(x)))
+    centroids, labels = kmeans(x, k, seed=seed)
+    dist = ((x - centroids[labels]) ** 2).sum(axis=1)
+
+    # Rank members within their cluster by distance, keep the first per_cluster of each
+    order = np.lexsort((dist, labels))
+    sorted_labels = labels[order]
+    first = np.searchsorted(sorted_labels, sorted_labels, side="left")
+    rank = np.arange(len(order)) - first
+    return sorted(int(i) for i in order[rank < per_cluster])
+
+
+def select_passages(passages: Sequence[str], vectors, max_chars: int, max_calls: int,
+                    per_cluster: int = 1, seed: int = 0) -> List[int]:
+    """
+    Positions of the representative passages that fit `max_calls` inputs of
+    `max_chars` each once packed by `pack_passages`: one cluster per
+    `per_cluster` passages of budget, so the number of map calls stays bounded
+    however long the transcript is.
+    """
+    longest = max(len(p) for p in passages) + len(GAP_MARKER)
+    budget = max(1, max_calls * max(1, max_chars - longest) // longest)
+    if len(passages) <= budget:
+        return list(range(len(passages)))
+    return representatives(vectors, max(1, budget // per_cluster), per_cluster, seed)
+
+
+def pack_passages(passages: Sequence[str], selected: Sequence[int], max_chars: int) -> List[str]:
+    """Greedily pack the selected passages, in transcript order, into inputs of at most `max_chars`."""
+    inputs, current, size, prev = [], [], 0, None
+    for i in selected:
+        sep = "\n\n" if prev is not None and i == prev + 1 else GAP_MARKER
+        piece = passages[i] if not current else sep + passages[i]
+        if current and size + len(piece) > max_chars:
+            inputs.append("".join(current))
+            current, size, piece = [], 0, passages[i]
+        current.append(piece)
+        size += len(piece)
+        prev = i
+    if current:
+        inputs.append("".join(current))
+    return inputs
+
+
+def coverage(vectors, selected: Sequence[int]) -> float:
+    """Mean over all passages of the cosine similarity to their closest selected passage (1.0 = everything covered)."""
+    x = _normalize(vectors)
+    if not len(selected):
+        return 0.0
+    return float((x @ x[list(selected)].T).max(axis=1).mean())
@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import concurrent.futures as cf
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from core.artifacts import register_gc_guard
+from core.metrics import JOBS, JOBS_RUNNING
+
+log = logging.getLogger(__name__)
+
+# ─── Paths / Config ──────────────────────────────────────────
+BASE_DIR = Path(__file__).parent.parent.resolve()
+JOBS_DB_PATH = BASE_DIR / "data" / "jobs.db"
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+# Queued (not yet running) jobs beyond which new background work is shed
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "16"))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = {DONE, FAILED, CANCELLED}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    total       INTEGER NOT NULL DEFAULT 0,
+    done        INTEGER NOT NULL DEFAULT 0,
+    cancel      INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_chunks (
+    job_id      TEXT NOT NULL,
+    idx         INTEGER NOT NULL,
+    result      TEXT,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when the job was cancelled by the client."""
+
+
+class JobContext:
+    """Handed to job handlers to report per-chunk progress and poll for cancellation."""
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    def set_total(self, total: int) -> None:
+        self.queue._execute("UPDATE jobs SET total = ? WHERE id = ?", (total, self.job_id))
+
+    def chunk_done(self, idx: int, result: Any = None) -> None:
+        self.queue._execute(
+            "INSERT OR REPLACE INTO job_chunks (job_id, idx, result, finished_at) VALUES (?, ?, ?, ?)",
+            (self.job_id, idx, json.dumps(result, ensure_ascii=False), time.time()),
+        )
+        self.queue._execute(
+            "UPDATE jobs SET done = (SELECT COUNT(*) FROM job_chunks WHERE job_id = ?) WHERE id = ?",
+            (self.job_id, self.job_id),
+        )
+
+    def cancelled(self) -> bool:
+        row = self.queue._query_one("SELECT cancel FROM jobs WHERE id = ?", (self.job_id,))
+        return bool(row and row["cancel"])
+
+    def check_cancelled(self) -> None:
+        if self.cancelled():
+            raise JobCancelled(self.job_id)
+
+
+Handler = Callable[[Dict[str, Any], JobContext], Any]
+
+# Handlers registered at import time; attached when the queue is first created
+_HANDLERS: Dict[str, Handler] = {}
+
+
+def register_job_handler(kind: str, handler: Handler) -> None:
+    """Declare the handler for a job kind. Cheap: doesn't open the queue."""
+    _HANDLERS[kind] = handler
+    if _queue is not None:
+        _queue.register(kind, handler)
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a bounded worker pool.
+
+    Jobs are persisted as soon as they are submitted, so a restart re-queues
+    whatever was queued or running. Handlers are registered per kind and are
+    looked up by name when a job is picked up.
+    """
+
+    def __init__(self, db_path: Path = JOBS_DB_PATH, max_workers: int = JOB_CONCURRENCY):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.handlers: Dict[str, Handler] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._pool = cf.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._requeue_interrupted()
+
+    # ─── SQLite helpers ─────────────────────────────────────
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cur.rowcount
+
+    def _query_one(self, sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _query_all(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _requeue_interrupted(self) -> None:
+        self._execute("UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+
+    # ─── Public API ─────────────────────────────────────────
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+        # Pick up jobs of this kind that survived a restart
+        for row in self._query_all("SELECT id FROM jobs WHERE kind = ? AND status = ?", (kind, QUEUED)):
+            self._pool.submit(self._run, row["id"])
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, params, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, json.dumps(params, ensure_ascii=False), time.time()),
+        )
+        self._pool.submit(self._run, job_id)
+        log.info("📥 Queued %s job %s", kind, job_id)
+        return job_id
+
+    def input_paths(self) -> List[str]:
+        """String params of unfinished jobs: the files they will still read must survive artifact GC."""
+        rows = self._query_all("SELECT params FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING))
+        return [v for row in rows for v in json.loads(row["params"]).values() if isinstance(v, str)]
+
+    def queued(self) -> int:
+        """Jobs waiting for a worker, all kinds together (they share the worker pool)."""
+        return self._query_one("SELECT COUNT(*) AS n FROM jobs WHERE status = ?", (QUEUED,))["n"]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._query_one("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": {"done": row["done"], "total": row["total"]},
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def result(self, job_id: str) -> Any:
+        row = self._query_one("SELECT result FROM jobs WHERE id = ?", (job_id,))
+        return json.loads(row["result"]) if row and row["result"] else None
+
+    def chunks(self, job_id: str) -> List[Dict[str, Any]]:
+        rows = self._query_all(
+            "SELECT idx, result, finished_at FROM job_chunks WHERE job_id = ? ORDER BY idx", (job_id,)
+        )
+        return [
+            {"idx": r["idx"], "result": json.loads(r["result"]), "finished_at": r["finished_at"]}
+            for r in rows
+        ]
+
+    def cancel(self, job_id: str) -> bool:
+        """Flag a job as cancelled. Queued jobs never start; running jobs stop at the next chunk."""
+        row = self._query_one("SELECT status FROM jobs WHERE id = ?", (job_id,))
+        if row is None or row["status"] in FINAL_STATES:
+            return False
+        self._execute("UPDATE jobs SET cancel = 1 WHERE id = ?", (job_id,))
+        self._execute(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (CANCELLED, time.time(), job_id, QUEUED),
+        )
+        return True
+
+    # ─── Worker ─────────────────────────────────────────────
+    def _run(self, job_id: str) -> None:
+        claimed = self._execute(
+            "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ? AND cancel = 0",
+            (RUNNING, time.time(), job_id, QUEUED),
+        )
+        if not claimed:
+            return
+
+        row = self._query_one("SELECT kind, params FROM jobs WHERE id = ?", (job_id,))
+        ctx = JobContext(self, job_id)
+        status = FAILED
+        JOBS_RUNNING.inc(kind=row["kind"])
+        try:
+            result = self.handlers[row["kind"]](json.loads(row["params"]), ctx)
+            ctx.check_cancelled()
+            self._execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+            status = DONE
+            log.info("✅ Job %s done", job_id)
+        except JobCancelled:
+            status = CANCELLED
+            self._execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?", (CANCELLED, time.time(), job_id))
+            log.info("🛑 Job %s cancelled", job_id)
+        except Exception as exc:
+            log.exception("Job %s failed", job_id)
+            self._execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, str(exc), time.time(), job_id),
+            )
+        finally:
+            JOBS_RUNNING.dec(kind=row["kind"])
+            JOBS.inc(kind=row["kind"], status=status)
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue shared by every router."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+            register_gc_guard(_queue.input_paths)
+            for kind, handler in _HANDLERS.items():
+                _queue.register(kind, handler)
+        return _queue
@@ -0,0 +1,73 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# ─── Config ──────────────────────────────────────────────────
+# Metadata fields that can filter a search inside the index
+FILTER_FIELDS = tuple(f.strip() for f in os.getenv("SEARCH_FILTER_FIELDS", "doc_type,file_type,source,title").split(",")
+                      if f.strip())
+
+_SCALARS = (str, int, float, bool)
+
+
+def _values(metadata: dict, field: str) -> List[Any]:
+    """Values of `field` for a chunk, including those of the duplicates merged into it."""
+    values = [metadata.get(field)] + [s.get(field) for s in metadata.get("sources", ()) if isinstance(s, dict)]
+    return [v for v in values if isinstance(v, _SCALARS)]
+
+
+def _wanted(value) -> Optional[List[Any]]:
+    """Filter value(s) as a list, or None if the filter isn't a plain value / list of values."""
+    values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+    return values if values and all(isinstance(v, _SCALARS) for v in values) else None
+
+
+class MetadataBitmapIndex:
+    """
+    Inverted index from metadata values to the positional ids of a FAISS
+    store, built once when the store is loaded.
+
+    A filter such as {"doc_type": ["pdf", "txt"], "source": "week1.pdf"} (OR
+    within a field, AND across fields) becomes a packed little-endian bitmap
+    over all ids, the layout faiss.IDSelectorBitmap reads, so the index search
+    itself skips non-matching vectors instead of over-fetching and discarding.
+    """
+
+    def __init__(self, ntotal: int, ids: Dict[str, Dict[Any, np.ndarray]]):
+        self.ntotal = ntotal
+        self._ids = ids
+
+    @classmethod
+    def build(cls, metadatas: Iterable[dict], ntotal: int, fields: Tuple[str, ...] = FILTER_FIELDS) -> "MetadataBitmapIndex":
+        postings: Dict[str, Dict[Any, List[int]]] = {f: {} for f in fields}
+        for i, metadata in enumerate(metadatas):
+            for field in fields:
+                for value in _values(metadata or {}, field):
+                    postings[field].setdefault(value, []).append(i)
+        return cls(ntotal, {f: {v: np.asarray(ids, dtype=np.int64) for v, ids in by_value.items()}
+                            for f, by_value in postings.items()})
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return tuple(self._ids)
+
+    def covers(self, filter: Any) -> bool:
+        """True if every condition of `filter` is a plain match on an indexed field."""
+        return (isinstance(filter, dict) and bool(filter)
+                and all(k in self._ids and _wanted(v) is not None for k, v in filter.items()))
+
+    def select(self, filter: Dict[str, Any]) -> Tuple[np.ndarray, int]:
+        """(packed bitmap, number of matching ids) for a filter accepted by `covers`."""
+        mask = None
+        for field, value in filter.items():
+            field_mask = np.zeros(self.ntotal, dtype=bool)
+            for v in _wanted(value):
+                ids = self._ids[field].get(v)
+                if ids is not None:
+                    field_mask[ids] = True
+            mask = field_mask if mask is None else mask & field_mask
+        return np.packbits(mask, bitorder="little"), int(np.count_nonzero(mask))
+
+    def values(self, field: str) -> List[Any]:
+        return sorted(self._ids.get(field, {}), key=str)
@@ -0,0 +1,188 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+# ─── Registry ────────────────────────────────────────────────
+# Minimal Prometheus-style metrics (text exposition format 0.0.4), no extra dependency.
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+_registry = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        lines.extend(self._render_samples(items))
+        return "\n".join(lines)
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_fmt_labels(self.labels, key)} {value}" for key, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self, items):
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["counts"]):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {state['count']}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {state['count']}")
+        return lines
+
+
+def render_metrics() -> str:
+    return "\n".join(m.render() for m in _registry) + "\n"
+
+
+# ─── Metrics ─────────────────────────────────────────────────
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent per pipeline stage", ("stage",))
+
+UPLOAD_BYTES = Counter("upload_bytes_total", "Bytes received through uploads")
+EMBED_BATCH_SIZE = Histogram("embedding_batch_size", "Texts per embedding request", buckets=SIZE_BUCKETS)
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ("caller", "type"))
+ADAPTIVE_LIMIT = Gauge("adaptive_concurrency_limit", "Current limit of adaptive concurrency controllers", ("name",))
+OPENAI_RATE_WAIT = Histogram("openai_rate_wait_seconds", "Time calls waited for the OpenAI rate governor", ("api", "priority"))
+ADMISSION_WAIT = Histogram("admission_wait_seconds", "Time requests queued before admission", ("group", "priority"))
+ADMISSION_REJECTED = Counter("admission_rejected_total", "Requests shed by admission control", ("group", "reason"))
+ADMISSION_ACTIVE = Gauge("admission_active", "Admitted requests currently running", ("group",))
+ADMISSION_QUEUED = Gauge("admission_queued", "Requests waiting for admission", ("group",))
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+INDEX_CACHE_BYTES = Gauge("index_cache_bytes", "Estimated bytes held by loaded vector stores")
+INDEX_SEGMENTS = Gauge("index_segments", "Live segments per vector store", ("store",))
+CHUNKS_DEDUPED = Counter("chunks_deduplicated_total", "Chunks dropped as duplicates at ingest", ("kind",))
+JOBS = Counter("jobs_total", "Background jobs by kind and final status", ("kind", "status"))
+JOBS_RUNNING = Gauge("jobs_running", "Background jobs currently running", ("kind",))
+
+
+# ─── Per-request stage timing ────────────────────────────────
+_request_stages: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_stages", default=None)
+
+
+def begin_request() -> contextvars.Token:
+    return _request_stages.set({})
+
+
+def end_request(token: contextvars.Token) -> dict:
+    stages = _request_stages.get() or {}
+    _request_stages.reset(token)
+    return stages
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and, if inside a request, in its timing breakdown."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
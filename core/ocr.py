@@ -0,0 +1,137 @@
+import concurrent.futures as cf
+import hashlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from core.artifacts import get_artifact_store, artifact_key, sha256_file
+from core.metrics import record_stage
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "50"))   # pages with less extracted text get OCR'd
+
+
+def _init_worker() -> None:
+    # One page per process: stop Tesseract's OpenMP threads from oversubscribing the cores
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _tesseract(image, lang: str) -> str:
+    import pytesseract
+
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+# ─── Worker tasks ────────────────────────────────────────────
+# Workers only render and OCR: the artifact store (its size accounting, GC and
+# GC guards holding the job queue's sqlite connection) is used in the parent only.
+def _render(pdf_path: str, page_no: int, dpi: int):
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        return doc[page_no].get_pixmap(dpi=dpi, colorspace=fitz.csRGB, alpha=False)
+
+
+def _pdf_page_digest(args) -> Tuple[int, str]:
+    """Run in a worker process: render one page and hash its pixels (the cache key)."""
+    pdf_path, page_no, dpi = args
+    return page_no, hashlib.sha256(_render(pdf_path, page_no, dpi).samples).hexdigest()
+
+
+def _ocr_pdf_page(args) -> Tuple[int, str, float]:
+    """Run in a worker process: render one page and OCR it."""
+    pdf_path, page_no, dpi, lang = args
+    from PIL import Image
+
+    start = time.perf_counter()
+    pix = _render(pdf_path, page_no, dpi)
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    return page_no, _tesseract(image, lang), time.perf_counter() - start
+
+
+def _ocr_image_file(args) -> Tuple[str, str, float]:
+    """Run in a worker process: OCR an image file."""
+    path, lang = args
+    from PIL import Image
+
+    start = time.perf_counter()
+    with Image.open(path) as image:
+        text = _tesseract(image, lang)
+    return path, text, time.perf_counter() - start
+
+
+# ─── Pool ────────────────────────────────────────────────────
+@contextmanager
+def _pool(n_tasks: int, workers: Optional[int]):
+    """A process pool for `n_tasks`, or None to run inline (a single task: no pool start-up cost)."""
+    workers = min(workers or OCR_WORKERS, n_tasks)
+    if workers <= 1:
+        # Inline runs in the API process: leave OMP_THREAD_LIMIT alone, a lone page may use Tesseract's threads
+        yield None
+        return
+    with cf.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+        yield ex
+
+
+def _map(ex, fn, tasks: list) -> list:
+    return [fn(t) for t in tasks] if ex is None else list(ex.map(fn, tasks))
+
+
+def _ocr_misses(ex, fn, tasks: list, keys: dict, texts: dict) -> None:
+    """OCR the tasks that missed the cache and store their text under `keys[task id]`."""
+    store = get_artifact_store()
+    for task_id, text, seconds in _map(ex, fn, tasks):
+        record_stage("ocr_page", seconds)
+        store.put_json("ocr", keys[task_id], {"text": text})
+        texts[task_id] = text
+
+
+def _cached(keys: dict) -> dict:
+    store = get_artifact_store()
+    texts = {}
+    for task_id, key in keys.items():
+        cached = store.get_json("ocr", key)
+        if cached is not None:
+            texts[task_id] = cached["text"]
+    return texts
+
+
+# ─── Public API ──────────────────────────────────────────────
+def ocr_pdf_pages(pdf_path: str, page_numbers: List[int], dpi: int = OCR_DPI, lang: str = OCR_LANG,
+                  workers: Optional[int] = None) -> Dict[int, str]:
+    """
+    OCR the given (0-based) pages of a PDF in parallel. Returns {page_no: text}.
+    Pages are cached by their rendered pixels, so the same scanned page hits
+    the cache in any PDF: workers render and hash every page first, and only
+    the misses are rendered again and OCR'd.
+    """
+    if not page_numbers:
+        return {}
+    log.info(f"🔎 OCR on {len(page_numbers)} text-poor page(s) of {os.path.basename(pdf_path)} at {dpi} dpi")
+    with _pool(len(page_numbers), workers) as ex:
+        digests = _map(ex, _pdf_page_digest, [(pdf_path, p, dpi) for p in page_numbers])
+        keys = {page_no: artifact_key(digest, dpi=dpi, lang=lang) for page_no, digest in digests}
+        texts = _cached(keys)
+        misses = [p for p in page_numbers if p not in texts]
+        _ocr_misses(ex, _ocr_pdf_page, [(pdf_path, p, dpi, lang) for p in misses], keys, texts)
+    return texts
+
+
+def ocr_images(paths: List[str], lang: str = OCR_LANG, workers: Optional[int] = None) -> Dict[str, str]:
+    """OCR image files in parallel, cached by their content hash. Returns {path: text}."""
+    if not paths:
+        return {}
+    keys = {path: artifact_key(sha256_file(path), lang=lang) for path in paths}
+    texts = _cached(keys)
+    misses = [p for p in paths if p not in texts]
+    if misses:
+        with _pool(len(misses), workers) as ex:
+            _ocr_misses(ex, _ocr_image_file, [(p, lang) for p in misses], keys, texts)
+    return texts
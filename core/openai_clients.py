@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from core.metrics import record_stage, OPENAI_RATE_WAIT
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "32"))
+OPENAI_KEEPALIVE_SEC = float(os.getenv("OPENAI_KEEPALIVE_SEC", "60"))
+OPENAI_TIMEOUT_SEC = float(os.getenv("OPENAI_TIMEOUT_SEC", "120"))
+
+# Per-API limits of the account (requests / tokens per minute; 0 = no limit).
+# Override with OPENAI_<API>_RPM / OPENAI_<API>_TPM, e.g. OPENAI_CHAT_TPM=90000.
+DEFAULT_LIMITS = {
+    "chat": (3500, 200_000),
+    "embeddings": (3000, 1_000_000),
+    "audio": (50, 0),
+}
+# Share of each bucket batch work may not touch, kept free for interactive calls
+INTERACTIVE_RESERVE = float(os.getenv("OPENAI_INTERACTIVE_RESERVE", "0.2"))
+
+INTERACTIVE, BATCH = "interactive", "batch"
+
+
+# ─── Clients ─────────────────────────────────────────────────
+@lru_cache()
+def get_http_client():
+    """One keep-alive connection pool for every OpenAI call in the process (SDK and LangChain)."""
+    import httpx
+
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                            max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                            keepalive_expiry=OPENAI_KEEPALIVE_SEC),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT_SEC, connect=10.0),
+    )
+
+
+@lru_cache()
+def get_openai_client(api_key: Optional[str] = None):
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), http_client=get_http_client())
+
+
+# ─── Rate governor ───────────────────────────────────────────
+def estimate_tokens(texts: Iterable[str]) -> int:
+    """Rough token count (~4 characters per token); only used for pacing."""
+    return sum(len(t or "") for t in texts) // 4 + 1
+
+
+class RateGovernor:
+    """
+    Request and token buckets for one OpenAI API, shared by every caller in
+    the process so ingest and chat see each other's usage.
+
+    Both buckets refill continuously at their per-minute limit. Batch callers
+    may not dip below INTERACTIVE_RESERVE of either bucket and always yield
+    to waiting interactive callers, so a large ingest slows down instead of
+    starving live chat.
+    """
+
+    def __init__(self, api: str, rpm: float, tpm: float, reserve: float = INTERACTIVE_RESERVE):
+        self.api = api
+        self.rpm = rpm
+        self.tpm = tpm
+        self.reserve = reserve
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._interactive_waiting = 0
+        self._cond = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def _wait_time(self, tokens: int, priority: str) -> float:
+        """Seconds until the call could go ahead (<= 0: now)."""
+        if priority == BATCH and self._interactive_waiting:
+            return 0.05
+        floor = self.reserve if priority == BATCH else 0.0
+        wait = 0.0
+        if self.rpm:
+            wait = max(wait, (1 + floor * self.rpm - self._requests) * 60 / self.rpm)
+        if self.tpm:
+            # A call larger than the bucket can ever hold waits for a full bucket, not forever
+            tokens = min(tokens, self.tpm * (1 - floor))
+            wait = max(wait, (tokens + floor * self.tpm - self._tokens) * 60 / self.tpm)
+        return wait
+
+    def acquire(self, tokens: int = 0, priority: str = BATCH) -> float:
+        """Block until the call fits in the buckets, take its share and return the seconds waited."""
+        start = time.perf_counter()
+        with self._cond:
+            if priority == INTERACTIVE:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    wait = self._wait_time(tokens, priority)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(min(wait, 1.0))
+                self._requests -= 1
+                self._tokens -= tokens
+            finally:
+                if priority == INTERACTIVE:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+
+        waited = time.perf_counter() - start
+        OPENAI_RATE_WAIT.observe(waited, api=self.api, priority=priority)
+        if waited > 0.001:
+            record_stage(f"rate_wait.{self.api}", waited)
+        return waited
+
+
+_governors: Dict[str, RateGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(api: str) -> RateGovernor:
+    with _governors_lock:
+        governor = _governors.get(api)
+        if governor is None:
+            rpm, tpm = DEFAULT_LIMITS[api]
+            governor = _governors[api] = RateGovernor(
+                api,
+                float(os.getenv(f"OPENAI_{api.upper()}_RPM", rpm)),
+                float(os.getenv(f"OPENAI_{api.upper()}_TPM", tpm)),
+            )
+        return governor
+
+
+def acquire(api: str, tokens: int = 0, priority: str = BATCH) -> float:
+    return get_governor(api).acquire(tokens, priority)
@@ -0,0 +1,198 @@
+import concurrent.futures as cf
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from dotenv import load_dotenv
+from langchain.schema import Document
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.artifacts import get_artifact_store, artifact_key, sha256_file
+from core.dedup import ChunkDeduplicator
+from core.document_vectorizer import DocumentProcessor
+from core.embeddings import embedding_info, shared_embeddings
+from core.segments import has_index
+from core.summarizer import summarize_text, summary_cache_key, SUMMARY_MODE
+from core.transcript_store import write_transcript
+from core.video2text import transcribe_video, transcript_cache_key
+from core.vector_collections import collection_path, DEFAULT_COLLECTION
+
+load_dotenv()
+log = logging.getLogger(__name__)
+
+# ─── Paths / Config ──────────────────────────────────────────
+BASE_DIR = Path(__file__).parent.parent.resolve()
+DATA_DIR = BASE_DIR / "data"
+VECTOR_DB_PATH = DATA_DIR / "vector_db"
+EMBED_WORKERS = 2
+
+
+class _StageTimer:
+    """Collects wall-clock seconds per stage; safe to use from several threads."""
+
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[stage] = round(self.timings.get(stage, 0.0) + seconds, 3)
+
+    def run(self, stage: str, fn: Callable, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+
+def run_pipeline(
+    video_path: str,
+    output_dir: str = str(VECTOR_DB_PATH),
+    chunk_sec: int = 600,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    batch_size: int = 16,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_chunk: Optional[Callable[[int, str, List[dict]], None]] = None,
+) -> dict:
+    """
+    Video → transcript → {summary, index} in one pass.
+
+    Each Whisper chunk is split and embedded on a background pool as soon as
+    it lands, so embeddings overlap with transcription. Once the full
+    transcript is known, summarization and index writing run concurrently.
+    Transcript, summary and embeddings are all memoized in the artifact store.
+    """
+    timer = _StageTimer()
+    total_start = time.perf_counter()
+    store = get_artifact_store()
+    processor = DocumentProcessor(embeddings=shared_embeddings())
+    source = Path(video_path).name
+
+    video_sha = timer.run("hash", sha256_file, video_path)
+    ingest_key = artifact_key(video_sha, output=str(output_dir), chunk_sec=chunk_sec,
+                              chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                              embedding=embedding_info(processor.embeddings))
+    already_indexed = (store.get_json("ingest", ingest_key) is not None
+                       and has_index(output_dir))
+
+    embed_pool = cf.ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="embed")
+    embed_futs = {}
+    # Shared by every Whisper chunk: a passage repeated in a later chunk is still dropped
+    deduplicator = ChunkDeduplicator()
+
+    def embed_piece(idx: int, text: str, segments: List[dict]):
+        metadata = {"source": source, "file_type": "transcript", "title": source, "chunk_idx": idx}
+        if segments:
+            metadata["start"], metadata["end"] = segments[0]["start"], segments[-1]["end"]
+            metadata["segments"] = segments   # lets the splitter narrow each chunk's time range
+        chunks = processor.process_documents([Document(page_content=text, metadata=metadata)],
+                                             chunk_size, chunk_overlap)
+        chunks = processor.dedup_chunks({"transcript": chunks}, deduplicator)["transcript"]
+        return processor.embed_documents(chunks, batch_size)
+
+    def handle_chunk(idx: int, text: str, segments: List[dict]) -> None:
+        if not already_indexed and text.strip():
+            embed_futs[idx] = embed_pool.submit(timer.run, "embed", embed_piece, idx, text, segments)
+        if on_chunk:
+            on_chunk(idx, text, segments)
+
+    try:
+        # ─── Stage 1: transcription, streaming chunks into the embedder ───
+        transcript_key = transcript_cache_key(video_sha, chunk_sec)
+        transcript = store.get_json("transcript", transcript_key)
+        transcript_cached = transcript is not None
+        if transcript_cached:
+            if on_start:
+                on_start(1)
+            handle_chunk(0, transcript["text"], transcript["segments"])
+        else:
+            text, segments = timer.run("transcribe", transcribe_video, video_path, chunk_sec,
+                                       on_start, handle_chunk)
+            transcript = {"text": text, "segments": segments}
+            store.put_json("transcript", transcript_key, transcript)
+
+        # ─── Stage 2: summary ‖ (finish embeddings → write index) ───
+        def build_summary():
+            def summarize():
+                # Clustered summaries reuse the passage embeddings computed for the index
+                passages = ([(t, v) for idx in sorted(embed_futs) for t, v, _ in embed_futs[idx].result()]
+                            if SUMMARY_MODE == "clustered" else None)
+                return summarize_text(transcript["text"], passages=passages)
+
+            return store.memoize("summary", summary_cache_key(transcript["text"]), summarize)
+
+        def build_index():
+            if already_indexed:
+                return store.get_json("ingest", ingest_key)["chunks"]
+            wait_start = time.perf_counter()
+            embedded = [t for idx in sorted(embed_futs) for t in embed_futs[idx].result()]
+            timer.add("embed_wait", time.perf_counter() - wait_start)
+            if not embedded:
+                return 0
+            processor.save_embeddings(embedded, str(output_dir))
+            store.put_json("ingest", ingest_key, {"chunks": len(embedded)})
+            return len(embedded)
+
+        with cf.ThreadPoolExecutor(max_workers=2) as ex:
+            summary_fut = ex.submit(timer.run, "summarize", build_summary)
+            index_fut = ex.submit(timer.run, "index", build_index)
+            summary = summary_fut.result()
+            chunks = index_fut.result()
+    finally:
+        embed_pool.shutdown(wait=False, cancel_futures=True)
+
+    timer.add("total", time.perf_counter() - total_start)
+    log.info("⏱️ Pipeline timings: %s", timer.timings)
+    return {
+        "transcript": transcript,
+        "summary": summary,
+        "chunks": chunks,
+        "vector_store_path": str(output_dir),
+        "cached": {"transcript": transcript_cached, "index": already_indexed},
+        "timings": timer.timings,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run transcription, summarization and vectorization for a video in 'data/'")
+    parser.add_argument("filename", type=str, help="Video filename inside the 'data/' folder (e.g., video.mp4)")
+    parser.add_argument("--chunk-sec", type=int, default=600, help="Transcription chunk duration in seconds")
+    parser.add_argument("--output", help="Output folder for FAISS vector store (overrides --collection)")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION, help="Named collection to index into (e.g., a course id)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Size of text chunks")
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="Overlap between chunks")
+    args = parser.parse_args()
+
+    video_path = DATA_DIR / args.filename
+    if not video_path.exists():
+        print(f"❌ File not found: {video_path}")
+        exit(1)
+
+    result = run_pipeline(
+        str(video_path),
+        output_dir=args.output or str(collection_path(args.collection)),
+        chunk_sec=args.chunk_sec,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+    )
+
+    write_transcript(DATA_DIR / "transcript.ndjson", result["transcript"]["segments"], result["transcript"]["text"])
+    with open(DATA_DIR / "summary.json", "w", encoding="utf-8") as f:
+        json.dump({"summary": result["summary"]}, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ Transcript, summary and {result['chunks']} chunks written")
+    print("⏱️ Stage timings (s):")
+    for stage, seconds in result["timings"].items():
+        print(f"  • {stage}: {seconds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+# "none" keeps the flat float32 index. "fp16" / "sq8" store 2 / 1 bytes per
+# dimension in index.faiss for the coarse search and keep the exact float32
+# vectors in a memory-mapped side file, used only to re-rank the candidates.
+QUANTIZATION_MODES = ("none", "fp16", "sq8")
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+RERANK_FACTOR = int(os.getenv("RERANK_FACTOR", "4"))    # coarse candidates per requested result
+RAW_VECTORS_FILE = "vectors.f32"
+
+
+def faiss_qtype(mode: str):
+    import faiss
+
+    return {"fp16": faiss.ScalarQuantizer.QT_fp16, "sq8": faiss.ScalarQuantizer.QT_8bit}[mode]
+
+
+def validate_mode(mode: Optional[str]) -> str:
+    mode = mode or VECTOR_QUANTIZATION
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization '{mode}' (choose from {', '.join(QUANTIZATION_MODES)})")
+    return mode
+
+
+def is_quantized(index) -> bool:
+    import faiss
+
+    return isinstance(index, faiss.IndexScalarQuantizer)
+
+
+def quantization_mode(index) -> str:
+    """The QUANTIZATION_MODES entry an index was built with."""
+    if not is_quantized(index):
+        return "none"
+    return next(mode for mode in QUANTIZATION_MODES[1:] if faiss_qtype(mode) == index.sq.qtype)
+
+
+# ─── Raw float32 side file ───────────────────────────────────
+def write_raw_vectors(index_dir, vectors) -> None:
+    """Atomically replace the raw vectors file with `vectors` (n × d float32, row-major)."""
+    import numpy as np
+
+    index_dir = Path(index_dir)
+    fd, tmp = tempfile.mkstemp(prefix=".vectors_", dir=index_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        os.replace(tmp, index_dir / RAW_VECTORS_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def open_raw_vectors(index_dir, ntotal: int, dim: int):
+    """Memory-map the exact vectors of a quantized index; None if missing or short."""
+    import numpy as np
+
+    path = Path(index_dir) / RAW_VECTORS_FILE
+    if not path.exists() or path.stat().st_size < ntotal * dim * 4:
+        log.warning(f"⚠️ {path} missing or incomplete; searching without exact re-ranking")
+        return None
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(ntotal, dim))
+
+
+# ─── Build ───────────────────────────────────────────────────
+def quantize_store(db, index_dir, mode: str) -> None:
+    """
+    Swap the flat index of a LangChain FAISS store for a scalar-quantized one
+    (ids are positional, so the docstore mapping stays valid) and write the
+    exact vectors next to it. The caller saves the store afterwards.
+    """
+    import faiss
+
+    flat = db.index
+    vectors = flat.reconstruct_n(0, flat.ntotal)
+    write_raw_vectors(index_dir, vectors)
+
+    sq = faiss.IndexScalarQuantizer(flat.d, faiss_qtype(mode), flat.metric_type)
+    sq.train(vectors)
+    sq.add(vectors)
+    db.index = sq
+    log.info(f"🗜️ Quantized {flat.ntotal} vectors to {mode} "
+             f"({flat.ntotal * flat.d * 4 / 2**20:.1f} → {sq.code_size * flat.ntotal / 2**20:.1f} MiB in RAM)")
+
+
+# ─── Search ──────────────────────────────────────────────────
+def rerank(query, candidates: List[int], raw, metric_type: int, k: int):
+    """
+    Exact scores for the coarse `candidates` from the raw vectors, best first.
+    Returns (ids, scores) in FAISS conventions: squared L2 (lower is better)
+    or inner product (higher is better).
+    """
+    import faiss
+    import numpy as np
+
+    ids = np.asarray([i for i in candidates if i >= 0], dtype=np.int64)
+    if ids.size == 0:
+        return ids, np.empty(0, dtype=np.float32)
+    order = np.argsort(ids)                          # sorted reads are kinder to the page cache
+    vecs = np.asarray(raw[ids[order]])
+    q = np.asarray(query, dtype=np.float32).reshape(-1)
+
+    if metric_type == faiss.METRIC_INNER_PRODUCT:
+        scores = vecs @ q
+        best = np.argsort(-scores)[:k]
+    else:
+        diff = vecs - q
+        scores = np.einsum("ij,ij->i", diff, diff)
+        best = np.argsort(scores)[:k]
+    return ids[order][best], scores[best]
@@ -0,0 +1,158 @@
+import concurrent.futures as cf
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from core.metrics import ADAPTIVE_LIMIT
+
+log = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit tuned by AIMD, like TCP congestion control.
+
+    Each completed call reports its latency (normalized by a per-call weight,
+    e.g. seconds of audio) or that it was throttled:
+      • throttled (429)                → limit halves
+      • latency > tolerance × baseline → limit drops by one (something is queueing)
+      • otherwise, with the limit used → limit grows by 1/limit (≈ +1 per round)
+    The baseline is the fastest normalized latency seen, drifting up by 2% per
+    slower call so one lucky outlier doesn't pin the limit down for good.
+    """
+
+    def __init__(self, name: str, initial: int, minimum: int = 1, maximum: int = 16, tolerance: float = 2.0):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.tolerance = tolerance
+        self._limit = float(min(max(initial, minimum), self.maximum))
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._cond = threading.Condition()
+        ADAPTIVE_LIMIT.set(self.limit, name=name)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False) -> None:
+        with self._cond:
+            saturated = self._in_flight >= self.limit
+            self._in_flight -= 1
+            if throttled:
+                self._limit = max(self.minimum, self._limit / 2)
+            elif latency is not None:
+                self._baseline = latency if self._baseline is None else min(latency, self._baseline * 1.02)
+                if latency > self.tolerance * self._baseline:
+                    self._limit = max(self.minimum, self._limit - 1)
+                elif saturated:
+                    self._limit = min(self.maximum, self._limit + 1 / self._limit)
+            ADAPTIVE_LIMIT.set(self.limit, name=self.name)
+            self._cond.notify_all()
+
+
+def ordered(results: Iterable[Tuple[int, Any]], start: int = 0) -> Iterator[Tuple[int, Any]]:
+    """Re-emit (idx, value) pairs that arrive in any order as a contiguous idx sequence."""
+    pending: Dict[int, Any] = {}
+    next_idx = start
+    for idx, value in results:
+        pending[idx] = value
+        while next_idx in pending:
+            yield next_idx, pending.pop(next_idx)
+            next_idx += 1
+
+
+def run_two_stage(
+    items: Iterable[Any],
+    cpu_stage: Callable[[Any], Any],
+    io_stage: Callable[[Any], Any],
+    cpu_workers: int,
+    io_limit: AdaptiveConcurrency,
+    is_throttle: Callable[[BaseException], bool] = lambda exc: False,
+    weight: Callable[[Any], float] = lambda item: 1.0,
+    max_retries: int = 5,
+    max_buffered: Optional[int] = None,
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Run cpu_stage then io_stage on every item and yield (idx, io result) in
+    item order, each as soon as it and everything before it is done.
+
+    The stages have separate pools: `cpu_workers` threads for the CPU stage
+    (meant for work done by subprocesses such as ffmpeg, so threads suffice)
+    and up to `io_limit.maximum` threads for the I/O stage, of which only
+    `io_limit.limit` run at once. At most `max_buffered` CPU outputs wait for
+    the I/O stage, so a slow link doesn't let the CPU stage run far ahead.
+    Throttled I/O calls shrink the limit and are retried with jittered
+    backoff; any other error (or the consumer stopping) cancels the rest.
+    """
+    items = list(items)
+    buffered = threading.BoundedSemaphore(max_buffered or (cpu_workers + io_limit.maximum))
+    done: "queue.Queue[Tuple[int, Any, Optional[BaseException]]]" = queue.Queue()
+    stop = threading.Event()
+
+    cpu_pool = cf.ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="cpu-stage")
+    io_pool = cf.ThreadPoolExecutor(max_workers=io_limit.maximum, thread_name_prefix="io-stage")
+
+    def io_task(idx: int, prepared: Any) -> None:
+        try:
+            for attempt in range(max_retries + 1):
+                io_limit.acquire()
+                start = time.perf_counter()
+                try:
+                    result = io_stage(prepared)
+                except BaseException as exc:
+                    throttled = is_throttle(exc)
+                    io_limit.release(throttled=throttled)
+                    if not throttled or attempt == max_retries or stop.is_set():
+                        raise
+                    delay = min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                    log.warning(f"⏳ {io_limit.name} throttled (limit now {io_limit.limit}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                io_limit.release(latency=(time.perf_counter() - start) / max(weight(items[idx]), 1e-9))
+                done.put((idx, result, None))
+                return
+        except BaseException as exc:
+            done.put((idx, None, exc))
+        finally:
+            buffered.release()
+
+    def cpu_task(idx: int) -> None:
+        # Polls so that waiting tasks notice a cancelled run
+        while not buffered.acquire(timeout=0.5):
+            if stop.is_set():
+                return
+        try:
+            if stop.is_set():
+                raise cf.CancelledError()
+            prepared = cpu_stage(items[idx])
+            io_pool.submit(io_task, idx, prepared)
+        except BaseException as exc:
+            buffered.release()
+            done.put((idx, None, exc))
+
+    def completions() -> Iterator[Tuple[int, Any]]:
+        for _ in range(len(items)):
+            idx, result, exc = done.get()
+            if exc is not None:
+                raise exc
+            yield idx, result
+
+    try:
+        for idx in range(len(items)):
+            cpu_pool.submit(cpu_task, idx)
+        yield from ordered(completions())
+    finally:
+        stop.set()
+        cpu_pool.shutdown(wait=False, cancel_futures=True)
+        io_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,422 @@
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.metrics import timed, INDEX_SEGMENTS
+from core.quantization import RAW_VECTORS_FILE
+
+log = logging.getLogger(__name__)
+
+# ─── Layout / Config ─────────────────────────────────────────
+# A store directory holds a manifest listing its live segments, each an
+# immutable LangChain FAISS store under segments/. Ingest only ever adds a
+# segment; the compactor merges them in the background. A store written
+# before segments existed (index.faiss at the root) is the segment ".".
+MANIFEST_FILE = "manifest.json"
+RETIRED_FILE = "retired.json"     # segments compacted away, deleted once RETIRE_GRACE_SEC has passed
+SEGMENTS_DIR = "segments"
+LEGACY_SEGMENT = "."
+LEGACY_FILES = ("index.faiss", "index.pkl", RAW_VECTORS_FILE)
+
+COMPACT_MIN_SEGMENTS = int(os.getenv("COMPACT_MIN_SEGMENTS", "4"))
+COMPACT_INTERVAL_SEC = float(os.getenv("COMPACT_INTERVAL_SEC", "60"))
+ORPHAN_MAX_AGE_SEC = 3600       # segment dirs never added to a manifest (crashed writes)
+# How long compacted-away segments stay on disk for loads that read the old manifest
+RETIRE_GRACE_SEC = float(os.getenv("SEGMENT_RETIRE_GRACE_SEC", "300"))
+
+Embedded = List[Tuple[str, List[float], dict]]
+
+_store_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_store_locks_guard = threading.Lock()
+_compaction_wanted = threading.Event()
+
+
+def _store_lock(store_dir: Path, purpose: str = "manifest") -> threading.Lock:
+    """Per-store lock: "manifest" serializes manifest updates, "compact" compactions."""
+    with _store_locks_guard:
+        return _store_locks.setdefault((str(Path(store_dir).resolve()), purpose), threading.Lock())
+
+
+# ─── Manifest ────────────────────────────────────────────────
+def read_manifest(store_dir) -> List[str]:
+    """Live segment names of a store, oldest first; [] if it has no index yet."""
+    store_dir = Path(store_dir)
+    try:
+        with open(store_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)["segments"]
+    except FileNotFoundError:
+        return [LEGACY_SEGMENT] if (store_dir / "index.faiss").exists() else []
+
+
+def _write_manifest(store_dir: Path, segments: List[str]) -> None:
+    tmp = store_dir / f".{MANIFEST_FILE}.{uuid.uuid4().hex[:8]}"
+    tmp.write_text(json.dumps({"segments": segments, "updated_at": time.time()}, indent=2), encoding="utf-8")
+    os.replace(tmp, store_dir / MANIFEST_FILE)
+    INDEX_SEGMENTS.set(len(segments), store=store_dir.name)
+
+
+def segment_path(store_dir, name: str) -> Path:
+    return Path(store_dir) if name == LEGACY_SEGMENT else Path(store_dir) / name
+
+
+def live_segments(store_dir) -> List[Path]:
+    return [segment_path(store_dir, name) for name in read_manifest(store_dir)]
+
+
+def has_index(store_dir) -> bool:
+    return bool(read_manifest(store_dir))
+
+
+def store_version(store_dir) -> Optional[int]:
+    """Changes whenever the set of live segments does; None if the store has no index."""
+    store_dir = Path(store_dir)
+    for path in (store_dir / MANIFEST_FILE, store_dir / "index.faiss"):
+        if path.exists():
+            return path.stat().st_mtime_ns
+    return None
+
+
+def store_footprint(store_dir) -> int:
+    """On-disk size of the live segments; a close estimate of their resident size once loaded."""
+    # Raw re-ranking vectors are memory-mapped, not loaded, so they don't count
+    return sum(f.stat().st_size for seg in live_segments(store_dir) for f in seg.iterdir()
+               if f.is_file() and f.name in LEGACY_FILES and f.name != RAW_VECTORS_FILE)
+
+
+# ─── Segment build ───────────────────────────────────────────
+def _placeholder_embeddings():
+    """Segments are loaded for compaction only, never queried: no model needed."""
+    from langchain_core.embeddings import Embeddings
+
+    class _NoEmbeddings(Embeddings):
+        def embed_documents(self, texts):
+            raise RuntimeError("Compaction never embeds")
+
+        def embed_query(self, text):
+            raise RuntimeError("Compaction never embeds")
+
+    return _NoEmbeddings()
+
+
+def _build_segment(store_dir: Path, embedded, embeddings, quantization: str) -> str:
+    """Write `embedded` as a new segment dir (not yet live) and return its manifest name."""
+    from langchain_community.vectorstores.faiss import FAISS
+    from core.quantization import quantize_store
+
+    (store_dir / SEGMENTS_DIR).mkdir(parents=True, exist_ok=True)
+    # Built under a dot name and renamed: a segment dir is either complete or absent
+    tmp = store_dir / SEGMENTS_DIR / f".tmp-{uuid.uuid4().hex}"
+    tmp.mkdir()
+    try:
+        db = FAISS.from_embeddings(text_embeddings=[(t, v) for t, v, _ in embedded],
+                                   embedding=embeddings, metadatas=[m for _, _, m in embedded])
+        if quantization != "none":
+            quantize_store(db, tmp, quantization)
+        db.save_local(str(tmp))
+        name = f"{SEGMENTS_DIR}/seg-{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        os.rename(tmp, store_dir / name)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return name
+
+
+def write_segment(store_dir, embedded: Embedded, embeddings, quantization: str = "none") -> str:
+    """Add `embedded` to the store as one new segment. Existing segments are never touched."""
+    from core.embeddings import check_index_embedding, write_index_embedding
+
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    if has_index(store_dir):
+        # Vectors from another model would silently corrupt search results
+        check_index_embedding(store_dir, embeddings)
+
+    with timed("segment_write"):
+        name = _build_segment(store_dir, embedded, embeddings, quantization)
+
+    with _store_lock(store_dir):
+        segments = read_manifest(store_dir)
+        if not segments:
+            write_index_embedding(store_dir, embeddings, len(embedded[0][1]))
+        segments.append(name)
+        _write_manifest(store_dir, segments)
+    log.info(f"🧱 Segment {name} added to {store_dir} ({len(embedded)} vectors, {len(segments)} live segments)")
+    if len(segments) >= COMPACT_MIN_SEGMENTS:
+        _compaction_wanted.set()
+    return name
+
+
+# ─── Single writer ───────────────────────────────────────────
+class SegmentWriter:
+    """
+    The one thread that writes segments. Appends queue up here, so concurrent
+    uploads never race on a store's files, and appends that arrive while a
+    segment is being written are coalesced into the next one (one segment per
+    store, embedding model and quantization mode).
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="segment-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, store_dir, embedded: Embedded, embeddings, quantization: str = "none") -> "Future[int]":
+        """Queue `embedded` for `store_dir`; the future resolves to the number of vectors written."""
+        future: "Future[int]" = Future()
+        if not embedded:
+            future.set_result(0)
+            return future
+        self._queue.put((Path(store_dir).resolve(), embedded, embeddings, quantization, future))
+        return future
+
+    def _loop(self) -> None:
+        from core.embeddings import embedding_info
+
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            groups: "OrderedDict[tuple, list]" = OrderedDict()
+            for item in batch:
+                store_dir, _, embeddings, quantization, _ = item
+                info = embedding_info(embeddings)
+                groups.setdefault((store_dir, info["backend"], info["model"], quantization), []).append(item)
+            for items in groups.values():
+                self._write(items)
+
+    @staticmethod
+    def _write(items: list) -> None:
+        store_dir, _, embeddings, quantization, _ = items[0]
+        try:
+            if len(items) > 1:
+                log.info(f"🧱 Coalescing {len(items)} appends to {store_dir} into one segment")
+            write_segment(store_dir, [row for item in items for row in item[1]], embeddings, quantization)
+        except BaseException as exc:
+            for *_, future in items:
+                future.set_exception(exc)
+        else:
+            for _, embedded, _, _, future in items:
+                future.set_result(len(embedded))
+
+
+_writer: Optional[SegmentWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_segment_writer() -> SegmentWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SegmentWriter()
+        return _writer
+
+
+# ─── Compaction ──────────────────────────────────────────────
+def _read_segment(path: Path):
+    """(text, vector, metadata) triples of a segment plus its quantization mode."""
+    from langchain_community.vectorstores.faiss import FAISS
+    from core.quantization import is_quantized, open_raw_vectors, quantization_mode
+
+    db = FAISS.load_local(str(path), _placeholder_embeddings(), allow_dangerous_deserialization=True)
+    index = db.index
+    vectors = open_raw_vectors(path, index.ntotal, index.d) if is_quantized(index) else None
+    if vectors is None:
+        vectors = index.reconstruct_n(0, index.ntotal)
+    docs = (db.docstore.search(db.index_to_docstore_id[i]) for i in range(index.ntotal))
+    rows = [(doc.page_content, vectors[i], doc.metadata) for i, doc in enumerate(docs)]
+    return rows, quantization_mode(index)
+
+
+def _remove_segment(store_dir: Path, name: str) -> None:
+    if name == LEGACY_SEGMENT:
+        for filename in LEGACY_FILES:
+            (store_dir / filename).unlink(missing_ok=True)
+    else:
+        shutil.rmtree(store_dir / name, ignore_errors=True)
+
+
+def _read_retired(store_dir: Path) -> Dict[str, float]:
+    try:
+        with open(store_dir / RETIRED_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_retired(store_dir: Path, retired: Dict[str, float]) -> None:
+    tmp = store_dir / f".{RETIRED_FILE}.{uuid.uuid4().hex[:8]}"
+    tmp.write_text(json.dumps(retired, indent=2), encoding="utf-8")
+    os.replace(tmp, store_dir / RETIRED_FILE)
+
+
+def _purge_retired(store_dir: Path, grace_sec: float = RETIRE_GRACE_SEC) -> None:
+    """Delete retired segments older than `grace_sec`; newer ones stay for in-flight loads."""
+    retired = _read_retired(store_dir)
+    cutoff = time.time() - grace_sec
+    expired = [name for name, retired_at in retired.items() if retired_at < cutoff]
+    if not expired:
+        return
+    live = set(read_manifest(store_dir))
+    for name in expired:
+        if name not in live:
+            _remove_segment(store_dir, name)
+        del retired[name]
+    _write_retired(store_dir, retired)
+
+
+def _remove_orphans(store_dir: Path, live: Iterable[str]) -> None:
+    root = store_dir / SEGMENTS_DIR
+    if not root.exists():
+        return
+    live = set(live)
+    cutoff = time.time() - ORPHAN_MAX_AGE_SEC
+    for path in root.iterdir():
+        if f"{SEGMENTS_DIR}/{path.name}" not in live and path.stat().st_mtime < cutoff:
+            log.info(f"🧹 Removing orphaned segment dir {path}")
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def compact(store_dir, min_segments: int = 2) -> bool:
+    """
+    Merge the store's live segments into one. The merged segment is built
+    without holding the manifest lock, so appends go on meanwhile; the swap
+    then replaces only the segments that were merged and keeps any added since.
+    The merged-away segments are retired, not deleted: a load that read the
+    old manifest can still open them for RETIRE_GRACE_SEC, after which a
+    later run removes them.
+    """
+    store_dir = Path(store_dir)
+    with _store_lock(store_dir, "compact"):
+        compacted = _compact(store_dir, min_segments)
+        _purge_retired(store_dir)
+        return compacted
+
+
+def _compact(store_dir: Path, min_segments: int) -> bool:
+    snapshot = read_manifest(store_dir)
+    if len(snapshot) < min_segments:
+        return False
+
+    start = time.perf_counter()
+    # Segments are only merged with others of the same quantization mode, so none gets re-encoded
+    by_mode: "OrderedDict[str, Tuple[List[str], list]]" = OrderedDict()
+    for name in snapshot:
+        segment_rows, mode = _read_segment(segment_path(store_dir, name))
+        names, rows = by_mode.setdefault(mode, ([], []))
+        names.append(name)
+        rows.extend(segment_rows)
+    groups = {mode: group for mode, group in by_mode.items() if len(group[0]) > 1}
+    if not groups:
+        return False
+
+    # Stored vectors are reused as-is, so the placeholder model is never called
+    replaced = {}
+    for mode, (names, rows) in groups.items():
+        merged = _build_segment(store_dir, rows, _placeholder_embeddings(), mode)
+        replaced.update({name: merged for name in names})
+
+    with _store_lock(store_dir):
+        current = read_manifest(store_dir)
+        # A merged segment takes the place of the first one it replaces; segments added since stay
+        segments = list(OrderedDict.fromkeys(replaced.get(name, name) for name in current))
+        _write_manifest(store_dir, segments)
+
+    retired = _read_retired(store_dir)
+    retired.update({name: time.time() for name in replaced})
+    _write_retired(store_dir, retired)
+    _remove_orphans(store_dir, segments + list(retired))
+    log.info(f"🗜️ Compacted {len(replaced)} segments of {store_dir} into {len(groups)} "
+             f"({', '.join(groups)}; {sum(len(rows) for _, rows in groups.values())} vectors, "
+             f"{time.perf_counter() - start:.1f}s)")
+    return True
+
+
+# ─── Export ──────────────────────────────────────────────────
+def export_index(store_dir, dest: Path) -> Path:
+    """
+    Write one index.faiss holding every live segment (manifest order) to
+    `dest`, leaving the store itself untouched. Segments of the same kind
+    are concatenated as stored; a mix of quantization modes is exported as
+    a flat index of the exact vectors.
+    """
+    import faiss
+    import numpy as np
+    from core.quantization import is_quantized, open_raw_vectors, quantization_mode
+
+    segments = live_segments(store_dir)
+    if not segments:
+        raise FileNotFoundError(f"{store_dir} has no index")
+    indexes = [faiss.read_index(str(seg / "index.faiss")) for seg in segments]
+    if len({quantization_mode(index) for index in indexes}) == 1:
+        merged = indexes[0]
+        for index in indexes[1:]:
+            merged.merge_from(index)
+    else:
+        merged = faiss.IndexFlat(indexes[0].d, indexes[0].metric_type)
+        for seg, index in zip(segments, indexes):
+            raw = open_raw_vectors(seg, index.ntotal, index.d) if is_quantized(index) else None
+            merged.add(np.asarray(raw) if raw is not None else index.reconstruct_n(0, index.ntotal))
+    path = Path(dest) / "index.faiss"
+    faiss.write_index(merged, str(path))
+    return path
+
+
+class Compactor:
+    """
+    Background thread that compacts stores with at least COMPACT_MIN_SEGMENTS
+    live segments, every COMPACT_INTERVAL_SEC or as soon as a write crosses
+    the threshold. `list_stores` returns the store dirs to look at.
+    """
+
+    def __init__(self, list_stores: Callable[[], List[Path]], interval: float = COMPACT_INTERVAL_SEC,
+                 min_segments: int = COMPACT_MIN_SEGMENTS):
+        self.list_stores = list_stores
+        self.interval = interval
+        self.min_segments = min_segments
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="compactor", daemon=True)
+
+    def start(self) -> "Compactor":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        _compaction_wanted.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            _compaction_wanted.wait(self.interval)
+            _compaction_wanted.clear()
+            if self._stop.is_set():
+                return
+            for store_dir in self.list_stores():
+                try:
+                    with timed("compaction"):
+                        compact(store_dir, self.min_segments)
+                except Exception:
+                    log.exception(f"Compaction of {store_dir} failed")
+
+
+_compactor: Optional[Compactor] = None
+
+
+def start_compactor(list_stores: Callable[[], List[Path]]) -> Compactor:
+    global _compactor
+    with _writer_lock:
+        if _compactor is None:
+            _compactor = Compactor(list_stores).start()
+        return _compactor
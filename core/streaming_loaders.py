@@ -0,0 +1,155 @@
+import csv
+import logging
+import os
+import zipfile
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+from xml.etree.ElementTree import iterparse
+
+from langchain.schema import Document
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+# Rows / paragraphs are grouped into documents, and documents into batches, so
+# a 500k-row export never exists in memory at once: only one batch does.
+ROWS_PER_DOC = int(os.getenv("ROWS_PER_DOC", "50"))
+DOC_CHARS = int(os.getenv("DOC_CHARS", "4000"))                # docx: paragraph text per document
+DOCS_PER_BATCH = int(os.getenv("STREAM_DOCS_PER_BATCH", "64"))
+STREAMED_FILE_TYPES = ("spreadsheet", "document")
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+# ─── Row / paragraph readers ─────────────────────────────────
+def iter_csv_rows(path: str) -> Iterator[Tuple[str, int, Sequence[str]]]:
+    """Yield (sheet, row_number, values); row 1 is the header. The sheet name is the file stem."""
+    sheet = os.path.splitext(os.path.basename(path))[0]
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        for n, row in enumerate(csv.reader(f, dialect), start=1):
+            yield sheet, n, row
+
+
+def iter_xlsx_rows(path: str) -> Iterator[Tuple[str, int, Sequence[str]]]:
+    """Yield (sheet, row_number, values) for every sheet, in openpyxl's streaming read-only mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        log.error("Missing dependency for .xlsx files. Install with: pip install openpyxl")
+        return
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            for n, row in enumerate(ws.iter_rows(values_only=True), start=1):
+                yield ws.title, n, ["" if v is None else str(v) for v in row]
+    finally:
+        wb.close()
+
+
+def iter_docx_paragraphs(path: str) -> Iterator[str]:
+    """Yield paragraph text from word/document.xml with iterparse (tables included), never building the full tree."""
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as xml:
+        stack = []
+        for event, elem in iterparse(xml, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            text = ""
+            if elem.tag == W_NS + "p":
+                text = "".join(t.text for t in elem.iter(W_NS + "t") if t.text).strip()
+            # Detach finished paragraphs and body-level blocks (tables…): the tree never grows past one block
+            if stack and (elem.tag == W_NS + "p" or stack[-1].tag == W_NS + "body"):
+                stack[-1].remove(elem)
+                elem.clear()
+            if text:
+                yield text
+
+
+# ─── Documents ───────────────────────────────────────────────
+def _format_row(header: Sequence[str], row: Sequence[str]) -> str:
+    cells = [(h or f"col{i + 1}", v) for i, (h, v) in enumerate(zip(list(header) + [""] * len(row), row))]
+    return " | ".join(f"{h}: {v}" for h, v in cells if str(v).strip())
+
+
+def iter_spreadsheet_documents(path: str) -> Iterator[Document]:
+    """Group rows into documents of ROWS_PER_DOC rows, each row labelled with its column headers."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        rows = iter_csv_rows(path)
+    elif extension == ".xlsx":
+        rows = iter_xlsx_rows(path)
+    else:
+        log.warning(f"Unsupported spreadsheet format {extension} (convert to .xlsx or .csv): {path}")
+        return
+
+    header: List[str] = []
+    sheet, lines, first_row = None, [], 0
+
+    def flush():
+        return Document(
+            page_content="\n".join(lines),
+            metadata={
+                "source": path,
+                "file_type": "spreadsheet",
+                "title": os.path.basename(path),
+                "sheet": sheet,
+                "rows": f"{first_row}-{first_row + len(lines) - 1}",
+            },
+        )
+
+    for row_sheet, n, row in rows:
+        if row_sheet != sheet or n == 1:
+            if lines:
+                yield flush()
+            sheet, lines, header = row_sheet, [], [str(h).strip() for h in row]
+            continue
+        line = _format_row(header, row)
+        if not line:
+            continue
+        if not lines:
+            first_row = n
+        lines.append(line)
+        if len(lines) >= ROWS_PER_DOC:
+            yield flush()
+            lines = []
+    if lines:
+        yield flush()
+
+
+def iter_docx_documents(path: str) -> Iterator[Document]:
+    """Group consecutive paragraphs into documents of about DOC_CHARS characters."""
+    if os.path.splitext(path)[1].lower() != ".docx":
+        log.warning(f"Unsupported document format (convert to .docx): {path}")
+        return
+
+    parts, size, part_no = [], 0, 0
+    for paragraph in iter_docx_paragraphs(path):
+        parts.append(paragraph)
+        size += len(paragraph)
+        if size >= DOC_CHARS:
+            yield Document(page_content="\n\n".join(parts),
+                           metadata={"source": path, "file_type": "document",
+                                     "title": os.path.basename(path), "part": part_no})
+            parts, size, part_no = [], 0, part_no + 1
+    if parts:
+        yield Document(page_content="\n\n".join(parts),
+                       metadata={"source": path, "file_type": "document",
+                                 "title": os.path.basename(path), "part": part_no})
+
+
+def iter_document_batches(path: str, file_type: str, docs_per_batch: Optional[int] = None) -> Iterator[List[Document]]:
+    """Yield lists of at most `docs_per_batch` documents for a spreadsheet or Word file."""
+    docs = iter_spreadsheet_documents(path) if file_type == "spreadsheet" else iter_docx_documents(path)
+    while True:
+        batch = list(islice(docs, docs_per_batch or DOCS_PER_BATCH))
+        if not batch:
+            return
+        yield batch
@@ -1,129 +1,223 @@
-import os, json, logging
-from textwrap import wrap
-import backoff
-from openai import OpenAI
-from dotenv import load_dotenv
-from pathlib import Path
-
-load_dotenv()
-log = logging.getLogger(__name__)
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# ─── Constants ───────────────────────────────────────────────
-MAX_CHARS = 12_000   # chunk size
-
-CHUNK_SUMMARY_PROMPT = """You are an expert summarizer.
-Below is a part of a transcript of a masterclass. Summarize the key information in this chunk, focusing on:
-1. Main concepts discussed
-2. Any examples or demonstrations given
-3. Practical takeaways or insights
-
-Be concise but comprehensive. This is an intermediate summary that will later be consolidated.
-
-Transcript:
-"""
-
-FINAL_SUMMARY_PROMPT = """You are an expert educational content curator.
-Create a concise, well-structured summary of a masterclass with exactly these three sections:
-
-1. SHORT DESCRIPTION (1 paragraph, ~3-5 sentences) - A concise overview of what the masterclass covers and its main focus
-2. KEY EXAMPLES (4-6 bullet points) - The most insightful or illustrative examples demonstrated during the workshop
-3. CONCLUSION (1 paragraph, ~3-4 sentences) - The core message and primary takeaways from the masterclass
-
-Format your response as a clean JSON:
-{
-  "short_description": "...",
-  "key_examples": ["...", "..."],
-  "conclusion": "..."
-}
-
-Each section should be concise and focused. The entire summary should be comprehensive yet brief.
-
-Here are the individual chunk summaries to consolidate:
-"""
-
-# ─── Helpers ─────────────────────────────────────────────────
-def _chunk_text(text: str, max_chars: int = MAX_CHARS):
-    return wrap(text, max_chars, break_long_words=False, replace_whitespace=False)
-
-
-@backoff.on_exception(backoff.expo, Exception, max_tries=3)
-def _summarize_chunk(chunk: str, idx: int) -> str:
-    log.info("🔹 Summarizing chunk %d", idx + 1)
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that summarizes transcripts."},
-            {"role": "user", "content": CHUNK_SUMMARY_PROMPT + chunk},
-        ],
-        temperature=0.3,
-    )
-    return res.choices[0].message.content.strip()
-
-
-@backoff.on_exception(backoff.expo, Exception, max_tries=3)
-def _consolidate(chunks: list[str]) -> dict:
-    joined = "\n\n".join(chunks)
-    prompt = FINAL_SUMMARY_PROMPT + joined
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are an expert educational content curator."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.3,
-    )
-    content = res.choices[0].message.content.strip()
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        log.warning("Could not parse JSON; returning raw content")
-        return {
-            "short_description": "",
-            "key_examples": [],
-            "conclusion": "",
-            "raw_content": content,
-        }
-
-
-# ─── Public API ──────────────────────────────────────────────
-def summarize_text(text: str) -> dict:
-    """Return the 3-section summary as a dict."""
-    chunks = _chunk_text(text)
-    chunk_summaries = [_summarize_chunk(chunk, i) for i, chunk in enumerate(chunks)]
-    return _consolidate(chunk_summaries)
-
-def main():
-    import argparse
-
-    parser = argparse.ArgumentParser(description="Summarize the transcript.json inside the 'data/' folder.")
-    parser.add_argument("--output", type=str, help="Optional path to save summary (default: data/summary.json)")
-    args = parser.parse_args()
-
-    data_dir = Path(__file__).parent.parent / "data"
-    transcript_path = data_dir / "transcript.json"
-
-    if not transcript_path.exists():
-        print(f"❌ File not found: {transcript_path}")
-        exit(1)
-
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    if "text" not in data or not data["text"].strip():
-        print("❌ 'text' field missing or empty in transcript.json")
-        exit(1)
-
-    print("🔁 Summarizing transcript...")
-    summary = summarize_text(data["text"])
-
-    output_path = Path(args.output) if args.output else data_dir / "summary.json"
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
-
-    print(f"✅ Summary saved to {output_path.resolve()}")
-
-
-if __name__ == "__main__":
+import json, logging, os
+from textwrap import wrap
+import backoff
+from dotenv import load_dotenv
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.artifacts import artifact_key, sha256_text
+from core.metrics import timed, LLM_TOKENS
+from core.openai_clients import get_openai_client, acquire, estimate_tokens, BATCH
+from core.transcript_store import read_transcript
+
+load_dotenv()
+log = logging.getLogger(__name__)
+
+# ─── Constants ───────────────────────────────────────────────
+MAX_CHARS = 12_000   # chunk size
+MODEL = "gpt-4o-mini"
+MAX_OUTPUT_TOKENS = 1024   # rate-governor estimate of a reply's length
+
+# "full" summarizes every chunk; "clustered" embeds the transcript's passages,
+# clusters them and only summarizes representative ones, in at most
+# SUMMARY_MAX_CALLS map calls however long the transcript is.
+SUMMARY_MODES = ("full", "clustered")
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "full")
+SUMMARY_MAX_CALLS = int(os.getenv("SUMMARY_MAX_CALLS", "6"))
+SUMMARY_PER_CLUSTER = int(os.getenv("SUMMARY_PER_CLUSTER", "1"))
+# Same split as /vectorize, whose per-chunk embedding cache passages are looked
+# up in: a transcript indexed before is clustered without any embedding call
+PASSAGE_CHARS = 1000
+PASSAGE_OVERLAP = 200
+
+CHUNK_SUMMARY_PROMPT = """You are an expert summarizer.
+Below is a part of a transcript of a masterclass. Summarize the key information in this chunk, focusing on:
+1. Main concepts discussed
+2. Any examples or demonstrations given
+3. Practical takeaways or insights
+
+Be concise but comprehensive. This is an intermediate summary that will later be consolidated.
+
+Transcript:
+"""
+
+FINAL_SUMMARY_PROMPT = """You are an expert educational content curator.
+Create a concise, well-structured summary of a masterclass with exactly these three sections:
+
+1. SHORT DESCRIPTION (1 paragraph, ~3-5 sentences) - A concise overview of what the masterclass covers and its main focus
+2. KEY EXAMPLES (4-6 bullet points) - The most insightful or illustrative examples demonstrated during the workshop
+3. CONCLUSION (1 paragraph, ~3-4 sentences) - The core message and primary takeaways from the masterclass
+
+Format your response as a clean JSON:
+{
+  "short_description": "...",
+  "key_examples": ["...", "..."],
+  "conclusion": "..."
+}
+
+Each section should be concise and focused. The entire summary should be comprehensive yet brief.
+
+Here are the individual chunk summaries to consolidate:
+"""
+
+# ─── Helpers ─────────────────────────────────────────────────
+def _complete(messages: list) -> str:
+    # Summaries are batch work: they yield to interactive chat on the shared rate limits
+    acquire("chat", estimate_tokens(m["content"] for m in messages) + MAX_OUTPUT_TOKENS, BATCH)
+    with timed("llm.summarize"):
+        res = get_openai_client().chat.completions.create(model=MODEL, messages=messages, temperature=0.3)
+    if res.usage:
+        LLM_TOKENS.inc(res.usage.prompt_tokens, caller="summarize", type="prompt")
+        LLM_TOKENS.inc(res.usage.completion_tokens, caller="summarize", type="completion")
+    return res.choices[0].message.content.strip()
+
+
+def _chunk_text(text: str, max_chars: int = MAX_CHARS):
+    return wrap(text, max_chars, break_long_words=False, replace_whitespace=False)
+
+
+def _embed_passages(text: str, embeddings=None) -> List[Tuple[str, List[float]]]:
+    """(passage, vector) for the transcript, split, deduplicated and embedded exactly as the vectorizer does it."""
+    from langchain.schema import Document
+    from core.document_vectorizer import DocumentProcessor
+    from core.embeddings import shared_embeddings
+
+    processor = DocumentProcessor(embeddings=embeddings or shared_embeddings())
+    chunks = processor.process_documents([Document(page_content=text, metadata={"file_type": "transcript"})],
+                                         PASSAGE_CHARS, PASSAGE_OVERLAP)
+    chunks = processor.dedup_chunks({"transcript": chunks})["transcript"]
+    return [(passage, vector) for passage, vector, _ in processor.embed_documents(chunks)]
+
+
+def _clustered_chunks(
+    text: str,
+    passages: Optional[Sequence[Tuple[str, Sequence[float]]]] = None,
+    max_calls: int = SUMMARY_MAX_CALLS,
+    per_cluster: int = SUMMARY_PER_CLUSTER,
+) -> List[str]:
+    """Map-phase inputs made of representative passages only (at most `max_calls` of them)."""
+    from core.extractive import pack_passages, select_passages
+
+    with timed("summarize.select"):
+        passages = list(passages) if passages else _embed_passages(text)
+        if not passages:
+            return _chunk_text(text)
+        texts = [p for p, _ in passages]
+        selected = select_passages(texts, [v for _, v in passages], MAX_CHARS, max_calls, per_cluster)
+    log.info("🧭 Kept %d of %d passages for summarization", len(selected), len(texts))
+    return pack_passages(texts, selected, MAX_CHARS)
+
+
+@backoff.on_exception(backoff.expo, Exception, max_tries=3)
+def _summarize_chunk(chunk: str, idx: int) -> str:
+    log.info("🔹 Summarizing chunk %d", idx + 1)
+    return _complete([
+        {"role": "system", "content": "You are a helpful assistant that summarizes transcripts."},
+        {"role": "user", "content": CHUNK_SUMMARY_PROMPT + chunk},
+    ])
+
+
+@backoff.on_exception(backoff.expo, Exception, max_tries=3)
+def _consolidate(chunks: list[str]) -> dict:
+    joined = "\n\n".join(chunks)
+    prompt = FINAL_SUMMARY_PROMPT + joined
+    content = _complete([
+        {"role": "system", "content": "You are an expert educational content curator."},
+        {"role": "user", "content": prompt},
+    ])
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        log.warning("Could not parse JSON; returning raw content")
+        return {
+            "short_description": "",
+            "key_examples": [],
+            "conclusion": "",
+            "raw_content": content,
+        }
+
+
+# ─── Public API ──────────────────────────────────────────────
+def summary_cache_key(text: str, mode: Optional[str] = None) -> str:
+    """Artifact-store key for the summary of `text` with the current settings."""
+    from core.embeddings import configured_embedding_info
+
+    mode = mode or SUMMARY_MODE
+    if mode == "clustered":
+        # The passages kept depend on the vector space they were clustered in
+        return artifact_key(sha256_text(text), model=MODEL, max_chars=MAX_CHARS, mode=mode,
+                            max_calls=SUMMARY_MAX_CALLS, per_cluster=SUMMARY_PER_CLUSTER,
+                            embedding=configured_embedding_info())
+    return artifact_key(sha256_text(text), model=MODEL, max_chars=MAX_CHARS)
+
+
+def summarize_text(
+    text: str,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_chunk: Optional[Callable[[int, str], None]] = None,
+    mode: Optional[str] = None,
+    passages: Optional[Sequence[Tuple[str, Sequence[float]]]] = None,
+    max_calls: Optional[int] = None,
+) -> dict:
+    """Return the 3-section summary as a dict.
+
+    `on_start(total_chunks)` / `on_chunk(idx, chunk_summary)` report progress.
+    `mode` overrides SUMMARY_MODE; in clustered mode, `passages` are
+    precomputed (passage, vector) pairs (e.g. from the vectorizer) to cluster
+    instead of embedding the transcript again. Transcripts that fit in
+    `max_calls` (SUMMARY_MAX_CALLS) chunks are summarized in full either way.
+    """
+    mode = mode or SUMMARY_MODE
+    max_calls = max_calls or SUMMARY_MAX_CALLS
+    if mode not in SUMMARY_MODES:
+        raise ValueError(f"Unknown summary mode '{mode}' (choose from {', '.join(SUMMARY_MODES)})")
+    chunks = _chunk_text(text)
+    if mode == "clustered" and len(chunks) > max_calls:
+        chunks = _clustered_chunks(text, passages, max_calls)
+    if on_start:
+        on_start(len(chunks))
+    chunk_summaries = []
+    for i, chunk in enumerate(chunks):
+        chunk_summaries.append(_summarize_chunk(chunk, i))
+        if on_chunk:
+            on_chunk(i, chunk_summaries[-1])
+    return _consolidate(chunk_summaries)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize the transcript (transcript.ndjson or transcript.json) inside the 'data/' folder.")
+    parser.add_argument("--output", type=str, help="Optional path to save summary (default: data/summary.json)")
+    parser.add_argument("--mode", choices=SUMMARY_MODES, default=SUMMARY_MODE, help="Summarize every chunk, or only representative passages (default: SUMMARY_MODE or full)")
+    args = parser.parse_args()
+
+    data_dir = Path(__file__).parent.parent / "data"
+    transcript_path = data_dir / "transcript.ndjson"
+    if not transcript_path.exists():
+        transcript_path = data_dir / "transcript.json"
+
+    if not transcript_path.exists():
+        print(f"❌ File not found: {transcript_path}")
+        exit(1)
+
+    data = read_transcript(transcript_path)
+
+    if not data["text"].strip():
+        print(f"❌ Transcript text is empty in {transcript_path.name}")
+        exit(1)
+
+    print("🔁 Summarizing transcript...")
+    summary = summarize_text(data["text"], mode=args.mode)
+
+    output_path = Path(args.output) if args.output else data_dir / "summary.json"
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Summary saved to {output_path.resolve()}")
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
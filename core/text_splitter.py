@@ -0,0 +1,137 @@
+import bisect
+from collections import deque
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from langchain.schema import Document
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+Span = Tuple[int, int]
+
+
+class OffsetTextSplitter:
+    """
+    Drop-in for RecursiveCharacterTextSplitter that works on (start, end)
+    offsets into the original string instead of rebuilding substrings.
+
+    Same contract: chunks are at most `chunk_size` characters, consecutive
+    chunks share up to `chunk_overlap` characters, text is split on the first
+    separator that occurs (paragraph, line, word, character) and the separator
+    stays at the start of the following piece. Only the emitted chunks are
+    ever sliced out. Each chunk records `start_char` / `end_char` in its
+    source document and, when the document carries Whisper `segments`, the
+    `start` / `end` timestamps it covers.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 separators: Sequence[str] = DEFAULT_SEPARATORS):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = tuple(separators)
+        # Unit for text with no separator at all: small enough to honour the overlap
+        self._char_step = max(1, min(chunk_overlap or chunk_size, chunk_size - chunk_overlap) // 2)
+
+    # ─── Spans ───────────────────────────────────────────────
+    def _pieces(self, text: str, start: int, end: int, level: int, out: List[Span]) -> None:
+        """Append pieces of text[start:end], each at most chunk_size long, in order."""
+        for i in range(level, len(self.separators)):
+            sep = self.separators[i]
+            if sep == "":
+                out.extend((s, min(s + self._char_step, end)) for s in range(start, end, self._char_step))
+                return
+            p = text.find(sep, start + 1, end)
+            if p == -1:
+                continue
+
+            bounds = [start]
+            while p != -1:
+                bounds.append(p)
+                p = text.find(sep, p + len(sep), end)
+            bounds.append(end)
+
+            for s, e in zip(bounds, bounds[1:]):
+                if e - s <= self.chunk_size:
+                    if e > s:
+                        out.append((s, e))
+                else:
+                    self._pieces(text, s, e, i + 1, out)
+            return
+        out.append((start, end))
+
+    def _strip(self, text: str, s: int, e: int) -> Span:
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        return s, e
+
+    def split_spans(self, text: str) -> List[Span]:
+        """(start_char, end_char) of every chunk of `text`."""
+        pieces: List[Span] = []
+        if len(text) <= self.chunk_size:
+            pieces.append((0, len(text)))
+        else:
+            self._pieces(text, 0, len(text), 0, pieces)
+
+        spans: List[Span] = []
+        window = deque()
+
+        def emit():
+            s, e = self._strip(text, window[0][0], window[-1][1])
+            if e > s and (not spans or spans[-1] != (s, e)):
+                spans.append((s, e))
+
+        for s, e in pieces:
+            if window and e - window[0][0] > self.chunk_size:
+                emit()
+                # Keep a tail of at most chunk_overlap characters that still leaves room for this piece
+                while window and (window[-1][1] - window[0][0] > self.chunk_overlap
+                                  or e - window[0][0] > self.chunk_size):
+                    window.popleft()
+            window.append((s, e))
+        if window:
+            emit()
+        return spans
+
+    def split_text(self, text: str) -> List[str]:
+        return [text[s:e] for s, e in self.split_spans(text)]
+
+    # ─── Documents ───────────────────────────────────────────
+    @staticmethod
+    def _segment_index(text: str, segments: Sequence[dict]):
+        """Locate each segment's text in `text` (in order) → (char_starts, segments)."""
+        starts, located, cursor = [], [], 0
+        for seg in segments:
+            needle = (seg.get("text") or "").strip()
+            pos = text.find(needle, cursor) if needle else -1
+            if pos == -1:
+                continue
+            starts.append(pos)
+            located.append(seg)
+            cursor = pos + len(needle)
+        return starts, located
+
+    def split_documents(self, documents: Iterable[Any]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            text = doc.page_content
+            base = {k: v for k, v in (doc.metadata or {}).items() if k != "segments"}
+            segments = (doc.metadata or {}).get("segments")
+            seg_starts, located = self._segment_index(text, segments) if segments else ([], [])
+
+            for s, e in self.split_spans(text):
+                metadata = {**base, "start_char": s, "end_char": e}
+                if located:
+                    first = max(0, bisect.bisect_right(seg_starts, s) - 1)
+                    last = max(first, bisect.bisect_left(seg_starts, e) - 1)
+                    metadata["start"] = located[first]["start"]
+                    metadata["end"] = located[last]["end"]
+                chunks.append(Document(page_content=text[s:e], metadata=metadata))
+        return chunks
+
+
+def split_documents(documents: List[Any], chunk_size: int = 1000, chunk_overlap: int = 200,
+                    separators: Optional[Sequence[str]] = None) -> List[Document]:
+    return OffsetTextSplitter(chunk_size, chunk_overlap, separators or DEFAULT_SEPARATORS).split_documents(documents)
@@ -0,0 +1,189 @@
+import bisect
+import json
+import os
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+# ─── Format ──────────────────────────────────────────────────
+# transcript.ndjson: a header line, then one segment per line in start order:
+#   {"format": "transcript-ndjson", "version": 1, "segments": n, "duration": 512.3}
+#   {"start": 0.0, "end": 4.2, "text": "..."}
+# The header also carries "text" when the transcriber's full text differs
+# from the joined segment texts (e.g. the API's own punctuation/spacing).
+# .transcript.ndjson.idx (hidden, so directory loaders skip it): the sorted
+# start times and byte offsets of the segment lines, for O(log n) seeks:
+#   MAGIC | n (uint64) | starts (n × float64) | offsets (n × uint64)
+FORMAT = "transcript-ndjson"
+VERSION = 1
+MAGIC = b"TRIDX001"
+JSON_SEPARATORS = (",", ":")
+
+
+def index_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(f".{path.name}.idx")
+
+
+def _atomic_write(path: Path, write) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _write_index(path: Path, starts: array, offsets: array) -> None:
+    def write(f):
+        f.write(MAGIC + struct.pack("<Q", len(starts)))
+        starts.tofile(f)
+        offsets.tofile(f)
+
+    _atomic_write(index_path(path), write)
+
+
+def write_transcript(path, segments: List[dict], text: Optional[str] = None) -> Path:
+    """
+    Write `segments` (sorted by start) as NDJSON plus its start-time index.
+    A transcript without segments (`text` only) is stored as one segment
+    at 0s; a `text` that isn't just the segments joined is kept in the
+    header. Either way the text survives the round trip.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if not segments and text and text.strip():
+        segments = [{"start": 0.0, "end": 0.0, "text": text}]
+    segments = sorted(segments, key=lambda s: s["start"])
+    starts, offsets = array("d"), array("Q")
+    header = {"format": FORMAT, "version": VERSION, "segments": len(segments),
+              "duration": max((s["end"] for s in segments), default=0.0)}
+    if text and text.split() != " ".join(s["text"] for s in segments).split():
+        header["text"] = text.strip()
+
+    def write(f):
+        f.write(json.dumps(header, ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8") + b"\n")
+        for seg in segments:
+            starts.append(float(seg["start"]))
+            offsets.append(f.tell())
+            line = {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+            f.write(json.dumps(line, ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8") + b"\n")
+
+    _atomic_write(path, write)
+    _write_index(path, starts, offsets)
+    return path
+
+
+class Transcript:
+    """
+    Read side of a transcript.ndjson file. Only the index (16 bytes per
+    segment) is held in memory; segments are read from disk on demand. A
+    missing or stale index is rebuilt with one scan of the file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self.header = json.loads(f.readline())
+        if self.header.get("format") != FORMAT:
+            raise ValueError(f"{self.path} is not a {FORMAT} transcript")
+        self.starts, self.offsets = self._load_index()
+
+    def _load_index(self) -> Tuple[array, array]:
+        idx = index_path(self.path)
+        if idx.exists() and idx.stat().st_mtime >= self.path.stat().st_mtime:
+            with open(idx, "rb") as f:
+                if f.read(len(MAGIC)) == MAGIC:
+                    (n,) = struct.unpack("<Q", f.read(8))
+                    starts, offsets = array("d"), array("Q")
+                    starts.fromfile(f, n)
+                    offsets.fromfile(f, n)
+                    return starts, offsets
+        return self._rebuild_index()
+
+    def _rebuild_index(self) -> Tuple[array, array]:
+        starts, offsets = array("d"), array("Q")
+        with open(self.path, "rb") as f:
+            f.readline()
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    starts.append(float(json.loads(line)["start"]))
+                    offsets.append(offset)
+        _write_index(self.path, starts, offsets)
+        return starts, offsets
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return float(self.header.get("duration", 0.0))
+
+    # ─── Lookups ─────────────────────────────────────────────
+    def segments(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[dict]:
+        """Segments `offset`…`offset + limit` in order, read from their byte offset on."""
+        if offset >= len(self):
+            return
+        stop = len(self) if limit is None else min(len(self), offset + limit)
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[offset])
+            for _ in range(offset, stop):
+                yield json.loads(f.readline())
+
+    def segment_at(self, t: float) -> int:
+        """Index of the segment playing at `t` seconds (the last one starting at or before it)."""
+        return max(0, bisect.bisect_right(self.starts, t) - 1)
+
+    def span(self, start: float = 0.0, end: Optional[float] = None) -> Tuple[int, int]:
+        """[first, stop) segment positions that may overlap [start, end), found by bisecting the start index."""
+        first = self.segment_at(start)
+        stop = len(self) if end is None else bisect.bisect_left(self.starts, end)
+        return first, max(first, stop)
+
+    def between(self, start: float, end: Optional[float] = None, offset: int = 0,
+                limit: Optional[int] = None) -> Iterator[dict]:
+        """Segments overlapping [start, end), optionally paged by `offset`/`limit` within that span."""
+        first, stop = self.span(start, end)
+        first += offset
+        count = stop - first if limit is None else min(limit, stop - first)
+        for seg in self.segments(first, max(0, count)):
+            # Only the first candidate can lie wholly before `start` (a gap in speech)
+            if seg["end"] > start or seg["start"] >= start:
+                yield seg
+
+    def text_between(self, start: float, end: float) -> str:
+        return " ".join(seg["text"].strip() for seg in self.between(start, end)).strip()
+
+    def text(self) -> str:
+        if "text" in self.header:
+            return self.header["text"]
+        return " ".join(seg["text"].strip() for seg in self.segments()).strip()
+
+    # ─── Legacy export ───────────────────────────────────────
+    def iter_legacy_json(self) -> Iterator[str]:
+        """The old transcript.json ({"text", "segments"}) as string pieces, never built in memory whole."""
+        yield '{"text": ' + json.dumps(self.text(), ensure_ascii=False) + ', "segments": ['
+        for i, seg in enumerate(self.segments()):
+            yield ("" if i == 0 else ", ") + json.dumps(seg, ensure_ascii=False)
+        yield "]}"
+
+    def to_dict(self) -> dict:
+        return {"text": self.text(), "segments": list(self.segments())}
+
+
+def read_transcript(path) -> dict:
+    """{"text", "segments"} from a transcript.ndjson or a legacy transcript.json."""
+    path = Path(path)
+    if path.suffix == ".ndjson":
+        return Transcript(path).to_dict()
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {"text": data.get("text", ""), "segments": data.get("segments") or []}
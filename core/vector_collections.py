@@ -0,0 +1,139 @@
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from core.metrics import record_cache, INDEX_CACHE_BYTES
+from core.segments import has_index, store_version, store_footprint
+
+log = logging.getLogger(__name__)
+
+# ─── Paths / Config ──────────────────────────────────────────
+BASE_DIR = Path(__file__).parent.parent.resolve()
+DATA_DIR = BASE_DIR / "data"
+DEFAULT_COLLECTION = "default"
+DEFAULT_COLLECTION_PATH = DATA_DIR / "vector_db"       # pre-collections location, kept for compatibility
+COLLECTIONS_DIR = DATA_DIR / "collections"
+INDEX_CACHE_MAX_BYTES = int(os.getenv("INDEX_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))  # 2 GiB
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+
+def validate_collection_name(name: str) -> str:
+    if not _NAME_RE.match(name or ""):
+        raise ValueError(f"Invalid collection name '{name}' (use letters, digits, '-' or '_', max 64 chars)")
+    return name
+
+
+def collection_path(name: str = DEFAULT_COLLECTION) -> Path:
+    """Directory holding the FAISS store of a collection."""
+    name = validate_collection_name(name)
+    if name == DEFAULT_COLLECTION:
+        return DEFAULT_COLLECTION_PATH
+    return COLLECTIONS_DIR / name
+
+
+def list_collections() -> List[str]:
+    names = []
+    if has_index(DEFAULT_COLLECTION_PATH):
+        names.append(DEFAULT_COLLECTION)
+    if COLLECTIONS_DIR.exists():
+        names.extend(sorted(p.name for p in COLLECTIONS_DIR.iterdir() if has_index(p)))
+    return names
+
+
+def collection_paths() -> List[Path]:
+    """Store directories of every collection that has an index."""
+    return [collection_path(name) for name in list_collections()]
+
+
+class IndexCache:
+    """
+    LRU cache of loaded vector stores, bounded by an approximate RAM budget.
+
+    Collections are loaded lazily on first use. A cached store is reloaded
+    when its set of live segments changes on disk, and least-recently-used stores are
+    evicted once the budget is exceeded (the most recent one is always kept).
+    Concurrent misses on the same store version share a single load.
+    """
+
+    def __init__(self, loader: Callable[[Path], Any], max_bytes: int = INDEX_CACHE_MAX_BYTES):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # name -> (store, size, version)
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, Any], Future] = {}
+
+    @property
+    def used_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries.values())
+
+    def get(self, name: str = DEFAULT_COLLECTION) -> Any:
+        path = collection_path(name)
+        version = store_version(path)
+        if version is None:
+            raise FileNotFoundError(f"Collection '{name}' has no vector store. Run /vectorize first.")
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[2] == version:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                record_cache("index", True)
+                return entry[0]
+
+            self.misses += 1
+            record_cache("index", False)
+            pending = self._loading.get((name, version))
+            if pending is None:
+                pending = self._loading[(name, version)] = Future()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            return pending.result()
+
+        # Load outside the lock so a cold collection doesn't stall queries on warm ones
+        try:
+            log.info(f"Loading collection '{name}' from {path}...")
+            store = self.loader(path)
+            size = store_footprint(path)
+            with self._lock:
+                self._entries[name] = (store, size, version)
+                self._entries.move_to_end(name)
+                self._evict()
+                INDEX_CACHE_BYTES.set(self.used_bytes)
+            pending.set_result(store)
+            return store
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop((name, version), None)
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._entries.pop(name, None)
+            INDEX_CACHE_BYTES.set(self.used_bytes)
+
+    def _evict(self) -> None:
+        while len(self._entries) > 1 and self.used_bytes > self.max_bytes:
+            name, _ = self._entries.popitem(last=False)
+            log.info(f"Evicted collection '{name}' from index cache")
+
+    def stats(self) -> dict:
+        return {
+            "loaded": list(self._entries),
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
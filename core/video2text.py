@@ -1,170 +1,287 @@
-print("🧠 Running file:", __file__)
-# from __future__ import annotations
-
-import concurrent.futures as cf
-import logging
-import math
-import os
-import json
-import subprocess
-import tempfile
-from pathlib import Path
-from typing import List, Tuple
-
-import backoff
-from dotenv import load_dotenv
-from openai import OpenAI
-from tqdm import tqdm
-
-load_dotenv()
-logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
-log = logging.getLogger(__name__)
-
-MAX_WORKERS = 4
-MAX_RETRIES = 3
-
-def _process_chunk(args):
-    """Run in a separate process: extract wav, call Whisper, return (idx, text, segs)."""
-    idx, start, dur, src_path, chunk_sec = args
-
-    import tempfile, subprocess, os
-    from pathlib import Path
-    from openai import OpenAI
-    import backoff
-
-    def _extract_wav(src, s, d, dst):
-        subprocess.check_call(
-            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
-             "-ss", str(s), "-t", str(d), "-i", src,
-             "-vn", "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", dst])
-
-    @backoff.on_exception(backoff.expo, Exception, max_tries=3)
-    def _whisper(wav):
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        with open(wav, "rb") as f:
-            return client.audio.transcriptions.create(
-                model="whisper-1",
-                file=f,
-                response_format="verbose_json",
-                timestamp_granularities=["segment"],
-            )
-
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as t:
-        wav = t.name
-    try:
-        _extract_wav(src_path, start, dur, wav)
-        resp = _whisper(wav)
-        segments = [
-            {"start": start + s.start, "end": start + s.end, "text": s.text}
-            for s in resp.segments
-        ]
-        return idx, resp.text, segments
-    finally:
-        Path(wav).unlink(missing_ok=True)
-
-
-def _video_duration(path: str) -> float:
-    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", path]
-    out = subprocess.check_output(cmd, text=True)
-    return float(out.strip())
-
-
-def _extract_wav(src: str, start: float, dur: float, dst: str) -> None:
-    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-ss", str(start), "-t", str(dur), "-i", src,
-           "-vn", "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", dst]
-    subprocess.check_call(cmd)
-
-
-@backoff.on_exception(backoff.expo, Exception, max_tries=MAX_RETRIES)
-def _whisper(wav: str):
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    with open(wav, "rb") as f:
-        return client.audio.transcriptions.create(
-            model="whisper-1",
-            file=f,
-            response_format="verbose_json",
-            timestamp_granularities=["segment"],
-        )
-
-
-def transcribe_video(path: str, chunk_sec: int = 600) -> Tuple[str, List[dict]]:
-    dur = _video_duration(path)
-    jobs = math.ceil(dur / chunk_sec)
-    log.info("%.1fs video -> %d chunks", dur, jobs)
-
-    def work(i):
-        start = i * chunk_sec
-        length = min(chunk_sec, dur - start)
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as t:
-            wav = t.name
-        try:
-            _extract_wav(path, start, length, wav)
-            resp = _whisper(wav)
-            segments = [{"start": start + s.start, "end": start + s.end, "text": s.text} for s in resp.segments]
-            return i, resp.text, segments
-        finally:
-            Path(wav).unlink(missing_ok=True)
-
-    results: List[Tuple[int, str, List[dict]]] = []
-
-    with cf.ProcessPoolExecutor(max_workers=MAX_WORKERS) as ex:
-        futs = [
-            ex.submit(_process_chunk, (i, i * chunk_sec,
-                                       min(chunk_sec, dur - i * chunk_sec),
-                                       path, chunk_sec))
-            for i in range(jobs)
-        ]
-        for fut in tqdm(cf.as_completed(futs), total=jobs, desc="chunks"):
-            results.append(fut.result())
-
-    results.sort(key=lambda t: t[0])
-    full = " ".join(txt for _, txt, _ in results)
-    segs = [s for _, _, ss in results for s in ss]
-    segs.sort(key=lambda s: s["start"])
-    return full.strip(), segs
-
-def main():
-    import argparse
-
-    parser = argparse.ArgumentParser(description="Transcribe a video in the 'data/' folder using Whisper API")
-    parser.add_argument("filename", type=str, help="Video filename inside the 'data/' folder (e.g., video.mp4)")
-    parser.add_argument("--chunk-sec", type=int, default=600, help="Chunk duration in seconds")
-    args = parser.parse_args()
-    print("⚙️ Args parsed:", args)
-
-    # FIXED LINE BELOW 👇
-    data_dir = Path(__file__).parent.parent / "data"
-    data_dir.mkdir(exist_ok=True)
-
-    video_path = data_dir / args.filename
-    print(f"✅  File is: {video_path}")
-
-    if not video_path.exists():
-        print(f"❌ File not found: {video_path}")
-        return
-
-    print(f"🔑 API key loaded: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
-    print(f"🔍 Transcribing {video_path} ...")
-
-    try:
-        text, segments = transcribe_video(str(video_path), chunk_sec=args.chunk_sec)
-    except Exception as e:
-        print(f"❌ Transcription failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return
-
-    print(f"Transcript length: {len(text)} chars, Segments: {len(segments)}")
-    payload = {"text": text, "segments": segments}
-
-    transcript_path = data_dir / "transcript.json"
-    print(f"📁 Writing transcript to: {transcript_path.resolve()}")
-
-    with open(transcript_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ Transcript saved to {transcript_path}")
-
-if __name__ == "__main__":
-    print("")
+print("🧠 Running file:", __file__)
+# from __future__ import annotations
+
+import concurrent.futures as cf
+import logging
+import math
+import os
+import subprocess
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import backoff
+from dotenv import load_dotenv
+from openai import RateLimitError
+from tqdm import tqdm
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from core.artifacts import artifact_key
+from core.metrics import record_stage
+from core.openai_clients import get_openai_client, acquire, BATCH
+from core.scheduler import AdaptiveConcurrency, ordered, run_two_stage
+from core.transcript_store import write_transcript
+
+load_dotenv()
+logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+log = logging.getLogger(__name__)
+
+MAX_RETRIES = 3
+# Hosted backend: ffmpeg extraction and uploads are scheduled separately.
+# Upload concurrency starts at TRANSCRIBE_CONCURRENCY and adapts (AIMD) to
+# latency and 429s, up to TRANSCRIBE_MAX_CONCURRENCY.
+FFMPEG_WORKERS = int(os.getenv("TRANSCRIBE_FFMPEG_WORKERS", "0")) or max(1, (os.cpu_count() or 1) // 2)
+NETWORK_CONCURRENCY = int(os.getenv("TRANSCRIBE_CONCURRENCY", "4"))
+NETWORK_MAX_CONCURRENCY = int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", "16"))
+MODEL = "whisper-1"
+
+# ─── Backends ────────────────────────────────────────────────
+# "openai" uploads each chunk to the hosted API; "local" runs a CTranslate2
+# Whisper model (faster-whisper) from disk, one model per worker process.
+BACKENDS = ("openai", "local")
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "openai")
+TRANSCRIBE_MODEL = os.getenv("TRANSCRIBE_MODEL")            # local model dir, or a name under models/
+LOCAL_THREADS = int(os.getenv("TRANSCRIBE_THREADS", "2"))   # CPU threads per local worker
+LOCAL_COMPUTE_TYPE = os.getenv("TRANSCRIBE_COMPUTE_TYPE", "int8")
+LOCAL_WORKERS = max(1, (os.cpu_count() or 1) // LOCAL_THREADS)
+MODELS_DIR = Path(__file__).parent.parent.resolve() / "models"
+
+
+def resolve_model(backend: Optional[str] = None, model: Optional[str] = None) -> Tuple[str, str]:
+    """(backend, model) with env defaults applied; local models must already be on disk."""
+    backend = backend or TRANSCRIBE_BACKEND
+    if backend == "openai":
+        return backend, MODEL
+    if backend != "local":
+        raise ValueError(f"Unknown transcription backend '{backend}' (choose from {', '.join(BACKENDS)})")
+
+    model = model or TRANSCRIBE_MODEL
+    if not model:
+        raise ValueError("The local transcription backend needs TRANSCRIBE_MODEL (a model directory or a name under models/)")
+    for candidate in (Path(model), MODELS_DIR / model):
+        if candidate.is_dir():
+            return backend, str(candidate.resolve())
+    raise ValueError(f"Local Whisper model '{model}' not found (looked in the path itself and {MODELS_DIR})")
+
+
+def transcript_cache_key(video_sha256: str, chunk_sec: int,
+                         backend: Optional[str] = None, model: Optional[str] = None) -> str:
+    """Artifact-store key for the transcript of a video with the given settings."""
+    backend, model = resolve_model(backend, model)
+    if backend == "openai":
+        return artifact_key(video_sha256, chunk_sec=chunk_sec, model=MODEL)
+    return artifact_key(video_sha256, chunk_sec=chunk_sec, model=f"local:{Path(model).name}",
+                        compute_type=LOCAL_COMPUTE_TYPE)
+
+
+@lru_cache(maxsize=1)
+def _load_local_model(model_path: str):
+    """Loaded once per worker process and reused for every chunk it handles."""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as exc:
+        raise ImportError("The local transcription backend needs: pip install faster-whisper") from exc
+    return WhisperModel(model_path, device="cpu", compute_type=LOCAL_COMPUTE_TYPE,
+                        cpu_threads=LOCAL_THREADS, num_workers=1)
+
+
+def _transcribe_local(wav: str, model_path: str):
+    """Transcribe a wav locally; returns (text, [(start, end, text)]) relative to the wav."""
+    segments, _info = _load_local_model(model_path).transcribe(wav, beam_size=5)
+    segments = [(s.start, s.end, s.text) for s in segments]   # generator: decoding happens here
+    return " ".join(t.strip() for _, _, t in segments).strip(), segments
+
+
+def _process_chunk(args):
+    """Run in a worker process: extract one chunk's wav and transcribe it locally; returns (idx, text, segs, stage timings)."""
+    idx, start, dur, src_path, model = args
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as t:
+        wav = t.name
+    try:
+        # Timings are returned to the parent: metrics live in the parent process
+        t0 = time.perf_counter()
+        _extract_wav(src_path, start, dur, wav)
+        t1 = time.perf_counter()
+        text, raw_segments = _transcribe_local(wav, model)
+        t2 = time.perf_counter()
+        return idx, text, _shift_segments(raw_segments, start), {"ffmpeg": t1 - t0, "whisper": t2 - t1}
+    finally:
+        Path(wav).unlink(missing_ok=True)
+
+
+def _shift_segments(raw_segments, start: float) -> List[dict]:
+    # Segment times are relative to the chunk: shift them to absolute video offsets
+    return [{"start": start + s, "end": start + e, "text": t} for s, e, t in raw_segments]
+
+
+def _video_duration(path: str) -> float:
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", path]
+    out = subprocess.check_output(cmd, text=True)
+    return float(out.strip())
+
+
+def _extract_wav(src: str, start: float, dur: float, dst: str) -> None:
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-ss", str(start), "-t", str(dur), "-i", src,
+           "-vn", "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", dst]
+    subprocess.check_call(cmd)
+
+
+# 429s are not retried here: they go back to the scheduler, which lowers the concurrency
+@backoff.on_exception(backoff.expo, Exception, max_tries=MAX_RETRIES, giveup=lambda e: isinstance(e, RateLimitError))
+def _whisper(wav: str):
+    acquire("audio", 0, BATCH)
+    with open(wav, "rb") as f:
+        return get_openai_client().with_options(max_retries=0).audio.transcriptions.create(
+            model=MODEL,
+            file=f,
+            response_format="verbose_json",
+            timestamp_granularities=["segment"],
+        )
+
+
+@lru_cache()
+def _network_limit() -> AdaptiveConcurrency:
+    # One per process: concurrent transcriptions share (and tune) the same limit
+    return AdaptiveConcurrency("transcribe_upload", NETWORK_CONCURRENCY, maximum=NETWORK_MAX_CONCURRENCY)
+
+
+def _iter_hosted(path: str, plan: List[Tuple[float, float]]) -> Iterator[Tuple[int, Tuple[str, List[dict]]]]:
+    """
+    Hosted backend: ffmpeg extraction on FFMPEG_WORKERS threads (the work is in
+    the subprocess), uploads on an adaptive number of threads. Yields
+    (idx, (text, segments)) in chunk order.
+    """
+    with tempfile.TemporaryDirectory(prefix="chunks_") as tmp:
+        def extract(chunk):
+            start, length = chunk
+            wav = str(Path(tmp) / f"{start:.0f}.wav")
+            t0 = time.perf_counter()
+            _extract_wav(path, start, length, wav)
+            record_stage("ffmpeg", time.perf_counter() - t0)
+            return start, wav
+
+        def upload(prepared):
+            start, wav = prepared
+            t0 = time.perf_counter()
+            resp = _whisper(wav)
+            record_stage("whisper", time.perf_counter() - t0)
+            Path(wav).unlink(missing_ok=True)
+            return resp.text, _shift_segments([(s.start, s.end, s.text) for s in resp.segments], start)
+
+        yield from run_two_stage(
+            plan, extract, upload,
+            cpu_workers=FFMPEG_WORKERS,
+            io_limit=_network_limit(),
+            is_throttle=lambda exc: isinstance(exc, RateLimitError),
+            weight=lambda chunk: chunk[1],
+        )
+
+
+def _iter_local(path: str, plan: List[Tuple[float, float]], model: str) -> Iterator[Tuple[int, Tuple[str, List[dict]]]]:
+    """Local backend: CPU-bound decoding, one process per LOCAL_WORKERS. Yields (idx, (text, segments)) in chunk order."""
+    with cf.ProcessPoolExecutor(max_workers=LOCAL_WORKERS) as ex:
+        futs = [ex.submit(_process_chunk, (i, start, length, path, model)) for i, (start, length) in enumerate(plan)]
+
+        def completions():
+            for fut in cf.as_completed(futs):
+                idx, text, segments, timings = fut.result()
+                for stage, seconds in timings.items():
+                    record_stage(stage, seconds)
+                yield idx, (text, segments)
+
+        try:
+            yield from ordered(completions())
+        except BaseException:
+            ex.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def transcribe_video(
+    path: str,
+    chunk_sec: int = 600,
+    on_start: Optional[Callable[[int], None]] = None,
+    on_chunk: Optional[Callable[[int, str, List[dict]], None]] = None,
+    backend: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Tuple[str, List[dict]]:
+    """
+    Transcribe a video chunk by chunk with the given backend (default: TRANSCRIBE_BACKEND).
+
+    `on_start(total_chunks)` is called once the chunk plan is known and
+    `on_chunk(idx, text, segments)` in chunk order, as soon as a chunk and
+    all chunks before it are done. If a callback raises (e.g. the job was
+    cancelled) pending chunks are dropped and the exception propagates.
+    """
+    backend, model = resolve_model(backend, model)
+    dur = _video_duration(path)
+    jobs = math.ceil(dur / chunk_sec)
+    plan = [(i * chunk_sec, min(chunk_sec, dur - i * chunk_sec)) for i in range(jobs)]
+    log.info("%.1fs video -> %d chunks (%s)", dur, jobs, backend)
+    if on_start:
+        on_start(jobs)
+
+    chunks = _iter_local(path, plan, model) if backend == "local" else _iter_hosted(path, plan)
+    texts: List[str] = []
+    segs: List[dict] = []
+    try:
+        for idx, (text, segments) in tqdm(chunks, total=jobs, desc="chunks"):
+            texts.append(text)
+            segs.extend(segments)
+            if on_chunk:
+                on_chunk(idx, text, segments)
+    finally:
+        chunks.close()
+
+    return " ".join(texts).strip(), segs
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transcribe a video in the 'data/' folder using Whisper (hosted API or a local model)")
+    parser.add_argument("filename", type=str, help="Video filename inside the 'data/' folder (e.g., video.mp4)")
+    parser.add_argument("--chunk-sec", type=int, default=600, help="Chunk duration in seconds")
+    parser.add_argument("--backend", choices=BACKENDS, default=TRANSCRIBE_BACKEND, help="Transcription backend")
+    parser.add_argument("--model", help="Local Whisper model dir (default: TRANSCRIBE_MODEL)")
+    args = parser.parse_args()
+    print("⚙️ Args parsed:", args)
+
+    # FIXED LINE BELOW 👇
+    data_dir = Path(__file__).parent.parent / "data"
+    data_dir.mkdir(exist_ok=True)
+
+    video_path = data_dir / args.filename
+    print(f"✅  File is: {video_path}")
+
+    if not video_path.exists():
+        print(f"❌ File not found: {video_path}")
+        return
+
+    if args.backend == "openai":
+        print(f"🔑 API key loaded: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
+    print(f"🔍 Transcribing {video_path} ({args.backend}) ...")
+
+    try:
+        text, segments = transcribe_video(str(video_path), chunk_sec=args.chunk_sec,
+                                          backend=args.backend, model=args.model)
+    except Exception as e:
+        print(f"❌ Transcription failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    print(f"Transcript length: {len(text)} chars, Segments: {len(segments)}")
+
+    transcript_path = data_dir / "transcript.ndjson"
+    print(f"📁 Writing transcript to: {transcript_path.resolve()}")
+
+    write_transcript(transcript_path, segments, text)
+
+    print(f"✅ Transcript saved to {transcript_path}")
+
+if __name__ == "__main__":
+    print("")
     main()
\ No newline at end of file
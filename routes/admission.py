@@ -0,0 +1,64 @@
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from core.admission import AdmissionRejected, get_admission_controller
+from core.jobs import JOB_MAX_QUEUED, get_job_queue
+
+# (method, path) → admission group. Matched before the body is read, so a shed
+# upload costs a response header, not a multi-GB transfer.
+ROUTE_GROUPS = {
+    ("POST", "/chat"): "chat",
+    ("POST", "/chat/stream"): "chat",
+    ("POST", "/search"): "chat",
+    ("POST", "/transcribe/transcribe-file"): "transcribe",
+    ("POST", "/vectorize"): "vectorize",
+    ("POST", "/summarize"): "summarize",
+    ("POST", "/pipeline"): "pipeline",
+}
+# Groups whose requests (may) end up on the background job queue
+JOB_GROUPS = {"transcribe", "vectorize", "summarize", "pipeline"}
+
+
+def _shed(exc: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status,
+        content={"detail": f"Server busy ({exc.reason}), retry in {exc.retry_after}s", "group": exc.group},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying core.admission to the expensive routes: the slot
+    is held for the whole response, streamed bodies included. Batch routes
+    are also shed with 503 while JOB_MAX_QUEUED jobs are already waiting.
+    """
+
+    def __init__(self, app, routes: dict = ROUTE_GROUPS):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        group = None
+        if scope["type"] == "http":
+            group = self.routes.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        controller = get_admission_controller()
+        try:
+            if group in JOB_GROUPS and await run_in_threadpool(get_job_queue().queued) >= JOB_MAX_QUEUED:
+                raise controller.shed(group, 503, "job_backlog")
+            await controller.acquire(group)
+        except AdmissionRejected as exc:
+            await _shed(exc)(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(group, time.perf_counter() - start)
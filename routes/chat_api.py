@@ -1,33 +1,67 @@
 import asyncio
 import logging
-from pathlib import Path
 from functools import lru_cache
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-from core.chat import load_qa_system
+from core.vector_collections import IndexCache, collection_path, DEFAULT_COLLECTION
+from core.metrics import timed
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
 class QARequest(BaseModel):
     question: str
+    collection: str = DEFAULT_COLLECTION
 
+# core.chat pulls in LangChain, FAISS and the OpenAI SDK: import it on first use (or at warm-up)
 @lru_cache()
-def get_chat_chain():
-    index_path = Path("data/vector_db/index.faiss")
-    if not index_path.exists():
-        raise RuntimeError("❌ Vector store not found. Run /vectorize first.")
-    return load_qa_system("data/vector_db")
+def get_index_cache() -> IndexCache:
+    from core.chat import load_vector_store
+    from core.embeddings import shared_embeddings
+
+    embeddings = shared_embeddings()
+    return IndexCache(loader=lambda path: load_vector_store(path, embeddings))
+
+@lru_cache()
+def get_chat_llm():
+    from core.chat import get_llm
+
+    return get_llm()
+
+def get_store(collection: str = DEFAULT_COLLECTION):
+    """Loaded vector store of a collection, with load errors mapped to HTTP errors."""
+    from core.embeddings import EmbeddingMismatchError
+
+    try:
+        collection_path(collection)
+    except ValueError as exc:
+        raise HTTPException(400, detail=str(exc))
+    try:
+        return get_index_cache().get(collection)
+    except EmbeddingMismatchError as exc:
+        raise HTTPException(409, detail=str(exc))
+    except FileNotFoundError as exc:
+        raise HTTPException(404, detail=str(exc))
+
+def get_chat_chain(collection: str = DEFAULT_COLLECTION):
+    from core.chat import build_qa_chain
+
+    return build_qa_chain(get_store(collection), get_chat_llm())
 
 @router.post("")
 async def chat_endpoint(request: QARequest):
     """Synchronous Q&A endpoint."""
     try:
-        chat_chain = get_chat_chain()
-        result = chat_chain.invoke({"query": request.question})
+        # Off the event loop: a cold collection imports LangChain/FAISS and loads the index
+        chat_chain = await run_in_threadpool(get_chat_chain, request.collection)
+        with timed("chat"):
+            result = await run_in_threadpool(chat_chain.invoke, {"query": request.question})
         return {"answer": result["result"]}
+    except HTTPException:
+        raise
     except Exception as exc:
         logging.exception("Chat failed")
         raise HTTPException(500, detail=str(exc))
@@ -36,16 +70,25 @@ async def chat_endpoint(request: QARequest):
 async def stream_chat(request: QARequest):
     """Streaming Q&A endpoint (word-by-word)."""
     try:
-        chat_chain = get_chat_chain()
+        # Off the event loop: a cold collection imports LangChain/FAISS and loads the index
+        chat_chain = await run_in_threadpool(get_chat_chain, request.collection)
 
         async def token_stream():
-            result = chat_chain.invoke({"query": request.question})
+            with timed("chat"):
+                result = await run_in_threadpool(chat_chain.invoke, {"query": request.question})
             for word in result["result"].split():
                 yield word + " "
                 await asyncio.sleep(0)
 
         return StreamingResponse(token_stream(), media_type="text/plain")
 
+    except HTTPException:
+        raise
     except Exception as exc:
         logging.exception("Streaming chat failed")
-        raise HTTPException(500, detail=str(exc))
\ No newline at end of file
+        raise HTTPException(500, detail=str(exc))
+
+@router.get("/collections")
+async def chat_collections():
+    """Index cache state: which collections are loaded and how much memory they use."""
+    return get_index_cache().stats()
@@ -0,0 +1,101 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from core.admission import get_admission_controller
+from core.jobs import get_job_queue
+from core.vector_collections import collection_path, collection_paths, DEFAULT_COLLECTION
+from core.segments import has_index, start_compactor
+
+router = APIRouter(tags=["Health"])
+
+log = logging.getLogger(__name__)
+
+# Opt-in: pay the heavy imports / index load at startup instead of on the first request
+WARMUP = os.getenv("WARMUP", "0").lower() in {"1", "true", "yes"}
+WARMUP_MODULES = ("core.chat", "core.summarizer", "core.video2text", "core.document_vectorizer", "core.pipeline")
+
+_state = {"ready": False, "warmup": WARMUP, "steps": {}, "errors": {}}
+_state_lock = threading.Lock()
+
+
+def _step(name: str, fn) -> None:
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as exc:
+        log.exception("Warm-up step '%s' failed", name)
+        with _state_lock:
+            _state["errors"][name] = str(exc)
+    finally:
+        with _state_lock:
+            _state["steps"][name] = round(time.perf_counter() - start, 3)
+
+
+def _import_heavy_modules() -> None:
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+
+
+def _load_default_index() -> None:
+    from routes.chat_api import get_index_cache
+
+    if has_index(collection_path(DEFAULT_COLLECTION)):
+        get_index_cache().get(DEFAULT_COLLECTION)
+
+
+def _open_clients() -> None:
+    from routes.chat_api import get_chat_llm
+
+    get_chat_llm()
+
+
+def _start_compactor() -> None:
+    start_compactor(collection_paths)
+
+
+def run_startup(warmup: bool = WARMUP) -> None:
+    """
+    Open the job queue (so queued jobs resume) and start the index segment
+    compactor, then, if `warmup` is set,
+    import the heavy modules, load the default index and create the LLM client.
+    /ready reports 503 until this has finished.
+    """
+    started = time.perf_counter()
+    _step("jobs", get_job_queue)
+    _step("compactor", _start_compactor)
+    if warmup:
+        _step("imports", _import_heavy_modules)
+        _step("index", _load_default_index)
+        _step("clients", _open_clients)
+    with _state_lock:
+        _state["ready"] = not _state["errors"]
+        _state["total"] = round(time.perf_counter() - started, 3)
+    log.info("🚦 Startup finished in %.2fs (warm-up %s)", _state["total"], "on" if warmup else "off")
+
+
+def start_background_startup(warmup: bool = WARMUP) -> threading.Thread:
+    """Run the startup phase off the event loop so /health answers while it runs."""
+    thread = threading.Thread(target=run_startup, args=(warmup,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+@router.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness: 200 once startup (and warm-up, if enabled) completed without errors."""
+    with _state_lock:
+        body = {**_state, "steps": dict(_state["steps"]), "errors": dict(_state["errors"])}
+    body["admission"] = get_admission_controller().stats()
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
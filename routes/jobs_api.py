@@ -0,0 +1,43 @@
+from fastapi import APIRouter, HTTPException
+
+from core.jobs import get_job_queue, DONE
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def _get_or_404(job_id: str) -> dict:
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    """Return status and chunk progress for a job."""
+    return _get_or_404(job_id)
+
+
+@router.get("/{job_id}/chunks")
+async def job_chunks(job_id: str):
+    """Return the partial results of every chunk finished so far."""
+    job = _get_or_404(job_id)
+    return {**job, "chunks": get_job_queue().chunks(job_id)}
+
+
+@router.get("/{job_id}/result")
+async def job_result(job_id: str):
+    """Return the final result once the job is done."""
+    job = _get_or_404(job_id)
+    if job["status"] != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return {**job, "result": get_job_queue().result(job_id)}
+
+
+@router.delete("/{job_id}")
+async def job_cancel(job_id: str):
+    """Cancel a queued or running job."""
+    _get_or_404(job_id)
+    if not get_job_queue().cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already finished")
+    return _get_or_404(job_id)
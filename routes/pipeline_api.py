@@ -0,0 +1,78 @@
+import logging
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, UploadFile, File
+
+from core.jobs import get_job_queue, register_job_handler, JobContext
+from core.artifacts import get_artifact_store
+from core.vector_collections import collection_path, DEFAULT_COLLECTION
+from routes.uploads import save_upload, safe_filename
+from routes.transcribe_api import write_latest_transcript, UPLOAD_DIR
+from routes.summarize_api import save_summary
+
+router = APIRouter(prefix="/pipeline", tags=["Pipeline"])
+
+
+def _pipeline_job(params: dict, ctx: JobContext) -> dict:
+    """Job handler: run the full video → transcript → {summary, index} pipeline."""
+    from core.pipeline import run_pipeline
+
+    def on_chunk(idx, text, segments):
+        ctx.chunk_done(idx, {"text": text, "segments": segments})
+        ctx.check_cancelled()
+
+    result = run_pipeline(
+        params["video_path"],
+        output_dir=str(collection_path(params.get("collection", DEFAULT_COLLECTION))),
+        chunk_sec=params.get("chunk_sec", 600),
+        on_start=ctx.set_total,
+        on_chunk=on_chunk,
+    )
+    write_latest_transcript(result["transcript"])
+    save_summary(result["summary"])
+    return result
+
+
+register_job_handler("pipeline", _pipeline_job)
+
+
+@router.post("", status_code=202)
+async def pipeline_post(
+    file: UploadFile = File(..., description="Upload a video file (e.g., .mp4)"),
+    chunk_sec: int = 600,
+    collection: str = DEFAULT_COLLECTION,
+):
+    """
+    Upload a video once and run transcription, then summarization and
+    vectorization concurrently. Poll /jobs/{job_id}; the result includes
+    per-stage timings.
+    """
+    try:
+        collection_path(collection)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    try:
+        filename = safe_filename(file.filename)
+        upload = await save_upload(file, UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(filename).suffix}")
+        video_path = get_artifact_store().put_file("media", upload.sha256, upload.path, suffix=Path(filename).suffix)
+
+        job_id = get_job_queue().submit("pipeline", {
+            "video_path": str(video_path),
+            "chunk_sec": chunk_sec,
+            "collection": collection,
+        })
+        return {
+            "message": "Pipeline queued",
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result",
+            "sha256": upload.sha256,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as exc:
+        logging.exception("Pipeline failed")
+        raise HTTPException(status_code=500, detail=str(exc))
@@ -0,0 +1,50 @@
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from core.vector_collections import DEFAULT_COLLECTION
+from core.metrics import timed
+from routes.chat_api import get_store
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+MAX_K = 50
+
+
+class SearchRequest(BaseModel):
+    query: str
+    collection: str = DEFAULT_COLLECTION
+    k: int = Field(4, ge=1, le=MAX_K)
+    # e.g. {"doc_type": "pdf"} or {"doc_type": ["pdf", "txt"], "source": "week1.pdf"}
+    filter: Optional[Dict[str, Any]] = None
+
+
+# Plain `def`: FastAPI runs it on the threadpool, so a search never blocks the event loop
+@router.post("")
+def search(request: SearchRequest):
+    """Retrieval only: the top-k chunks and their scores, no LLM call."""
+    from core.metadata_index import FILTER_FIELDS
+
+    if request.filter:
+        unknown = sorted(set(request.filter) - set(FILTER_FIELDS))
+        if unknown:
+            raise HTTPException(400, detail=f"Cannot filter on {', '.join(unknown)} "
+                                            f"(filterable fields: {', '.join(FILTER_FIELDS)})")
+
+    db = get_store(request.collection)
+    try:
+        with timed("search"):
+            hits = db.similarity_search_with_score(request.query, k=request.k, filter=request.filter or None)
+    except Exception as exc:
+        logging.exception("Search failed")
+        raise HTTPException(500, detail=str(exc))
+
+    return {
+        "collection": request.collection,
+        "results": [
+            {"text": doc.page_content, "score": float(score), "metadata": doc.metadata}
+            for doc, score in hits
+        ],
+    }
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from pathlib import Path
 import json
 import logging
+import tempfile
+from typing import Optional
 
-from core.summarizer import summarize_text
+from core.artifacts import get_artifact_store
+from core.jobs import get_job_queue, register_job_handler, JobContext
+from core.transcript_store import FORMAT as TRANSCRIPT_FORMAT, read_transcript
+from routes.uploads import save_upload
 
 router = APIRouter(prefix="/summarize", tags=["Summarize"])
 
@@ -12,44 +19,95 @@ router = APIRouter(prefix="/summarize", tags=["Summarize"])
 DATA_DIR = Path(__file__).parent.parent / "data"
 SUMMARY_PATH = DATA_DIR / "summary.json"
 
+
+def save_summary(summary: dict) -> None:
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    with open(SUMMARY_PATH, "w", encoding="utf-8") as f:
+        json.dump({"summary": summary}, f, ensure_ascii=False, indent=2)
+
+
+def _summarize_job(params: dict, ctx: JobContext) -> dict:
+    """Job handler: summarize the text and write summary.json."""
+    from core.summarizer import summarize_text, summary_cache_key
+
+    def on_chunk(idx, chunk_summary):
+        ctx.chunk_done(idx, {"summary": chunk_summary})
+        ctx.check_cancelled()
+
+    mode = params.get("mode")
+    summary = summarize_text(params["text"], on_start=ctx.set_total, on_chunk=on_chunk, mode=mode)
+    get_artifact_store().put_json("summary", summary_cache_key(params["text"], mode), summary)
+    save_summary(summary)
+    return {"summary_path": str(SUMMARY_PATH), "summary": summary}
+
+
+register_job_handler("summarize", _summarize_job)
+
+
 @router.post("")
 async def summarize_from_file(
-    file: UploadFile = File(..., description="Upload a transcript file (.txt or .json)")
+    file: UploadFile = File(..., description="Upload a transcript file (.txt, .json or .ndjson)"),
+    background: bool = False,
+    mode: Optional[str] = Query(None, pattern="^(full|clustered)$",
+                                description="full: every chunk; clustered: representative passages only (default: SUMMARY_MODE)"),
 ):
-    """Accept a file, summarize it, and return the result."""
+    """Accept a file, summarize it, and return the result (or a job id when `background=true`)."""
+    from core.summarizer import summarize_text, summary_cache_key
+
     try:
         DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-        contents = await file.read()
+        with tempfile.TemporaryDirectory(prefix="sum_") as tmp:
+            upload = await save_upload(file, Path(tmp) / "upload")
+
+            # Try to decode the file content
+            try:
+                content_str = upload.path.read_text(encoding="utf-8")
+            except UnicodeDecodeError:
+                raise HTTPException(status_code=400, detail="Unable to decode file. Please upload a UTF-8 text or JSON file.")
 
-        # Try to decode the file content
-        try:
-            content_str = contents.decode("utf-8")
-        except UnicodeDecodeError:
-            raise HTTPException(status_code=400, detail="Unable to decode file. Please upload a UTF-8 text or JSON file.")
+            # NDJSON transcript (as served by /transcribe/download?format=ndjson)
+            if content_str.lstrip().startswith("{") and TRANSCRIPT_FORMAT in content_str.partition("\n")[0]:
+                ndjson = upload.path.with_suffix(".ndjson")
+                upload.path.replace(ndjson)
+                content_str = None
+                text = read_transcript(ndjson)["text"]
 
-        # Attempt to parse JSON (if possible)
-        try:
-            parsed = json.loads(content_str)
-            text = parsed.get("text", "")
-        except json.JSONDecodeError:
-            # If not JSON, treat as raw text
-            text = content_str
+        if content_str is not None:
+            # Attempt to parse JSON (if possible)
+            try:
+                parsed = json.loads(content_str)
+                text = parsed.get("text", "")
+            except json.JSONDecodeError:
+                # If not JSON, treat as raw text
+                text = content_str
 
         if not text.strip():
             raise HTTPException(status_code=400, detail="No text content found to summarize.")
 
-        summary = summarize_text(text)
+        store = get_artifact_store()
+        key = summary_cache_key(text, mode)
+        summary = store.get_json("summary", key)
+        cached = summary is not None
+
+        if not cached:
+            if background:
+                job_id = get_job_queue().submit("summarize", {"text": text, "mode": mode})
+                return {"message": "Summarization queued", "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+            summary = await run_in_threadpool(summarize_text, text, mode=mode)
+            store.put_json("summary", key, summary)
 
-        with open(SUMMARY_PATH, "w", encoding="utf-8") as f:
-            json.dump({"summary": summary}, f, ensure_ascii=False, indent=2)
+        save_summary(summary)
 
         return {
             "message": f"Summary saved to {SUMMARY_PATH.name}",
             "summary_path": str(SUMMARY_PATH),
+            "cached": cached,
             "summary": summary
         }
 
+    except HTTPException:
+        raise
     except Exception as exc:
         logging.exception("Summarization failed")
         raise HTTPException(status_code=500, detail=str(exc))
@@ -63,4 +121,4 @@ async def summarize_get():
         path=SUMMARY_PATH,
         media_type="application/json",
         filename="summary.json",
-    )
\ No newline at end of file
+    )
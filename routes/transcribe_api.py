@@ -1,52 +1,159 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pathlib import Path
-import json
 import logging
-from core.video2text import transcribe_video
+import uuid
+from typing import Optional
+from core.jobs import get_job_queue, register_job_handler, JobContext
+from core.artifacts import get_artifact_store
+from core.transcript_store import Transcript, write_transcript
+from routes.uploads import save_upload, safe_filename
 
 router = APIRouter(prefix="/transcribe", tags=["Transcription"])
 
 DATA_DIR = Path("data")
-DATA_DIR.mkdir(exist_ok=True)
+UPLOAD_DIR = DATA_DIR / "uploads"
+TRANSCRIPT_PATH = DATA_DIR / "transcript.ndjson"
+MAX_PAGE_SIZE = 1000
 
-@router.post("/transcribe-file")
+
+def write_latest_transcript(payload: dict) -> Path:
+    """Atomically refresh data/transcript.ndjson (served by /download) with the latest transcript."""
+    return write_transcript(TRANSCRIPT_PATH, payload.get("segments") or [], payload.get("text"))
+
+
+def _latest_transcript() -> Transcript:
+    if not TRANSCRIPT_PATH.exists():
+        raise HTTPException(status_code=404, detail="No transcript yet: run /transcribe first")
+    return Transcript(TRANSCRIPT_PATH)
+
+
+def _transcribe_job(params: dict, ctx: JobContext) -> dict:
+    """Job handler: transcribe the saved video and write transcript.ndjson."""
+    from core.video2text import transcribe_video
+
+    def on_chunk(idx, text, segments):
+        ctx.chunk_done(idx, {"text": text, "segments": segments})
+        ctx.check_cancelled()
+
+    text, segments = transcribe_video(
+        params["video_path"],
+        chunk_sec=params.get("chunk_sec", 600),
+        on_start=ctx.set_total,
+        on_chunk=on_chunk,
+    )
+    payload = {"text": text, "segments": segments}
+
+    # Memoize by video hash so a repeat upload skips Whisper entirely
+    get_artifact_store().put_json("transcript", params["cache_key"], payload)
+    transcript_path = write_latest_transcript(payload)
+
+    return {
+        "transcript_path": str(transcript_path),
+        "transcript_key": params["cache_key"],
+        "video_path": params["video_path"],
+        "transcript": payload,
+    }
+
+
+register_job_handler("transcribe", _transcribe_job)
+
+
+@router.post("/transcribe-file", status_code=202)
 async def transcribe_uploaded_video(
-    file: UploadFile = File(..., description="Upload a video file (e.g., .mp4)")
+    file: UploadFile = File(..., description="Upload a video file (e.g., .mp4)"),
+    chunk_sec: int = 600,
 ):
+    """
+    Save the upload and queue it for transcription. Poll /jobs/{job_id} for progress.
+    If this exact video was already transcribed with the same settings, the
+    cached transcript is returned straight away.
+    """
+    from core.video2text import transcript_cache_key
+
     try:
-        # Save the uploaded file temporarily inside /data
-        video_path = DATA_DIR / file.filename
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        with open(video_path, "wb") as f:
-            f.write(await file.read())
+        filename = safe_filename(file.filename)
+        upload = await save_upload(file, UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(filename).suffix}")
 
-        # Transcribe the video
-        text, segments = transcribe_video(str(video_path))
-        payload = {"text": text, "segments": segments}
+        store = get_artifact_store()
+        cache_key = transcript_cache_key(upload.sha256, chunk_sec)
+        cached = store.get_json("transcript", cache_key)
+        if cached is not None:
+            upload.path.unlink(missing_ok=True)
+            transcript_path = write_latest_transcript(cached)
+            return JSONResponse(status_code=200, content={
+                "message": "Transcript served from cache",
+                "cached": True,
+                "transcript_key": cache_key,
+                "transcript_path": str(transcript_path),
+                "transcript": cached,
+            })
 
-        # Save transcript to transcript.json in /data
-        transcript_path = DATA_DIR / "transcript.json"
-        with open(transcript_path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+        # Store the video under its content hash so concurrent uploads never clash
+        video_path = store.put_file("media", upload.sha256, upload.path, suffix=Path(filename).suffix)
+
+        job_id = get_job_queue().submit("transcribe", {
+            "video_path": str(video_path),
+            "chunk_sec": chunk_sec,
+            "cache_key": cache_key,
+        })
 
         return {
-            "message": f"Transcript saved to {transcript_path.name}",
-            "transcript_path": str(transcript_path),
+            "message": "Transcription queued",
+            "cached": False,
+            "job_id": job_id,
+            "status_url": f"/jobs/{job_id}",
+            "result_url": f"/jobs/{job_id}/result",
             "video_path": str(video_path),
-            "transcript": payload
+            "size": upload.size,
+            "sha256": upload.sha256,
         }
 
+    except HTTPException:
+        raise
     except Exception as exc:
         logging.exception("Transcription failed")
         raise HTTPException(status_code=500, detail=str(exc))
 
 @router.get("/download")
-async def transcribe_get():
-    transcript_path = DATA_DIR / "transcript.json"
-    if not transcript_path.exists():
-        raise HTTPException(status_code=404, detail="transcript.json not found")
+async def transcribe_get(format: str = Query("json", pattern="^(ndjson|json)$")):
+    """The latest transcript as the legacy transcript.json, or `format=ndjson` for one segment per line."""
+    transcript = _latest_transcript()
+    if format == "json":
+        return StreamingResponse(
+            transcript.iter_legacy_json(),
+            media_type="application/json",
+            headers={"Content-Disposition": 'attachment; filename="transcript.json"'},
+        )
     return FileResponse(
-        path=transcript_path,
-        media_type="application/json",
-        filename="transcript.json",
-    )
\ No newline at end of file
+        path=TRANSCRIPT_PATH,
+        media_type="application/x-ndjson",
+        filename="transcript.ndjson",
+    )
+
+@router.get("/segments")
+async def transcribe_segments(
+    start: float = Query(0.0, ge=0),
+    end: Optional[float] = Query(None, ge=0),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    One page of segments, optionally limited to the [start, end) time range
+    (seconds). `next_offset` continues the same range; null on the last page.
+    """
+    if end is not None and end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    transcript = _latest_transcript()
+    first, stop = transcript.span(start, end)
+    segments = list(transcript.between(start, end, offset=offset, limit=limit))
+    next_offset = offset + limit if first + offset + limit < stop else None
+    return {"total": len(transcript), "duration": transcript.duration,
+            "offset": offset, "next_offset": next_offset, "segments": segments}
+
+@router.get("/text")
+async def transcribe_text(start: float = Query(..., ge=0), end: float = Query(..., ge=0)):
+    """Transcript text spoken between `start` and `end` seconds."""
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be greater than start")
+    return {"start": start, "end": end, "text": _latest_transcript().text_between(start, end)}
@@ -0,0 +1,73 @@
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from core.metrics import timed, UPLOAD_BYTES
+
+log = logging.getLogger(__name__)
+
+# ─── Config ──────────────────────────────────────────────────
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))          # 1 MiB
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(4 * 1024 * 1024 * 1024)))   # 4 GiB
+
+
+@dataclass
+class SavedUpload:
+    path: Path
+    sha256: str
+    size: int
+
+
+def safe_filename(filename: str) -> str:
+    """Strip any directory components a client may have sent."""
+    name = Path(filename or "").name
+    if not name or name in {".", ".."}:
+        raise HTTPException(status_code=400, detail="Invalid upload filename")
+    return name
+
+
+async def save_upload(upload: UploadFile, dest: Path, max_bytes: int = MAX_UPLOAD_BYTES) -> SavedUpload:
+    """
+    Stream an upload to `dest` in fixed-size chunks, hashing on the fly.
+
+    The data goes to a temp file next to `dest` and is only moved into place
+    once complete, so a failed or oversized upload never leaves a partial file.
+    Peak memory is one chunk regardless of upload size.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_name = tempfile.mkstemp(prefix=".upload_", dir=dest.parent)
+    tmp_path = Path(tmp_name)
+    try:
+        with timed("upload"), os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Upload exceeds the {max_bytes // (1024 * 1024)} MiB limit",
+                    )
+                digest.update(chunk)
+                UPLOAD_BYTES.inc(len(chunk))
+                await run_in_threadpool(out.write, chunk)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        await upload.close()
+
+    log.info("⬆️ Saved upload %s (%d bytes)", dest.name, size)
+    return SavedUpload(path=dest, sha256=digest.hexdigest(), size=size)
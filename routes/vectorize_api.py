@@ -1,4 +1,3 @@
-import json
 import logging
 import tempfile
 import shutil
@@ -7,93 +6,210 @@ from typing import List
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
-from core.document_vectorizer import DocumentVectorizer
+from core.jobs import get_job_queue, register_job_handler, JobContext
+from core.artifacts import get_artifact_store, artifact_key, sha256_text
+from core.vector_collections import collection_path, list_collections, DEFAULT_COLLECTION
+from core.segments import export_index, has_index, live_segments, store_footprint
+from core.transcript_store import Transcript, index_path, read_transcript, write_transcript
+from routes.uploads import save_upload, safe_filename
 
 router = APIRouter(prefix="/vectorize", tags=["Vectorize"])
 
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+def _collection_dir(collection: str) -> Path:
+    try:
+        return collection_path(collection)
+    except ValueError as exc:
+        raise HTTPException(400, detail=str(exc))
+
+
+def _ingest_key(upload_hashes: List[str], collection: str) -> str:
+    """Identify an ingest by the exact set of uploaded files, the target collection, chunking and embedding model."""
+    from core.embeddings import EMBEDDING_BACKEND, EMBEDDING_MODEL
+
+    return artifact_key(
+        sha256_text("|".join(sorted(upload_hashes))),
+        collection=collection,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        embedding_backend=EMBEDDING_BACKEND,
+        embedding_model=EMBEDDING_MODEL,
+    )
+
+
+def _vectorize_dir(work_dir: Path, saved: List[str], ingest_key: str, collection: str) -> dict:
+    # LangChain / FAISS / unstructured are only needed once there is something to ingest
+    from core.document_vectorizer import DocumentVectorizer
+    from core.embeddings import shared_embeddings
+
+    logging.info("📂 Vectorizing %s (%d docs) into '%s'", work_dir, len(saved), collection)
+
+    # Sources are stored as the uploaded filenames, not the temp dir they were saved in
+    vec = DocumentVectorizer(embeddings=shared_embeddings(), source_root=str(work_dir))
+    stores = vec.vectorize_by_format(
+        input_path=str(work_dir),
+        output_dir=str(collection_path(collection)),
+        combine_all=True,
+        batch_size=16,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+    )
+
+    chunks = sum(stores.values())
+    result = {
+        "vector_store_path": str(collection_path(collection)),
+        "collection": collection,
+        "chunks": chunks,
+        "saved_files": saved,
+    }
+    get_artifact_store().put_json("ingest", ingest_key, result)
+    return result
+
+
+def _vectorize_job(params: dict, ctx: JobContext) -> dict:
+    """Job handler: vectorize an already-saved work dir, then remove it."""
+    work_dir = Path(params["work_dir"])
+    try:
+        ctx.set_total(1)
+        ctx.check_cancelled()
+        result = _vectorize_dir(
+            work_dir, params["saved_files"], params["ingest_key"], params.get("collection", DEFAULT_COLLECTION)
+        )
+        ctx.chunk_done(0, {"chunks": result["chunks"]})
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+register_job_handler("vectorize", _vectorize_job)
+
+
 @router.post("")
-async def vectorize_post(files: List[UploadFile] = File(...)):
+async def vectorize_post(
+    files: List[UploadFile] = File(...),
+    background: bool = False,
+    collection: str = DEFAULT_COLLECTION,
+):
     """
     Upload:
-      • transcript.json      (required, contains {"text": "...", "segments":[]})
+      • transcript.json      (required, contains {"text": "...", "segments":[]};
+                              or transcript.ndjson from /transcribe/download?format=ndjson)
       • optional other docs  (pdf, pptx, png…)
-    Builds / updates vector_db/ FAISS index and returns chunk count.
+    Builds / updates the FAISS index of `collection` and returns chunk count
+    (or a job id when `background=true`).
     """
+    store_dir = _collection_dir(collection)
 
     transcript_file = None
     other_files = []
 
     for up in files:
-        if up.filename.lower().endswith(".json") and transcript_file is None:
+        if up.filename.lower().endswith((".json", ".ndjson")) and transcript_file is None:
             transcript_file = up
         else:
             other_files.append(up)
 
     if transcript_file is None:
-        raise HTTPException(400, detail="Upload must include transcript.json")
-
-    try:
-        data = json.loads((await transcript_file.read()).decode())
-        transcript_text = data["text"]
-    except Exception as exc:
-        raise HTTPException(400, detail=f"Invalid transcript.json: {exc}")
+        raise HTTPException(400, detail="Upload must include transcript.json or transcript.ndjson")
 
     work_dir = Path(tempfile.mkdtemp(prefix="vect_"))
+    queued = False
 
     try:
-        (work_dir / "transcript.txt").write_text(transcript_text, encoding="utf-8")
-
-        saved = ["transcript.txt"]
+        # Dot-prefixed so the directory loader skips the raw upload
+        suffix = Path(transcript_file.filename).suffix.lower()
+        transcript_upload = await save_upload(transcript_file, work_dir / f".transcript{suffix}")
+        raw_transcript = transcript_upload.path
+        upload_hashes = [transcript_upload.sha256]
+        transcript_path = work_dir / "transcript.ndjson"
+        try:
+            if suffix == ".ndjson":
+                Transcript(raw_transcript)  # validates the header and builds the index
+                raw_transcript.replace(transcript_path)
+            else:
+                # Kept as segments (not flattened to text) so chunks carry their timestamps
+                transcript = read_transcript(raw_transcript)
+                write_transcript(transcript_path, transcript["segments"], transcript["text"])
+                del transcript
+        except Exception as exc:
+            raise HTTPException(400, detail=f"Invalid transcript{suffix}: {exc}")
+        finally:
+            raw_transcript.unlink(missing_ok=True)
+            index_path(raw_transcript).unlink(missing_ok=True)
+
+        saved = ["transcript.ndjson"]
         for up in other_files:
-            dest = work_dir / up.filename
-            dest.write_bytes(await up.read())
-            saved.append(dest.name)
-
-        logging.info("📂 Vectorizing %s (%d docs)", work_dir, len(saved))
-
-        vec = DocumentVectorizer()
-        stores = vec.vectorize_by_format(
-            input_path=str(work_dir),
-            output_dir="data/vector_db",
-            combine_all=True,
-            batch_size=16,
-            chunk_size=1000,
-            chunk_overlap=200,
-        )
-
-        chunks = sum(s.index.ntotal for s in stores.values()) if stores else 0
-        return {
-            "vector_store_path": "vector_db",
-            "chunks": chunks,
-            "saved_files": saved,
-        }
-
+            upload = await save_upload(up, work_dir / safe_filename(up.filename))
+            upload_hashes.append(upload.sha256)
+            saved.append(upload.path.name)
+
+        # The same files were already ingested into this store: don't add them twice
+        ingest_key = _ingest_key(upload_hashes, collection)
+        cached = get_artifact_store().get_json("ingest", ingest_key)
+        if cached is not None and has_index(store_dir):
+            return {**cached, "cached": True}
+
+        if background:
+            job_id = get_job_queue().submit("vectorize", {
+                "work_dir": str(work_dir),
+                "saved_files": saved,
+                "ingest_key": ingest_key,
+                "collection": collection,
+            })
+            queued = True
+            return {"message": "Vectorization queued", "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+        return await run_in_threadpool(_vectorize_dir, work_dir, saved, ingest_key, collection)
+
+    except HTTPException:
+        raise
     except Exception as exc:
         logging.exception("Vectorization failed")
         raise HTTPException(500, detail=str(exc))
 
     finally:
-        shutil.rmtree(work_dir, ignore_errors=True)
+        # Background jobs own (and clean up) their work dir
+        if not queued:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+@router.get("/collections")
+async def vectorize_collections():
+    return {"collections": list_collections()}
 
 @router.get("/download")
-async def vectorize_download():
-    index_path = Path("data/vector_db/index.faiss")
-    if not index_path.exists():
-        raise HTTPException(status_code=404, detail="index.faiss not found in data/vector_db")
+async def vectorize_download(collection: str = DEFAULT_COLLECTION):
+    store_dir = _collection_dir(collection)
+    if not has_index(store_dir):
+        raise HTTPException(status_code=404, detail=f"index.faiss not found for collection '{collection}'")
+    # Every live segment merged into a temporary file; the store itself is left as it is
+    export_dir = Path(tempfile.mkdtemp(prefix="export_"))
+    try:
+        index_path = await run_in_threadpool(export_index, store_dir, export_dir)
+    except BaseException:
+        shutil.rmtree(export_dir, ignore_errors=True)
+        raise
     return FileResponse(
         path=index_path,
         media_type="application/octet-stream",
         filename="index.faiss",
+        background=BackgroundTask(shutil.rmtree, export_dir, ignore_errors=True),
     )
 
 @router.get("")
-async def vectorize_info():
-    index_path = Path("data/vector_db/index.faiss")
-    if not index_path.exists():
+async def vectorize_info(collection: str = DEFAULT_COLLECTION):
+    store_dir = _collection_dir(collection)
+    if not has_index(store_dir):
         return {"status": "not_ready", "message": "Run /vectorize to generate the vector store."}
     return {
         "status": "ready",
-        "path": str(index_path),
-        "size_kb": index_path.stat().st_size // 1024
+        "collection": collection,
+        "path": str(store_dir),
+        "segments": len(live_segments(store_dir)),
+        "size_kb": store_footprint(store_dir) // 1024
     }
\ No newline at end of file
@@ -1,19 +1,41 @@
 import sys
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from routes.transcribe_api import router as transcribe_router
 from routes.summarize_api import router as summarize_router
 from routes.vectorize_api import router as vectorize_router
 from routes.chat_api import router as chat_router
+from routes.search_api import router as search_router
+from routes.jobs_api import router as jobs_router
+from routes.pipeline_api import router as pipeline_router
+from routes.health_api import router as health_router, start_background_startup
+from routes.admission import AdmissionMiddleware
+from core.metrics import (
+    HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT,
+    begin_request, end_request, render_metrics,
+)
 
 
 sys.path.append(str(Path(__file__).resolve().parent))
 
-app = FastAPI(title="Knowledge API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Routers import their heavy dependencies lazily; WARMUP=1 loads them here instead
+    start_background_startup()
+    yield
+
+app = FastAPI(title="Knowledge API", lifespan=lifespan)
 
+# Innermost: shed responses still get CORS headers and show up in the request metrics
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,11 +43,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+timing_log = logging.getLogger("request_timing")
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """Count and time every request; expose its per-stage breakdown as Server-Timing and a JSON log line."""
+    token = begin_request()
+    start = time.perf_counter()
+    status = 500
+    HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        elapsed = time.perf_counter() - start
+        stages = end_request(token)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
+        HTTP_LATENCY.observe(elapsed, method=request.method, route=route)
+        timing_log.info(json.dumps({
+            "method": request.method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 2),
+            "stages_ms": {k: round(v * 1000, 2) for k, v in stages.items()},
+        }))
+
+    response.headers["Server-Timing"] = ", ".join(
+        [f"{k};dur={v * 1000:.2f}" for k, v in stages.items()] + [f"total;dur={elapsed * 1000:.2f}"]
+    )
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Register routers
-app.include_router(transcribe_router, prefix="/transcribe")
-app.include_router(summarize_router, prefix="/summarize")
-app.include_router(vectorize_router, prefix="/vectorize")
-app.include_router(chat_router, prefix="/chat")
+# Each router declares its own prefix (/transcribe, /chat, …): routes/admission.py keys on those paths
+app.include_router(transcribe_router)
+app.include_router(summarize_router)
+app.include_router(vectorize_router)
+app.include_router(chat_router)
+app.include_router(search_router)
+app.include_router(jobs_router)
+app.include_router(pipeline_router)
+app.include_router(health_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Run from anywhere: `core` and `routes` are imported as top-level packages
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
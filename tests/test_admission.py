@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from core.admission import AdmissionController, AdmissionRejected
+from core.openai_clients import BATCH, INTERACTIVE
+
+
+def _controller(priority=INTERACTIVE, concurrency=1, queue_depth=1, max_wait=5.0) -> AdmissionController:
+    return AdmissionController({"g": (priority, concurrency, queue_depth, max_wait)})
+
+
+# ─── Controller ──────────────────────────────────────────────
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire("g")                       # takes the only slot
+        waiter = asyncio.ensure_future(controller.acquire("g"))
+        await asyncio.sleep(0)                              # now queued
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("g")
+        controller.release("g")
+        await waiter                                        # the queued request gets the slot
+        controller.release("g")
+        return exc.value, controller.stats()["g"]
+
+    rejected, stats = asyncio.run(scenario())
+    assert rejected.status == 429 and rejected.reason == "queue_full"
+    assert rejected.retry_after >= 1
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+
+def test_queue_timeout_is_rejected_with_503_and_leaves_the_queue():
+    async def scenario():
+        controller = _controller(max_wait=0.05)
+        await controller.acquire("g")
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("g")
+        stats = controller.stats()["g"]
+        controller.release("g")
+        return exc.value, stats
+
+    rejected, stats = asyncio.run(scenario())
+    assert rejected.status == 503 and rejected.reason == "queue_timeout"
+    assert stats["queued"] == 0
+
+
+def test_batch_waits_behind_queued_interactive():
+    async def scenario():
+        controller = AdmissionController({"chat": (INTERACTIVE, 1, 4, 5.0), "ingest": (BATCH, 4, 4, 5.0)})
+        await controller.acquire("chat")
+        chat = asyncio.ensure_future(controller.acquire("chat"))
+        await asyncio.sleep(0)
+        ingest = asyncio.ensure_future(controller.acquire("ingest"))
+        await asyncio.sleep(0)
+        queued_batch = controller.stats()["ingest"]["queued"]
+        controller.release("chat")
+        await asyncio.gather(chat, ingest)
+        return queued_batch
+
+    assert asyncio.run(scenario()) == 1
+
+
+# ─── Middleware ──────────────────────────────────────────────
+async def _call(middleware, method: str, path: str):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "raw_path": path.encode(), "query_string": b"",
+             "root_path": "", "headers": [], "scheme": "http", "http_version": "1.1",
+             "server": ("testserver", 80), "client": ("testclient", 1)}
+    await middleware(scope, receive, send)
+    start = next(m for m in sent if m["type"] == "http.response.start")
+    return start["status"], {k.decode().lower(): v.decode() for k, v in start["headers"]}
+
+
+@pytest.fixture
+def job_queue(tmp_path, monkeypatch):
+    import core.jobs as jobs
+
+    queue = jobs.JobQueue(tmp_path / "jobs.db", max_workers=1)
+    monkeypatch.setattr(jobs, "_queue", queue)
+    return queue
+
+
+@pytest.mark.parametrize("group", ["chat", "transcribe", "vectorize", "summarize", "pipeline"])
+def test_burst_is_shed_with_retry_after(group, job_queue, monkeypatch):
+    pytest.importorskip("starlette")
+    import core.admission as admission
+    from routes.admission import ROUTE_GROUPS, AdmissionMiddleware
+
+    method, path = next(route for route, g in ROUTE_GROUPS.items() if g == group)
+    priority = admission.DEFAULT_GROUPS[group][0]
+    monkeypatch.setattr(admission, "_controller", AdmissionController({group: (priority, 1, 1, 5.0)}))
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = AdmissionMiddleware(app)
+        running = asyncio.ensure_future(_call(middleware, method, path))
+        queued = asyncio.ensure_future(_call(middleware, method, path))
+        await asyncio.sleep(0.01)
+        shed = await _call(middleware, method, path)
+        release.set()
+        return shed, await running, await queued
+
+    (status, headers), ok, queued = asyncio.run(scenario())
+    assert status == 429
+    assert int(headers["retry-after"]) >= 1
+    assert ok[0] == 200 and queued[0] == 200
+
+
+def test_job_backlog_sheds_batch_routes(job_queue, monkeypatch):
+    pytest.importorskip("starlette")
+    import routes.admission as route_admission
+
+    monkeypatch.setattr(route_admission, "JOB_MAX_QUEUED", 0)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    status, headers = asyncio.run(_call(route_admission.AdmissionMiddleware(app), "POST", "/vectorize"))
+    assert status == 503 and "retry-after" in headers
+
+
+def test_route_table_matches_mounted_routes():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("dotenv")
+    from server import app
+    from routes.admission import ROUTE_GROUPS
+
+    mounted = {(method.upper(), path) for path, ops in app.openapi()["paths"].items() for method in ops}
+    assert set(ROUTE_GROUPS) <= mounted
@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+from core import artifacts
+from core.artifacts import ArtifactStore, artifact_key, sha256_text
+
+
+@pytest.fixture(autouse=True)
+def no_guards(monkeypatch):
+    monkeypatch.setattr(artifacts, "_GC_GUARDS", [])
+
+
+def _age(path, seconds: float) -> None:
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+def test_json_round_trip_and_keys(tmp_path):
+    store = ArtifactStore(tmp_path)
+    key = artifact_key(sha256_text("hello"), model="base", lang=None)
+    assert key == artifact_key(sha256_text("hello"), lang=None, model="base")
+    assert key != artifact_key(sha256_text("hello"), model="small", lang=None)
+
+    assert store.get_json("t", key) is None
+    store.put_json("t", key, {"text": "héllo"})
+    assert store.get_json("t", key) == {"text": "héllo"}
+    assert store.memoize("t", key, lambda: pytest.fail("cached")) == {"text": "héllo"}
+    assert (store.hits, store.misses) == (2, 1)
+
+
+def test_size_is_tracked_across_writes_and_overwrites(tmp_path):
+    store = ArtifactStore(tmp_path)
+    store.put_json("t", "aa1", "x" * 100)
+    store.put_json("t", "bb2", "y" * 50)
+    store.put_json("t", "aa1", "z" * 10)
+    assert store._size == sum(size for _, size, _ in store._scan())
+
+
+def test_gc_evicts_least_recently_used_outside_the_grace_period(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=10 ** 9, grace_sec=60)
+    paths = {name: store.put_json("t", name, "x" * 1000) for name in ("old1", "old2", "new1")}
+    _age(paths["old1"], 3000)
+    _age(paths["old2"], 2000)
+
+    freed = store.gc(max_bytes=1500)
+    # old1 goes first; old2 is next in line; new1 is within the grace period and stays
+    assert freed > 0
+    assert not paths["old1"].exists() and not paths["old2"].exists()
+    assert paths["new1"].exists()
+    assert store._size == paths["new1"].stat().st_size
+
+
+def test_gc_keeps_guarded_paths(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=10 ** 9, grace_sec=0)
+    kept = store.put_json("t", "keep", "x" * 1000)
+    dropped = store.put_json("t", "drop", "x" * 1000)
+    _age(kept, 3000)
+    _age(dropped, 2000)
+    artifacts.register_gc_guard(lambda: [str(kept)])
+
+    store.gc(max_bytes=0)
+    assert kept.exists() and not dropped.exists()
+
+
+def test_writes_over_budget_trigger_gc(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=2500, grace_sec=0)
+    first = store.put_json("t", "first", "x" * 1000)
+    _age(first, 100)
+    store.put_json("t", "second", "x" * 1000)
+    store.put_json("t", "third", "x" * 1000)
+
+    assert not first.exists()
+    assert store._size <= 2500 * artifacts.ARTIFACTS_GC_TARGET
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.dedup import ChunkDeduplicator, dedup_documents
+
+LONG = " ".join(f"sentence {i} of the lecture covers topic {i * 7 % 13} with an example." for i in range(12))
+
+
+def _doc(text: str, **metadata):
+    return SimpleNamespace(page_content=text, metadata=dict(metadata))
+
+
+def test_exact_and_near_duplicates_merge_into_first():
+    docs = [_doc(LONG, source="a"), _doc(LONG.upper() + "  ", source="b"),
+            _doc(LONG.replace("sentence 5 ", "sentence five "), source="c"), _doc("something else entirely", source="d")]
+    kept = dedup_documents(docs)
+
+    assert [d.metadata["source"] for d in kept] == ["a", "d"]
+    assert kept[0].metadata["duplicates"] == 2
+    assert [s["source"] for s in kept[0].metadata["sources"]] == ["a", "b", "c"]
+
+
+def test_state_spans_batches():
+    deduplicator = ChunkDeduplicator()
+    first = deduplicator.dedup([_doc(LONG, source="batch1"), _doc("short chunk", source="batch1")])
+    second = deduplicator.dedup([_doc(LONG, source="batch2"), _doc("short chunk", source="batch2"),
+                                 _doc("new text", source="batch2")])
+
+    assert len(first) == 2
+    assert [d.page_content for d in second] == ["new text"]
+    assert first[0].metadata["duplicates"] == 1
+
+
+def test_streamed_file_is_deduplicated_across_batches(tmp_path, monkeypatch):
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain_community")
+    import core.artifacts as artifacts
+    import core.streaming_loaders as streaming_loaders
+    from core.document_vectorizer import DocumentProcessor
+    from core.segments import live_segments
+    from test_segments import FakeEmbeddings
+
+    class CountingEmbeddings(FakeEmbeddings):
+        def embed_documents(self, texts):
+            return [[float(len(t)), 1.0] for t in texts]
+
+    monkeypatch.setattr(artifacts, "_store", artifacts.ArtifactStore(tmp_path / "artifacts"))
+    monkeypatch.setattr(streaming_loaders, "ROWS_PER_DOC", 1)
+    csv = tmp_path / "rows.csv"
+    # One row per document, two documents per batch: the repeats land in later batches
+    texts = ["alpha", "bravo", "charlie"]
+    csv.write_text("name\n" + "".join(f"{texts[i % 3]}\n" for i in range(9)), encoding="utf-8")
+
+    processor = DocumentProcessor(embeddings=CountingEmbeddings())
+    monkeypatch.setattr("core.document_vectorizer.iter_document_batches",
+                        lambda path, file_type: streaming_loaders.iter_document_batches(path, file_type, 2))
+    written = processor.create_vector_store_streaming(str(csv), "spreadsheet", str(tmp_path / "store"))
+
+    assert written == 3
+    assert len(live_segments(tmp_path / "store")) == 1
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+import core.embeddings as embeddings
+
+
+@pytest.fixture
+def created(monkeypatch):
+    calls = []
+
+    def fake_create(backend=None, model=None, *args, **kwargs):
+        calls.append((backend, model))
+        return object()
+
+    monkeypatch.setattr(embeddings, "create_embeddings", fake_create)
+    monkeypatch.setattr(embeddings, "_shared", {})
+    return calls
+
+
+def test_shared_embeddings_load_once_per_backend_and_model(created):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(embeddings.shared_embeddings("local", "m1")))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({id(r) for r in results}) == 1
+    assert embeddings.shared_embeddings("local", "m2") is not results[0]
+    assert created == [("local", "m1"), ("local", "m2")]
+
+
+def test_document_processor_reuses_the_shared_instance(created):
+    pytest.importorskip("langchain_community")
+    from core.document_vectorizer import DocumentProcessor
+
+    assert DocumentProcessor().embeddings is DocumentProcessor().embeddings
+    assert len(created) == 1
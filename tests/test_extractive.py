@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.extractive import GAP_MARKER, coverage, pack_passages, representatives, select_passages
+
+
+def _corpus(n: int, dim: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(200, 1000, size=n)
+    passages = [f"p{i} " + "x" * int(length) for i, length in enumerate(lengths)]
+    return passages, rng.normal(size=(n, dim)).astype("float32")
+
+
+@pytest.mark.parametrize("n", [50, 800, 5000])
+@pytest.mark.parametrize("max_calls, per_cluster", [(4, 1), (12, 3)])
+def test_selection_packs_into_at_most_max_calls(n, max_calls, per_cluster):
+    passages, vectors = _corpus(n)
+    max_chars = 6000
+    selected = select_passages(passages, vectors, max_chars, max_calls, per_cluster=per_cluster)
+
+    assert selected == sorted(set(selected))
+    inputs = pack_passages(passages, selected, max_chars)
+    assert 1 <= len(inputs) <= max_calls
+    assert all(len(text) <= max_chars for text in inputs)
+
+
+def test_small_inputs_keep_every_passage():
+    passages, vectors = _corpus(5)
+    selected = select_passages(passages, vectors, max_chars=20000, max_calls=2)
+    assert selected == list(range(5))
+    assert coverage(vectors, selected) == pytest.approx(1.0)
+
+
+def test_pack_marks_gaps_and_keeps_order():
+    passages = ["a", "b", "c", "d"]
+    assert pack_passages(passages, [0, 1, 3], max_chars=100) == ["a\n\nb" + GAP_MARKER + "d"]
+    assert pack_passages(passages, [0, 1, 3], max_chars=4) == ["a\n\nb", "d"]
+
+
+def test_representatives_pick_one_per_cluster():
+    rng = np.random.default_rng(1)
+    centers = np.eye(4, 16, dtype="float32") * 10
+    vectors = np.concatenate([c + rng.normal(scale=0.1, size=(25, 16)) for c in centers]).astype("float32")
+
+    selected = representatives(vectors, k=4, seed=0)
+    assert sorted({i // 25 for i in selected}) == [0, 1, 2, 3]
+    assert coverage(vectors, selected) > coverage(vectors, selected[:1])
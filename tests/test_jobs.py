@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from core.jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobCancelled, JobQueue
+
+
+def _wait(queue: JobQueue, job_id: str, statuses=(DONE, FAILED, CANCELLED), timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {queue.get(job_id)['status']}")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "jobs.db", max_workers=1)
+
+
+def test_submit_runs_the_handler_and_records_chunks(queue):
+    def handler(params, ctx):
+        ctx.set_total(2)
+        for i in range(2):
+            ctx.chunk_done(i, {"n": params["n"] + i})
+        return {"sum": params["n"] * 2 + 1}
+
+    queue.register("add", handler)
+    job_id = queue.submit("add", {"n": 5})
+
+    job = _wait(queue, job_id)
+    assert job["status"] == DONE
+    assert job["progress"] == {"done": 2, "total": 2}
+    assert queue.result(job_id) == {"sum": 11}
+    assert [c["result"] for c in queue.chunks(job_id)] == [{"n": 5}, {"n": 6}]
+
+
+def test_unknown_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit("nope", {})
+
+
+def test_handler_error_fails_the_job(queue):
+    def handler(params, ctx):
+        raise RuntimeError("boom")
+
+    queue.register("bad", handler)
+    job = _wait(queue, queue.submit("bad", {}))
+    assert job["status"] == FAILED and job["error"] == "boom"
+
+
+def test_cancel_queued_and_running_jobs(queue):
+    started, release = threading.Event(), threading.Event()
+
+    def handler(params, ctx):
+        started.set()
+        release.wait(5)
+        ctx.check_cancelled()
+        return "finished"
+
+    queue.register("slow", handler)
+    running = queue.submit("slow", {})
+    assert started.wait(5)
+    queued = queue.submit("slow", {})         # one worker: waits behind `running`
+
+    assert queue.cancel(queued)
+    assert queue.get(queued)["status"] == CANCELLED
+    assert queue.cancel(running)
+    release.set()
+
+    assert _wait(queue, running)["status"] == CANCELLED
+    assert queue.get(queued)["started_at"] is None
+    assert not queue.cancel(running)           # already final
+
+
+def test_restart_requeues_running_jobs(tmp_path):
+    db = tmp_path / "jobs.db"
+    first = JobQueue(db, max_workers=1)
+    first.register("work", lambda params, ctx: None)
+    job_id = first.submit("work", {"path": "/data/video.mp4"})
+    _wait(first, job_id)
+    # Simulate a crash mid-job: the row is left "running"
+    first._execute("UPDATE jobs SET status = ?, finished_at = NULL WHERE id = ?", (RUNNING, job_id))
+
+    second = JobQueue(db, max_workers=1)
+    assert second.get(job_id)["status"] == QUEUED
+    assert second.input_paths() == ["/data/video.mp4"]
+    assert second.queued() == 1
+
+    ran = threading.Event()
+    second.register("work", lambda params, ctx: ran.set() or "again")
+    assert _wait(second, job_id)["status"] == DONE
+    assert ran.is_set() and second.result(job_id) == "again"
+    assert second.input_paths() == []
+
+
+def test_check_cancelled_raises(queue):
+    seen = []
+
+    def handler(params, ctx):
+        ctx.queue.cancel(ctx.job_id)
+        try:
+            ctx.check_cancelled()
+        except JobCancelled:
+            seen.append(True)
+            raise
+
+    queue.register("self_cancel", handler)
+    assert _wait(queue, queue.submit("self_cancel", {}))["status"] == CANCELLED
+    assert seen == [True]
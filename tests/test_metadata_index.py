@@ -0,0 +1,49 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.metadata_index import MetadataBitmapIndex
+
+METADATAS = [
+    {"doc_type": "pdf", "source": "week1.pdf"},
+    {"doc_type": "txt", "source": "notes.txt"},
+    {"doc_type": "pdf", "source": "week2.pdf",
+     "sources": [{"doc_type": "pdf", "source": "week1.pdf"}]},    # a merged duplicate
+    {"doc_type": "docx", "source": "plan.docx", "page": 3},
+    {},
+]
+
+
+@pytest.fixture
+def index():
+    return MetadataBitmapIndex.build(METADATAS, ntotal=11, fields=("doc_type", "source"))
+
+
+def _ids(bitmap, ntotal=11):
+    return np.flatnonzero(np.unpackbits(bitmap, bitorder="little")[:ntotal]).tolist()
+
+
+def test_covers_only_plain_filters_on_indexed_fields(index):
+    assert index.covers({"doc_type": "pdf"})
+    assert index.covers({"doc_type": ["pdf", "txt"], "source": "week1.pdf"})
+    assert not index.covers({})
+    assert not index.covers({"page": 3})
+    assert not index.covers({"doc_type": {"$in": ["pdf"]}})
+    assert not index.covers("doc_type = pdf")
+
+
+def test_select_ors_within_a_field_and_ands_across_fields(index):
+    bitmap, count = index.select({"doc_type": ["pdf", "txt"]})
+    assert len(bitmap) == 2                          # ceil(11 / 8) bytes, as IDSelectorBitmap expects
+    assert (_ids(bitmap), count) == ([0, 1, 2], 3)
+
+    bitmap, count = index.select({"doc_type": "pdf", "source": "week1.pdf"})
+    assert (_ids(bitmap), count) == ([0, 2], 2)      # id 2 matches through its merged source
+
+    bitmap, count = index.select({"source": "missing.pdf"})
+    assert (_ids(bitmap), count) == ([], 0)
+
+
+def test_values(index):
+    assert index.values("doc_type") == ["docx", "pdf", "txt"]
+    assert index.values("page") == []
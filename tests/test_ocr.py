@@ -0,0 +1,65 @@
+import hashlib
+import os
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("PIL")
+
+import core.artifacts as artifacts
+import core.ocr as ocr
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = artifacts.ArtifactStore(tmp_path / "artifacts")
+    monkeypatch.setattr(artifacts, "_store", store)
+    return store
+
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    # Forked workers inherit the patch; the text tells pages apart by their pixels
+    monkeypatch.setattr(ocr, "_tesseract", lambda image, lang: hashlib.sha1(image.tobytes()).hexdigest())
+
+
+@pytest.fixture
+def parent_only_store(monkeypatch):
+    """Fail any artifact store access from an OCR worker process."""
+    parent = os.getpid()
+    for name in ("get_json", "put_json"):
+        original = getattr(artifacts.ArtifactStore, name)
+
+        def guarded(self, *args, _original=original, **kwargs):
+            assert os.getpid() == parent, "artifact store used in an OCR worker"
+            return _original(self, *args, **kwargs)
+
+        monkeypatch.setattr(artifacts.ArtifactStore, name, guarded)
+
+
+def _pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        doc.new_page(width=200, height=200).insert_text((20, 100), text)
+    doc.save(str(path))
+    return str(path)
+
+
+def test_pdf_pages_are_cached_in_the_parent(tmp_path, store, fake_tesseract, parent_only_store, monkeypatch):
+    pdf = _pdf(tmp_path / "scan.pdf", ["first page", "second page", "first page"])
+
+    texts = ocr.ocr_pdf_pages(pdf, [0, 1, 2], dpi=50, workers=2)
+    assert set(texts) == {0, 1, 2}
+    assert texts[0] == texts[2] != texts[1]
+    assert len(list((store.root / "ocr").rglob("*.json"))) == 2
+
+    # Everything is cached now: no page is OCR'd again, even inline
+    monkeypatch.setattr(ocr, "_tesseract", lambda image, lang: pytest.fail("cached page OCR'd again"))
+    assert ocr.ocr_pdf_pages(pdf, [0, 1, 2], dpi=50, workers=1) == texts
+
+
+def test_inline_run_leaves_omp_limit_alone(tmp_path, store, fake_tesseract, monkeypatch):
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+    ocr.ocr_pdf_pages(_pdf(tmp_path / "one.pdf", ["only page"]), [0], dpi=50)
+
+    assert "OMP_THREAD_LIMIT" not in os.environ
@@ -0,0 +1,109 @@
+import random
+import threading
+import time
+
+import pytest
+
+from core import scheduler
+from core.scheduler import AdaptiveConcurrency, ordered, run_two_stage
+
+
+class Throttled(Exception):
+    pass
+
+
+def test_limit_halves_on_throttle_and_drops_on_slow_calls():
+    limit = AdaptiveConcurrency("test", initial=8, minimum=1, maximum=8)
+    limit.acquire()
+    limit.release(throttled=True)
+    assert limit.limit == 4
+
+    limit.acquire()
+    limit.release(latency=1.0)                 # sets the baseline
+    limit.acquire()
+    limit.release(latency=5.0)                 # > 2× baseline: something is queueing
+    assert limit.limit == 3
+
+    for _ in range(5):
+        limit.acquire()
+        limit.release(throttled=True)
+    assert limit.limit == 1                    # never below the minimum
+
+
+def test_limit_grows_only_when_saturated():
+    limit = AdaptiveConcurrency("test", initial=1, maximum=3)
+    limit.acquire()
+    limit.release(latency=1.0)                 # used the whole limit → +1/limit
+    assert limit.limit == 2
+
+    limit.acquire()                            # 1 of 2 in flight: not saturated
+    limit.release(latency=1.0)
+    assert limit.limit == 2
+
+    for _ in range(20):
+        limit.acquire()
+        limit.acquire()
+        limit.release(latency=1.0)
+        limit.release(latency=1.0)
+    assert limit.limit == 3                    # capped at the maximum
+
+
+def test_ordered_reemits_in_index_order():
+    pairs = [(2, "c"), (0, "a"), (3, "d"), (1, "b")]
+    assert list(ordered(pairs)) == [(0, "a"), (1, "b"), (2, "c"), (3, "d")]
+    assert list(ordered([(6, "x"), (5, "y")], start=5)) == [(5, "y"), (6, "x")]
+
+
+def test_two_stage_yields_in_order_within_the_limit():
+    rng = random.Random(0)
+    delays = [rng.uniform(0, 0.01) for _ in range(40)]
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def io_stage(i):
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(delays[i])
+        with lock:
+            in_flight[0] -= 1
+        return i * 10
+
+    limit = AdaptiveConcurrency("test", initial=3, maximum=3)
+    results = list(run_two_stage(range(40), lambda i: i, io_stage, cpu_workers=2, io_limit=limit))
+
+    assert results == [(i, i * 10) for i in range(40)]
+    assert peak[0] <= 3
+
+
+def test_throttled_calls_are_retried_and_shrink_the_limit(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "sleep", lambda seconds: None)
+    attempts = {}
+
+    def io_stage(i):
+        attempts[i] = attempts.get(i, 0) + 1
+        if i % 2 and attempts[i] == 1:
+            raise Throttled()
+        return i
+
+    limit = AdaptiveConcurrency("test", initial=4, maximum=4)
+    results = list(run_two_stage(range(6), lambda i: i, io_stage, cpu_workers=1, io_limit=limit,
+                                 is_throttle=lambda exc: isinstance(exc, Throttled)))
+
+    assert results == [(i, i) for i in range(6)]
+    assert [attempts[i] for i in range(6)] == [1, 2, 1, 2, 1, 2]
+    assert limit.limit < 4
+
+
+def test_errors_propagate_and_stop_the_run():
+    def cpu_stage(i):
+        if i == 3:
+            raise ValueError("bad item")
+        return i
+
+    limit = AdaptiveConcurrency("test", initial=2, maximum=2)
+    seen = []
+    with pytest.raises(ValueError, match="bad item"):
+        for idx, _ in run_two_stage(range(10), cpu_stage, lambda i: i, cpu_workers=1, io_limit=limit):
+            seen.append(idx)
+    # Whatever came through before the error is an in-order prefix of the items before it
+    assert seen == list(range(len(seen))) and len(seen) <= 3
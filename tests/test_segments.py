@@ -0,0 +1,102 @@
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+np = pytest.importorskip("numpy")
+
+import faiss
+from langchain_core.embeddings import Embeddings
+
+from core import segments
+from core.quantization import quantization_mode
+
+DIM = 8
+
+
+class FakeEmbeddings(Embeddings):
+    backend, model = "test", "fake"
+
+    def embed_documents(self, texts):
+        raise AssertionError("segments are built from precomputed vectors")
+
+    def embed_query(self, text):
+        raise AssertionError("segments are built from precomputed vectors")
+
+
+def _rows(start: int, n: int):
+    rng = np.random.default_rng(start)
+    return [(f"doc {i}", rng.normal(size=DIM).astype(np.float32).tolist(), {"i": i}) for i in range(start, start + n)]
+
+
+def _modes(store):
+    return [quantization_mode(faiss.read_index(str(seg / "index.faiss"))) for seg in segments.live_segments(store)]
+
+
+def test_compact_merges_only_segments_of_the_same_mode(tmp_path):
+    for i, mode in enumerate(["none", "fp16", "none", "sq8", "fp16"]):
+        segments.write_segment(tmp_path, _rows(i * 10, 10), FakeEmbeddings(), mode)
+
+    assert segments.compact(tmp_path)
+    # sq8 had a single segment and is left alone; merged segments keep their first member's place
+    assert _modes(tmp_path) == ["none", "fp16", "sq8"]
+    assert sum(faiss.read_index(str(seg / "index.faiss")).ntotal for seg in segments.live_segments(tmp_path)) == 50
+
+
+def test_compact_without_mergeable_segments_is_a_no_op(tmp_path):
+    for i, mode in enumerate(["none", "fp16"]):
+        segments.write_segment(tmp_path, _rows(i * 10, 10), FakeEmbeddings(), mode)
+    before = segments.read_manifest(tmp_path)
+
+    assert not segments.compact(tmp_path)
+    assert segments.read_manifest(tmp_path) == before
+    assert not (tmp_path / segments.RETIRED_FILE).exists()
+
+
+def test_write_appends_to_the_manifest_without_touching_existing_segments(tmp_path):
+    first = segments.write_segment(tmp_path, _rows(0, 5), FakeEmbeddings())
+    before = (segments.segment_path(tmp_path, first) / "index.faiss").read_bytes()
+    second = segments.write_segment(tmp_path, _rows(5, 7), FakeEmbeddings())
+
+    assert segments.read_manifest(tmp_path) == [first, second]
+    assert (segments.segment_path(tmp_path, first) / "index.faiss").read_bytes() == before
+    assert [faiss.read_index(str(seg / "index.faiss")).ntotal for seg in segments.live_segments(tmp_path)] == [5, 7]
+
+
+def test_compact_retires_merged_segments_until_the_grace_period_ends(tmp_path):
+    old = [segments.write_segment(tmp_path, _rows(i * 10, 10), FakeEmbeddings()) for i in range(3)]
+
+    assert segments.compact(tmp_path)
+    (merged,) = segments.read_manifest(tmp_path)
+    assert merged not in old
+    assert faiss.read_index(str(segments.segment_path(tmp_path, merged) / "index.faiss")).ntotal == 30
+    # Readers that loaded the old manifest can still open the old segments
+    assert set(segments._read_retired(tmp_path)) == set(old)
+    assert all(segments.segment_path(tmp_path, name).exists() for name in old)
+
+    segments._purge_retired(tmp_path, grace_sec=3600)
+    assert all(segments.segment_path(tmp_path, name).exists() for name in old)
+    segments._purge_retired(tmp_path, grace_sec=-1)
+    assert not any(segments.segment_path(tmp_path, name).exists() for name in old)
+    assert segments._read_retired(tmp_path) == {}
+    assert segments.segment_path(tmp_path, merged).exists()
+
+
+@pytest.mark.parametrize("modes", [["none", "none", "none"], ["fp16", "none", "sq8"]])
+def test_export_index_holds_every_live_vector(tmp_path, modes):
+    rows = []
+    for i, mode in enumerate(modes):
+        rows += _rows(i * 10, 10)
+        segments.write_segment(tmp_path / "store", rows[-10:], FakeEmbeddings(), mode)
+    (tmp_path / "out").mkdir()
+
+    index = faiss.read_index(str(segments.export_index(tmp_path / "store", tmp_path / "out")))
+    assert index.ntotal == 30
+    if len(set(modes)) > 1:
+        # Mixed modes are exported exactly, from the raw vectors
+        expected = np.asarray([vector for _, vector, _ in rows], dtype=np.float32)
+        np.testing.assert_allclose(index.reconstruct_n(0, 30), expected, rtol=1e-6)
+
+
+def test_export_index_of_an_empty_store_fails(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        segments.export_index(tmp_path, tmp_path)
@@ -0,0 +1,44 @@
+import tracemalloc
+import zipfile
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from core.streaming_loaders import iter_docx_paragraphs
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _paragraph(text: str) -> str:
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _write_docx(path, body: str) -> str:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", f'<?xml version="1.0"?><w:document {W}><w:body>{body}</w:body></w:document>')
+    return str(path)
+
+
+def test_docx_paragraphs_in_order_tables_included(tmp_path):
+    table = "<w:tbl><w:tr><w:tc>" + _paragraph("cell a") + "</w:tc><w:tc>" + _paragraph("cell b") + "</w:tc></w:tr></w:tbl>"
+    path = _write_docx(tmp_path / "doc.docx", _paragraph("first") + "<w:p/>" + table + _paragraph("last"))
+
+    assert list(iter_docx_paragraphs(path)) == ["first", "cell a", "cell b", "last"]
+
+
+def _peak_bytes(path) -> int:
+    tracemalloc.start()
+    try:
+        for _ in iter_docx_paragraphs(path):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_docx_memory_does_not_grow_with_paragraph_count(tmp_path):
+    small = _write_docx(tmp_path / "small.docx", "".join(_paragraph(f"paragraph {i}") for i in range(2_000)))
+    large = _write_docx(tmp_path / "large.docx", "".join(_paragraph(f"paragraph {i}") for i in range(40_000)))
+
+    assert _peak_bytes(large) < 2 * _peak_bytes(small)
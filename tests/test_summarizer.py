@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("backoff")
+
+import core.artifacts as artifacts
+from core.document_vectorizer import DocumentVectorizer
+from core.summarizer import _embed_passages
+from test_segments import FakeEmbeddings
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.texts += len(texts)
+        return [[float(len(t)), float(t.count(" ")), 1.0] for t in texts]
+
+
+def test_clustered_passages_of_an_indexed_transcript_need_no_embedding_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "_store", artifacts.ArtifactStore(tmp_path / "artifacts"))
+    words = [f"word{i % 97}" for i in range(3000)]
+    segments = [{"start": i * 5.0, "end": i * 5.0 + 5, "text": " ".join(words[i * 30:(i + 1) * 30])} for i in range(100)]
+    text = " ".join(s["text"] for s in segments)
+    upload = tmp_path / "upload"
+    upload.mkdir()
+    (upload / "transcript.json").write_text(json.dumps({"text": text, "segments": segments}), encoding="utf-8")
+
+    embeddings = CountingEmbeddings()
+    DocumentVectorizer(embeddings=embeddings, source_root=str(upload)).vectorize_by_format(
+        str(upload), str(tmp_path / "store"), chunk_size=1000, chunk_overlap=200)
+    assert embeddings.texts > 0
+
+    embeddings.texts = 0
+    passages = _embed_passages(text, embeddings)
+    assert passages and embeddings.texts == 0
@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from langchain.schema import Document
+
+from core.text_splitter import OffsetTextSplitter
+
+
+def _text(seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+    paragraphs = []
+    for _ in range(60):
+        lines = [" ".join(rng.choice(words) for _ in range(rng.randint(3, 40))) for _ in range(rng.randint(1, 5))]
+        paragraphs.append("\n".join(lines))
+    paragraphs.append("z" * 2500)                    # no separator at all
+    return "\n\n".join(paragraphs)
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", [(1000, 200), (300, 50), (120, 0)])
+def test_chunks_fit_and_offsets_point_into_the_source(chunk_size, chunk_overlap):
+    text = _text()
+    splitter = OffsetTextSplitter(chunk_size, chunk_overlap)
+    spans = splitter.split_spans(text)
+
+    assert spans
+    assert all(0 < e - s <= chunk_size for s, e in spans)
+    assert [s for s, _ in spans] == sorted(s for s, _ in spans)
+    assert splitter.split_text(text) == [text[s:e] for s, e in spans]
+    # Nothing but whitespace falls between consecutive chunks
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    for (_, prev_end), (start, _) in zip(spans, spans[1:]):
+        assert start <= prev_end or not text[prev_end:start].strip()
+        if chunk_overlap == 0:
+            assert start >= prev_end
+
+
+def test_consecutive_chunks_overlap():
+    text = " ".join(f"w{i:03d}" for i in range(400))
+    spans = OffsetTextSplitter(100, 30).split_spans(text)
+    overlaps = [prev_end - start for (_, prev_end), (start, _) in zip(spans, spans[1:])]
+    assert all(0 < overlap <= 30 for overlap in overlaps)
+
+
+def test_overlap_must_be_smaller_than_chunk_size():
+    with pytest.raises(ValueError):
+        OffsetTextSplitter(100, 100)
+
+
+def test_documents_carry_char_offsets_and_timestamps():
+    segments = [{"start": float(i), "end": i + 1.0, "text": f" sentence number {i}."} for i in range(50)]
+    text = "".join(seg["text"] for seg in segments).strip()
+    doc = Document(page_content=text, metadata={"source": "talk.mp4", "segments": segments})
+
+    chunks = OffsetTextSplitter(120, 20).split_documents([doc])
+    assert len(chunks) > 1
+    for chunk in chunks:
+        meta = chunk.metadata
+        assert "segments" not in meta and meta["source"] == "talk.mp4"
+        assert text[meta["start_char"]:meta["end_char"]] == chunk.page_content
+        first = int(chunk.page_content.split("number ", 1)[1].split(".")[0])
+        assert meta["start"] <= first < meta["end"]
+    assert chunks[0].metadata["start"] == 0.0
+    assert chunks[-1].metadata["end"] == 50.0
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from core.transcript_store import Transcript, index_path, read_transcript, write_transcript
+
+# Speech with gaps: silence 4–6 s and 9–15 s
+SEGMENTS = [
+    {"start": 1.0, "end": 4.0, "text": " one"},
+    {"start": 6.0, "end": 9.0, "text": " two"},
+    {"start": 15.0, "end": 18.0, "text": " three"},
+    {"start": 18.0, "end": 21.5, "text": " four"},
+]
+
+
+@pytest.fixture
+def transcript(tmp_path):
+    return Transcript(write_transcript(tmp_path / "transcript.ndjson", SEGMENTS))
+
+
+def _texts(segments):
+    return [seg["text"].strip() for seg in segments]
+
+
+def test_header_and_full_read(transcript):
+    assert len(transcript) == 4
+    assert transcript.duration == 21.5
+    assert transcript.text() == "one two three four"
+    assert list(transcript.segments()) == SEGMENTS
+    assert json.loads("".join(transcript.iter_legacy_json())) == transcript.to_dict()
+
+
+@pytest.mark.parametrize("start, end, expected", [
+    (0.0, None, ["one", "two", "three", "four"]),   # before the first segment
+    (0.0, 0.5, []),                                 # wholly before the first segment
+    (4.5, 5.5, []),                                 # inside a gap
+    (4.5, 7.0, ["two"]),                            # from a gap into speech
+    (10.0, 15.0, []),                               # end exactly at the next start
+    (10.0, 16.0, ["three"]),
+    (3.0, 6.5, ["one", "two"]),                     # overlapping both sides of a gap
+    (20.0, 100.0, ["four"]),                        # past the end
+    (30.0, None, []),                               # after the last segment
+])
+def test_between_around_gaps_and_edges(transcript, start, expected, end):
+    assert _texts(transcript.between(start, end)) == expected
+
+
+def test_span_bounds(transcript):
+    assert transcript.span(0.0) == (0, 4)
+    assert transcript.span(4.5, 5.5) == (0, 1)      # candidate only, filtered by between()
+    assert transcript.span(16.0, 18.0) == (2, 3)
+    assert transcript.span(30.0, 40.0) == (3, 4)
+    assert transcript.span(10.0, 5.0) == (1, 1)     # end before start: empty, never negative
+
+
+def test_paging_within_a_span(transcript):
+    assert _texts(transcript.between(0.0, None, offset=1, limit=2)) == ["two", "three"]
+    assert _texts(transcript.between(0.0, None, offset=3, limit=5)) == ["four"]
+    assert _texts(transcript.between(0.0, None, offset=9)) == []
+    assert _texts(transcript.segments(2, 1)) == ["three"]
+    assert transcript.text_between(5.0, 16.0) == "two three"
+
+
+def test_missing_index_is_rebuilt(tmp_path):
+    path = write_transcript(tmp_path / "transcript.ndjson", SEGMENTS, text="One, two. Three four!")
+    index_path(path).unlink()
+
+    transcript = Transcript(path)
+    assert index_path(path).exists()
+    assert transcript.segment_at(16.0) == 2
+    assert transcript.text() == "One, two. Three four!"
+    assert read_transcript(path)["segments"] == SEGMENTS
+
+
+def test_legacy_json_is_still_readable(tmp_path):
+    path = tmp_path / "transcript.json"
+    path.write_text(json.dumps({"text": "hi", "segments": SEGMENTS[:1]}), encoding="utf-8")
+    assert read_transcript(path) == {"text": "hi", "segments": SEGMENTS[:1]}